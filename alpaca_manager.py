@@ -1,8 +1,16 @@
 import os
+import math
+import time
+import uuid
 import pandas as pd
-import sqlalchemy
-from datetime import datetime
+import pytz
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from rate_limit import ALPACA_LIMITER, is_rate_limited
+from storage import get_engine, insert_trades, BatchWriter
+import ledger
+from tracing import traced
 
 # Alpaca Imports
 from alpaca.trading.client import TradingClient
@@ -17,17 +25,31 @@ load_dotenv()
 API_KEY = os.getenv("ALPACA_KEY")
 SECRET_KEY = os.getenv("ALPACA_SECRET")
 PAPER = os.getenv("ALPACA_PAPER") == "True"
+SUBMIT_WORKERS = 4      # Orders in flight at once
+SUBMIT_ATTEMPTS = 3     # Tries per order when the API answers 429
 
-if not API_KEY or not SECRET_KEY:
-    raise ValueError("❌ CRITICAL: API Keys not found in .env file!")
+class AccountSnapshot:
+    """Everything the execution stage needs, read once before any order goes out."""
+
+    def __init__(self, cash, buying_power, positions, pending_buys, prices, taken_at):
+        self.cash = cash
+        self.buying_power = buying_power
+        self.positions = positions        # set of held symbols
+        self.pending_buys = pending_buys  # set of symbols with an open BUY
+        self.prices = prices              # {symbol: latest trade price}
+        self.taken_at = taken_at
 
-# Database Setup
-engine = sqlalchemy.create_engine('sqlite:///silent_swing.db')
 
 class AlpacaExecutor:
-    def __init__(self):
-        self.trading_client = TradingClient(API_KEY, SECRET_KEY, paper=PAPER)
-        self.data_client = StockHistoricalDataClient(API_KEY, SECRET_KEY)
+    def __init__(self, trading_client=None, data_client=None, limiter=ALPACA_LIMITER, db=None):
+        # Clients can be injected (paper sandboxes, fakes for offline runs); keys are only needed otherwise
+        if (trading_client is None or data_client is None) and (not API_KEY or not SECRET_KEY):
+            raise ValueError("❌ CRITICAL: API Keys not found in .env file!")
+        self.trading_client = trading_client or TradingClient(API_KEY, SECRET_KEY, paper=PAPER)
+        self.data_client = data_client or StockHistoricalDataClient(API_KEY, SECRET_KEY)
+        self.limiter = limiter
+        self.engine = db if db is not None else get_engine()
+        self.writer = None  # BatchWriter, created on the first log_trade
 
     def get_buying_power(self):
         account = self.trading_client.get_account()
@@ -59,6 +81,7 @@ class AlpacaExecutor:
             print(f"⚠️ Alpaca Data Failed for {ticker}: {e}")
             return 0.0
 
+    @traced("broker.execute_buy")
     def execute_buy(self, ticker, stop_price, allocation_pct=0.10):
         import math
         try:
@@ -78,29 +101,11 @@ class AlpacaExecutor:
                 return
 
             # 3. Define The Bracket with Sanity Check
-            take_profit_price = round(latest_price * 1.10, 2)
-            
-            # CHECK: Alpaca rejects if Stop Loss >= Market Price
-            if stop_price >= latest_price:
-                print(f"⚠️ Invalid Stop Loss for {ticker}: Signal Stop (${stop_price}) is above Price (${latest_price}).")
-                # Fallback: Set stop loss to 2% below current entry
-                stop_loss_price = round(latest_price * 0.98, 2)
-                print(f"🔄 Adjusted Stop Loss to 2% below entry: ${stop_loss_price}")
-            else:
-                stop_loss_price = round(stop_price, 2)
-
+            take_profit_price, stop_loss_price = bracket_prices(ticker, latest_price, stop_price)
             print(f"🔒 Setting Bracket for {ticker}: Qty: {qty} | Stop ${stop_loss_price}")
 
             # 4. Construct Order (GTC)
-            order_data = MarketOrderRequest(
-                symbol=ticker,
-                qty=qty,
-                side=OrderSide.BUY,
-                time_in_force=TimeInForce.GTC,
-                order_class="bracket",
-                take_profit=TakeProfitRequest(limit_price=take_profit_price),
-                stop_loss=StopLossRequest(stop_price=stop_loss_price)
-            )
+            order_data = bracket_order(ticker, qty, take_profit_price, stop_loss_price)
 
             # 5. Submit
             order = self.trading_client.submit_order(order_data)
@@ -115,24 +120,233 @@ class AlpacaExecutor:
             # (Note: If this part triggers, you'd need additional code for a simple market order)
 
     def log_trade(self, ticker, action, price, qty, order_id):
-        """Saves trade details to the local database for the dashboard."""
-        import pandas as pd
-        df = pd.DataFrame([{
-            'date': datetime.now(),
-            'ticker': ticker,
-            'action': action,
-            'price': price,
-            'qty': qty,
-            'order_id': str(order_id)
-        }])
+        """Saves trade details to the local database for the dashboard (buffered, flushed within a second)."""
+        if self.writer is None:
+            self.writer = BatchWriter(self.engine, on_flush=lambda: ledger.safe_sync(self.engine))
+        self.writer.add({'date': datetime.now(), 'ticker': ticker, 'action': action, 'price': price, 'qty': qty,
+                         'order_id': str(order_id)})
+
+    # --- Batch execution stage ---
+    def take_snapshot(self, tickers):
+        """Account, positions, open orders and latest prices in 4 concurrent calls.
+
+        A failing call never aborts the stage: like the per-ticker helpers it
+        replaces, each one falls back (no cash, nothing held or pending, no price)
+        and plan_orders() skips what it can't size.
+        """
+        def account():
+            with self.limiter:
+                acct = self.trading_client.get_account()
+            return float(acct.cash), float(acct.buying_power)
+
+        def positions():
+            with self.limiter:
+                return {p.symbol for p in self.trading_client.get_all_positions()}
+
+        def pending_buys():
+            with self.limiter:
+                req = GetOrdersRequest(status=QueryOrderStatus.OPEN, side=OrderSide.BUY)
+                return {o.symbol for o in self.trading_client.get_orders(filter=req)}
+
+        def prices():
+            # One multi-symbol request instead of one per target; one bad symbol
+            # (e.g. BTC-USD on the stock endpoint) fails it, so fall back per symbol
+            if not tickers:
+                return {}
+            try:
+                with self.limiter:
+                    trades = self.data_client.get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=list(tickers)))
+                return {t: float(trades[t].price) for t in tickers if t in trades}
+            except Exception as e:
+                print(f"⚠️ Batched price request failed ({e}), fetching per symbol")
+            latest = {}
+            for t in tickers:
+                with self.limiter:
+                    price = self.get_latest_price(t)
+                if price:
+                    latest[t] = price
+            return latest
+
+        def safe(fn, default, what):
+            try:
+                return fn()
+            except Exception as e:
+                print(f"⚠️ Error fetching {what}: {e}")
+                return default
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            calls = [pool.submit(safe, fn, default, what) for fn, default, what in [
+                (account, (0.0, 0.0), "account"), (positions, set(), "positions"),
+                (pending_buys, set(), "pending orders"), (prices, {}, "latest prices")]]
+            (cash, buying_power), held, pending, latest = [c.result() for c in calls]
+        return AccountSnapshot(cash, buying_power, held, pending, latest, datetime.now())
+
+    def plan_orders(self, targets, snapshot, allocation_pct=0.10):
+        """Sizes every target against one snapshot -> (orders, skipped).
+
+        Each order spends allocation_pct of the cash left after the ones before it,
+        which is what sequential execute_buy calls saw once earlier fills settled.
+        """
+        orders, skipped = [], {}
+        remaining = min(snapshot.cash, snapshot.buying_power)
+        stamp = snapshot.taken_at.strftime('%Y%m%d')
+        for trade in targets:
+            ticker = trade['ticker']
+            price = snapshot.prices.get(ticker, 0.0)
+            if ticker in snapshot.positions:
+                skipped[ticker] = "already held"
+            elif ticker in snapshot.pending_buys:
+                skipped[ticker] = "buy already pending"
+            elif not price:
+                skipped[ticker] = "no latest price"
+            elif math.floor(remaining * allocation_pct / price) < 1:
+                skipped[ticker] = "insufficient funds for 1 share"
+            else:
+                qty = math.floor(remaining * allocation_pct / price)
+                take_profit, stop_loss = bracket_prices(ticker, price, trade['stop_price'])
+                orders.append({**trade, 'qty': qty, 'price': price, 'take_profit': take_profit, 'stop_loss': stop_loss,
+                               # One id per planned order, reused by its 429 retries and reconcile(); the
+                               # suffix lets a later attempt (e.g. re-entry after a stop-out) go in the same day
+                               'client_order_id': f"swing-{stamp}-{ticker}-{uuid.uuid4().hex[:8]}"})
+                remaining -= qty * price
+        return orders, skipped
+
+    def submit_orders(self, orders, max_workers=SUBMIT_WORKERS):
+        """Submits all bracket orders concurrently (rate-limited, 429s retried); returns orders with 'order'/'error' set."""
+        def submit(plan):
+            request = bracket_order(plan['ticker'], plan['qty'], plan['take_profit'], plan['stop_loss'], plan['client_order_id'])
+            for attempt in range(1, SUBMIT_ATTEMPTS + 1):
+                self.limiter.acquire()
+                try:
+                    return {**plan, 'order': self.trading_client.submit_order(request), 'error': None}
+                except Exception as e:
+                    if is_rate_limited(e) and attempt < SUBMIT_ATTEMPTS:
+                        time.sleep(2 ** attempt)
+                        continue
+                    return {**plan, 'order': None, 'error': str(e)}
+
+        if not orders:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(orders))) as pool:
+            return list(pool.map(submit, orders))
+
+    def reconcile(self, results, since):
+        """Matches submissions against the broker's order list (one call) and logs what really went in.
+
+        A submit that errored on our side (timeout, dropped connection) but reached
+        Alpaca is recovered via its client_order_id.
+        """
         try:
-            df.to_sql('trade_history', engine, if_exists='append', index=False)
+            with self.limiter:
+                req = GetOrdersRequest(status=QueryOrderStatus.ALL, after=since, limit=500)
+                broker = {o.client_order_id: o for o in self.trading_client.get_orders(filter=req)}
+        except Exception as e:
+            print(f"⚠️ Reconcile Error: {e}")
+            broker = {}
+
+        placed, failed = [], []
+        for r in results:
+            order = broker.get(r['client_order_id']) or r['order']
+            if order is not None and str(getattr(order, 'status', '')).lower().split('.')[-1] not in ('rejected', 'canceled'):
+                placed.append({**r, 'order': order})
+            else:
+                failed.append(r)
+
+        self.log_trades([{'ticker': r['ticker'], 'action': "BUY_BRACKET", 'price': r['price'], 'qty': r['qty'],
+                          'order_id': r['order'].id} for r in placed])
+        return placed, failed
+
+    @traced("broker.execute_batch")
+    def execute_batch(self, targets, allocation_pct=0.10):
+        """Snapshot -> size -> concurrent submit -> reconcile. Returns {'placed', 'failed', 'skipped', 'seconds'}."""
+        t0 = time.perf_counter()
+        since = datetime.now(pytz.utc) - timedelta(minutes=1)
+        snapshot = self.take_snapshot([t['ticker'] for t in targets])
+        orders, skipped = self.plan_orders(targets, snapshot, allocation_pct)
+        for ticker, reason in skipped.items():
+            print(f"⏭️ Skipping {ticker}: {reason}")
+        for o in orders:
+            print(f"🔒 Setting Bracket for {o['ticker']}: Qty: {o['qty']} | Stop ${o['stop_loss']}")
+        placed, failed = self.reconcile(self.submit_orders(orders), since)
+        for r in placed:
+            print(f"✅ EXECUTED: {r['qty']} shares of {r['ticker']} WITH PROTECTION")
+        for r in failed:
+            print(f"❌ EXECUTION ERROR ({r['ticker']}): {r['error'] or 'order not found at broker'}")
+        return {'placed': placed, 'failed': failed, 'skipped': skipped, 'seconds': round(time.perf_counter() - t0, 3)}
+
+    def log_trades(self, rows):
+        """Batched log_trade: one DB transaction for the whole execution stage."""
+        try:
+            insert_trades([{'date': datetime.now(), **r} for r in rows], self.engine)
         except Exception as e:
             print(f"⚠️ Database Log Error: {e}")
+            return
+        ledger.safe_sync(self.engine)
+
+
+def bracket_prices(ticker, latest_price, stop_price):
+    """(+10% take profit, stop) with Alpaca's rule that the stop must sit below the price."""
+    take_profit_price = round(latest_price * 1.10, 2)
+
+    # CHECK: Alpaca rejects if Stop Loss >= Market Price
+    if stop_price >= latest_price:
+        print(f"⚠️ Invalid Stop Loss for {ticker}: Signal Stop (${stop_price}) is above Price (${latest_price}).")
+        # Fallback: Set stop loss to 2% below current entry
+        stop_loss_price = round(latest_price * 0.98, 2)
+        print(f"🔄 Adjusted Stop Loss to 2% below entry: ${stop_loss_price}")
+    else:
+        stop_loss_price = round(stop_price, 2)
+    return take_profit_price, stop_loss_price
+
+
+def bracket_order(ticker, qty, take_profit_price, stop_loss_price, client_order_id=None):
+    return MarketOrderRequest(
+        symbol=ticker,
+        qty=qty,
+        side=OrderSide.BUY,
+        time_in_force=TimeInForce.GTC,
+        order_class="bracket",
+        take_profit=TakeProfitRequest(limit_price=take_profit_price),
+        stop_loss=StopLossRequest(stop_price=stop_loss_price),
+        client_order_id=client_order_id,
+    )
+
 
 if __name__ == "__main__":
-    try:
-        bot = AlpacaExecutor()
-        print(f"Executor Online. Buying Power: ${bot.get_buying_power():,.2f}")
-    except Exception as e:
-        print(f"Startup Failed: {e}")
\ No newline at end of file
+    import sys
+    if "--fake" not in sys.argv:
+        try:
+            bot = AlpacaExecutor()
+            print(f"Executor Online. Buying Power: ${bot.get_buying_power():,.2f}")
+        except Exception as e:
+            print(f"Startup Failed: {e}")
+        sys.exit()
+
+    # python alpaca_manager.py --fake -> old per-target loop vs batch stage on a fake broker with latency
+    import tempfile
+    from storage import open_engine, load_trade_history
+    from fake_broker import FakeBroker
+    LATENCY = 0.15
+    prices = {"NVDA": 140.0, "AMD": 120.0, "TSLA": 250.0, "XOM": 110.0}
+    targets = [{'ticker': t, 'close': p, 'rsi': 40.0, 'rvol': 2.0, 'stop_price': p * 0.95} for t, p in prices.items()]
+
+    def fake_executor(**kw):
+        broker = FakeBroker(cash=100000.0, latency=LATENCY, prices=prices, **kw)
+        db = open_engine(os.path.join(tempfile.mkdtemp(), "demo.db"))
+        return AlpacaExecutor(trading_client=broker, data_client=broker, db=db), broker, db
+
+    print(f"--- EXECUTION STAGE: {len(targets)} targets, {LATENCY * 1000:.0f}ms per API call ---")
+    bot, broker, db = fake_executor()
+    t0 = time.perf_counter()
+    for trade in targets:  # The loop run_autopilot used to run
+        if trade['ticker'] in bot.get_current_positions() or trade['ticker'] in bot.get_pending_buy_symbols():
+            continue
+        bot.execute_buy(trade['ticker'], stop_price=trade['stop_price'], allocation_pct=0.10)
+        time.sleep(1)
+    print(f"Sequential loop: {time.perf_counter() - t0:5.2f}s | {broker.calls} API calls\n")
+
+    bot, broker, db = fake_executor(timeout_symbols={"TSLA"}, reject_symbols={"XOM"})
+    result = bot.execute_batch(targets, allocation_pct=0.10)
+    print(f"Batch stage:     {result['seconds']:5.2f}s | {broker.calls} API calls | {broker.max_in_flight} in flight at peak")
+    print(f"Placed {[r['ticker'] for r in result['placed']]} (TSLA timed out but was recovered by client_order_id) | "
+          f"failed {[r['ticker'] for r in result['failed']]} | logged {len(load_trade_history(db))} rows")
@@ -1,24 +1,50 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
+from data_cache import CACHE
+from data_providers import get_provider
+from tracing import traced
+
+# We need 40 days of history to calculate average volume properly
+HISTORY_PADDING_DAYS = 40
+
+# Setup thresholds (shared with indicator_engine)
+RSI_OVERSOLD = 35
+RVOL_BREAKOUT = 1.5
+
+# Bars needed to score the final bar: 50 for MA50, 21 for the previous MA20
+LOOKBACK_BARS = 51
 
 class SilentBacktester:
-    def __init__(self, ticker, start_date, end_date, initial_capital=10000, fee=0.001):
+    def __init__(self, ticker, start_date, end_date, initial_capital=10000, fee=0.001, use_cache=True, provider=None,
+                 timeframe="1d", bars=None):
         self.ticker = ticker
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
         self.fee_rate = fee
+        self.use_cache = use_cache
+        self.provider = provider or get_provider()  # MARKET_DATA_PROVIDER unless injected
+        self.timeframe = timeframe  # Bar size; windows (MA20, RSI 7, ...) count bars of this size
+        self.bars = bars            # BarStore (intraday, resampled on demand) or PanelStore to read instead of the provider
         self.data = None
 
-    def fetch_data(self):
-        # We need 40 days of history to calculate average volume properly
-        start_dt = pd.to_datetime(self.start_date) - pd.Timedelta(days=40)
-        df = yf.download(self.ticker, start=start_dt, end=self.end_date, progress=False)
-        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+    @traced("backtester.fetch_data")
+    def fetch_data(self, refresh=False):
+        start_dt = pd.to_datetime(self.start_date) - pd.Timedelta(days=HISTORY_PADDING_DAYS)
+        if self.bars is not None:
+            self.data = self.bars.frame(self.ticker, self.timeframe, start_dt, self.end_date)
+            return self.data
+        if self.timeframe != "1d":
+            raise ValueError(f"{self.timeframe} bars need a BarStore (providers only deliver daily bars)")
+        if self.use_cache and self.provider.cacheable:
+            # Local Parquet store: only the missing date range goes to the network
+            df = CACHE.get(self.ticker, start_dt, self.end_date, self.provider.fetch, refresh=refresh)
+        else:
+            df = self.provider.fetch(self.ticker, start_dt, self.end_date)
         self.data = df
         return self.data
 
+    @traced("backtester.apply_strategy")
     def apply_strategy(self):
         df = self.data.copy()
         
@@ -46,13 +72,62 @@ class SilentBacktester:
         
         # Setup A: Oversold Bounce (UPDATED: RSI < 35)
         # This catches "early" dips in strong stocks like NVDA
-        df.loc[df['RSI'] < 35, 'Setup'] = 'OVERSOLD_DIP'
+        df.loc[df['RSI'] < RSI_OVERSOLD, 'Setup'] = 'OVERSOLD_DIP'
         
         # Setup B: Momentum Breakout (Volume Rush)
         # High Volume + Price Up + Price above MA20
-        df.loc[(df['RVOL'] > 1.5) & (df['Close'] > df['Open']) & (df['Close'] > df['MA20']), 'Setup'] = 'MOMENTUM_BREAK'
+        df.loc[(df['RVOL'] > RVOL_BREAKOUT) & (df['Close'] > df['Open']) & (df['Close'] > df['MA20']), 'Setup'] = 'MOMENTUM_BREAK'
         
         # Setup C: Trend Reclaim
         df.loc[(df['Close'] > df['MA20']) & (df['Close'].shift(1) < df['MA20'].shift(1)), 'Setup'] = 'TREND_RECLAIM'
 
-        self.data = df.loc[self.start_date:]
\ No newline at end of file
+        self.data = df.loc[self.start_date:]
+
+    def evaluate_last_bar(self):
+        """Indicators + setup for the final bar only (what the scanners read via data.iloc[-1]).
+
+        Uses just the last LOOKBACK_BARS rows of the raw data and returns a plain dict
+        with the same keys as an apply_strategy row, or None if there is no bar on or
+        after start_date.
+        """
+        df = self.data
+        if df is None or df.empty or df.index[-1] < pd.Timestamp(self.start_date):
+            return None
+        tail = df.iloc[-LOOKBACK_BARS:]
+        close = tail['Close'].to_numpy(dtype=float)
+        volume = tail['Volume'].to_numpy(dtype=float)
+        high_low = tail['High'].to_numpy(dtype=float) - tail['Low'].to_numpy(dtype=float)
+        open_ = float(tail['Open'].iloc[-1])
+
+        def window_mean(values, window):
+            return values[-window:].mean() if len(values) >= window else np.nan
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = np.diff(close, prepend=np.nan)
+            gain = window_mean(np.where(delta > 0, delta, 0.0), 7)
+            loss = window_mean(np.where(delta < 0, -delta, 0.0), 7)
+            rsi = 100 - (100 / (1 + np.float64(gain) / loss))
+            ma20 = window_mean(close, 20)
+            avg_vol = window_mean(volume, 20)
+            rvol = np.float64(volume[-1]) / avg_vol
+            prev_close = close[-2] if len(close) > 1 else np.nan
+            prev_ma20 = window_mean(close[:-1], 20)
+
+        last = {
+            'Date': tail.index[-1],
+            'Close': close[-1], 'Open': open_, 'High': float(tail['High'].iloc[-1]), 'Low': float(tail['Low'].iloc[-1]),
+            'Volume': volume[-1],
+            'MA20': ma20, 'MA50': window_mean(close, 50), 'RSI': rsi, 'AvgVol': avg_vol, 'RVOL': rvol,
+            'ATR': window_mean(high_low, 14),
+        }
+
+        # Same precedence as apply_strategy: later setups override earlier ones
+        setup = 'None'
+        if rsi < RSI_OVERSOLD:
+            setup = 'OVERSOLD_DIP'
+        if rvol > RVOL_BREAKOUT and close[-1] > open_ and close[-1] > ma20:
+            setup = 'MOMENTUM_BREAK'
+        if close[-1] > ma20 and prev_close < prev_ma20:
+            setup = 'TREND_RECLAIM'
+        last['Setup'] = setup
+        return last
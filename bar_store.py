@@ -0,0 +1,238 @@
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+from indicator_engine import PricePanel
+
+# Minute/hourly bars for the whole universe, kept compact on one shared time
+# axis: float32 prices, integer volume, NaN where a ticker has no bar.
+# Coarser timeframes are aggregated with vectorized reduceat passes over all
+# tickers at once and cached, so 15m/1h/1d views cost one pass each.
+
+# --- CONFIGURATION ---
+PRICE_DTYPE = np.float32
+VOLUME_DTYPE = np.uint32       # Upcast to int64 on ingest if a bar's volume doesn't fit
+CHUNK_TICKERS = 64             # Tickers aggregated per pass (bounds the temporary index arrays)
+UNITS = {"m": 1, "h": 60, "d": 1440}
+PRICES = ["Open", "High", "Low", "Close"]
+
+
+def timeframe_minutes(timeframe):
+    """'15m' -> 15, '1h' -> 60, '1d' -> 1440. Buckets must tile a day evenly."""
+    match = re.fullmatch(r"(\d+)([mhd])", str(timeframe))
+    if not match:
+        raise ValueError(f"Unknown timeframe {timeframe!r} (use e.g. 1m, 15m, 1h, 1d)")
+    minutes = int(match.group(1)) * UNITS[match.group(2)]
+    if minutes <= 0 or 1440 % minutes:
+        raise ValueError(f"Timeframe {timeframe!r} does not divide a day evenly")
+    return minutes
+
+
+class BarStore:
+    """OHLCV for many tickers as (times x tickers) arrays at one timeframe.
+
+    Buckets are aligned to midnight like pandas resample(), so '1d' bars are
+    labelled with the session date and line up with the daily providers.
+    """
+
+    def __init__(self, times, tickers, fields, timeframe="1m"):
+        self.times = np.asarray(times, dtype="datetime64[ns]")
+        self.tickers = list(tickers)
+        self.fields = fields
+        self.timeframe = timeframe
+        self.minutes = timeframe_minutes(timeframe)
+        self.column = {t: j for j, t in enumerate(self.tickers)}
+        self._resampled = {}
+
+    @classmethod
+    def allocate(cls, times, tickers, timeframe="1m", volume_dtype=VOLUME_DTYPE):
+        """Empty store on a known time axis; fill it ticker by ticker with put()."""
+        shape = (len(times), len(tickers))
+        fields = {f: np.full(shape, np.nan, dtype=PRICE_DTYPE) for f in PRICES}
+        fields["Volume"] = np.zeros(shape, dtype=volume_dtype)
+        return cls(np.sort(np.asarray(times, dtype="datetime64[ns]")), tickers, fields, timeframe)
+
+    @classmethod
+    def from_frames(cls, frames, timeframe="1m"):
+        """{ticker: OHLCV DataFrame} -> BarStore on the union of all timestamps."""
+        frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        times = np.unique(np.concatenate([df.index.to_numpy(dtype="datetime64[ns]") for df in frames.values()])) if frames else []
+        store = cls.allocate(times, list(frames), timeframe)
+        for ticker, df in frames.items():
+            store.put(ticker, df)
+        return store
+
+    def put(self, ticker, df):
+        """Writes one ticker's bars (their timestamps must be on the store's axis)."""
+        stamps = df.index.to_numpy(dtype="datetime64[ns]")
+        rows = np.searchsorted(self.times, stamps).clip(max=max(len(self.times) - 1, 0))
+        if len(stamps) and (not len(self.times) or (self.times[rows] != stamps).any()):
+            raise ValueError(f"{ticker}: timestamps outside the store's time axis")
+        j = self.column[ticker]
+        for f in PRICES:
+            self.fields[f][rows, j] = df[f].to_numpy(dtype=float)
+        volume = df["Volume"].fillna(0).to_numpy()
+        if len(volume) and volume.max() > np.iinfo(self.fields["Volume"].dtype).max:
+            self.fields["Volume"] = self.fields["Volume"].astype(np.int64)
+        self.fields["Volume"][rows, j] = volume
+        self._resampled = {}
+
+    def extend(self, frames):
+        """Appends newer bars (e.g. today's minutes); new tickers get their own columns."""
+        new = BarStore.from_frames(frames, self.timeframe)
+        if len(self.times) and len(new.times) and new.times[0] <= self.times[-1]:
+            raise ValueError("extend() only appends bars after the last stored time")
+        tickers = self.tickers + [t for t in new.tickers if t not in self.column]
+        volume_dtype = np.result_type(self.fields["Volume"], new.fields["Volume"])
+        merged = BarStore.allocate(np.concatenate([self.times, new.times]), tickers, self.timeframe, volume_dtype)
+        n, cols = len(self.times), [merged.column[t] for t in new.tickers]
+        for f, arr in merged.fields.items():
+            arr[:n, :len(self.tickers)] = self.fields[f]
+            arr[n:, cols] = new.fields[f]
+        self.times, self.tickers, self.fields, self.column = merged.times, merged.tickers, merged.fields, merged.column
+        self._resampled = {}
+        return self
+
+    @property
+    def mask(self):
+        return ~np.isnan(self.fields["Close"])
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + sum(arr.nbytes for arr in self.fields.values())
+
+    # --- Resampling ---
+    def resample(self, timeframe):
+        """The store aggregated to a coarser timeframe (computed once, then cached)."""
+        minutes = timeframe_minutes(timeframe)
+        if minutes == self.minutes:
+            return self
+        if minutes % self.minutes:
+            raise ValueError(f"Can't build {timeframe} bars from {self.timeframe} bars")
+        if timeframe not in self._resampled:
+            # Start from the coarsest cached view that nests into the target (e.g. 1d from 1h)
+            source = max((s for s in self._resampled.values() if minutes % s.minutes == 0),
+                         key=lambda s: s.minutes, default=self)
+            self._resampled[timeframe] = source._aggregate(timeframe, minutes)
+        return self._resampled[timeframe]
+
+    def _aggregate(self, timeframe, minutes):
+        # Times are sorted, so each bucket is a contiguous run of rows: one reduceat per field
+        bucket = self.times.astype(np.int64) // (minutes * 60_000_000_000)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]]) if len(bucket) else np.zeros(0, dtype=np.int64)
+        times = (bucket[starts] * minutes * 60_000_000_000).astype("datetime64[ns]")
+        out = BarStore.allocate(times, self.tickers, timeframe, np.int64)
+        n_rows = len(self.times)
+        if not len(starts):
+            return out
+
+        ends = np.r_[starts[1:], n_rows]
+        row = np.arange(n_rows, dtype=np.int32)[:, None]
+        for lo in range(0, len(self.tickers), CHUNK_TICKERS):
+            cols = slice(lo, lo + CHUNK_TICKERS)
+            valid = ~np.isnan(self.fields["Close"][:, cols])
+            if valid.all():
+                # No missing bars in this chunk: Open/Close are just each bucket's first/last row
+                out.fields["Open"][:, cols] = self.fields["Open"][starts, cols]
+                out.fields["Close"][:, cols] = self.fields["Close"][ends - 1, cols]
+            else:
+                # Open = first bar in the bucket, Close = last bar: reduce row numbers, then gather
+                first = np.minimum.reduceat(np.where(valid, row, n_rows), starts, axis=0)
+                last = np.maximum.reduceat(np.where(valid, row, -1), starts, axis=0)
+                picked = np.arange(first.shape[1])[None, :]
+                has_bar = first < n_rows
+                out.fields["Open"][:, cols] = np.where(has_bar, self.fields["Open"][:, cols][first.clip(max=n_rows - 1), picked], np.nan)
+                out.fields["Close"][:, cols] = np.where(has_bar, self.fields["Close"][:, cols][last.clip(min=0), picked], np.nan)
+            out.fields["High"][:, cols] = np.fmax.reduceat(self.fields["High"][:, cols], starts, axis=0)
+            out.fields["Low"][:, cols] = np.fmin.reduceat(self.fields["Low"][:, cols], starts, axis=0)
+            out.fields["Volume"][:, cols] = np.add.reduceat(self.fields["Volume"][:, cols], starts, axis=0, dtype=np.int64)
+        return out
+
+    # --- Views ---
+    def frame(self, ticker, timeframe=None, start=None, end=None):
+        """One ticker as an OHLCV DataFrame (float64 prices, like a provider frame), end exclusive."""
+        store = self.resample(timeframe or self.timeframe)
+        j = store.column[ticker]
+        rows = ~np.isnan(store.fields["Close"][:, j])
+        if start is not None:
+            rows &= store.times >= np.datetime64(pd.Timestamp(start), "ns")
+        if end is not None:
+            rows &= store.times < np.datetime64(pd.Timestamp(end), "ns")
+        df = pd.DataFrame({f: store.fields[f][rows, j].astype(float) for f in ["Close", "High", "Low", "Open"]},
+                          index=pd.DatetimeIndex(store.times[rows], name="Date"))
+        df["Volume"] = store.fields["Volume"][rows, j].astype(np.int64)
+        return df
+
+    def panel(self, timeframe=None):
+        """PricePanel (float64) for indicator_engine, e.g. compute_indicators(store.panel('1h'))."""
+        store = self.resample(timeframe or self.timeframe)
+        mask = store.mask
+        fields = {f: store.fields[f].astype(float) for f in PRICES}
+        fields["Volume"] = np.where(mask, store.fields["Volume"], np.nan)
+        return PricePanel(pd.DatetimeIndex(store.times, name="Date"), store.tickers, fields, mask)
+
+
+if __name__ == "__main__":
+    # python bar_store.py --demo [N_TICKERS]  -> offline: equivalence vs pandas, then a year of minute bars
+    if "--demo" not in sys.argv:
+        print("Usage: python bar_store.py --demo [N_TICKERS]")
+        sys.exit(0)
+
+    import resource
+    from backtester import SilentBacktester
+    from indicator_engine import compute_indicators, frame_for
+    from synthetic_data import make_intraday
+
+    # 1. Equivalence: reduceat aggregates vs pandas resample, indicators on 1h bars
+    frames = {f"SYN{i:04d}": make_intraday(f"SYN{i:04d}", "2024-01-01", "2024-04-01", seed=i) for i in range(20)}
+    frames["SYN0003"] = frames["SYN0003"].iloc[::3]  # An illiquid name with missing minutes
+    store = BarStore.from_frames(frames)
+    rules = {"15m": "15min", "1h": "1h", "1d": "1D"}
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    worst = 0.0
+    for tf, rule in rules.items():
+        for ticker, df in frames.items():
+            compact = df.astype({f: PRICE_DTYPE for f in PRICES}).astype({f: float for f in PRICES})
+            expected = compact.resample(rule).agg(agg).dropna(subset=["Close"])
+            got = store.frame(ticker, tf)
+            assert got.index.equals(expected.index), (tf, ticker)
+            worst = max(worst, float((got[list(agg)] - expected[list(agg)]).abs().max().max()))
+    print(f"15m/1h/1d aggregates vs pandas resample on float32 input: max abs diff {worst:.1e}")
+    t0 = time.perf_counter()
+    for df in frames.values():
+        df.resample("15min").agg(agg)
+    t_pandas = time.perf_counter() - t0
+    store._resampled = {}
+    t0 = time.perf_counter()
+    store.resample("15m")
+    print(f"15m for {len(frames)} tickers: per-ticker pandas {t_pandas * 1000:.0f} ms vs one reduceat pass {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    bot = SilentBacktester("SYN0001", "2024-03-01", "2024-04-01", timeframe="1h", bars=store)
+    bot.fetch_data()
+    bot.apply_strategy()
+    panel = store.panel("1h")
+    batched = frame_for(panel, compute_indicators(panel), "SYN0001", "2024-03-01")
+    diff = np.nanmax(np.abs(bot.data[["MA20", "RSI", "RVOL", "ATR"]].to_numpy() - batched[["MA20", "RSI", "RVOL", "ATR"]].to_numpy()))
+    same = (bot.data["Setup"].to_numpy() == batched["Setup"].to_numpy()).all()
+    print(f"SilentBacktester on 1h bars: {len(bot.data)} bars | vs indicator_engine max abs diff {diff:.1e} | setups equal: {same}")
+
+    # 2. Scale: a year of minute bars, filled ticker by ticker
+    n = int(sys.argv[sys.argv.index("--demo") + 1]) if len(sys.argv) > sys.argv.index("--demo") + 1 else 500
+    tickers = [f"SYN{i:04d}" for i in range(n)]
+    axis = make_intraday("AXIS", "2024-01-01", "2025-01-01").index
+    t0 = time.perf_counter()
+    big = BarStore.allocate(axis, tickers)
+    for i, ticker in enumerate(tickers):
+        big.put(ticker, make_intraday(ticker, "2024-01-01", "2025-01-01", seed=i))
+    t_fill = time.perf_counter() - t0
+    print(f"{n} tickers x {len(axis):,} minutes: {big.nbytes / 1e9:.2f} GB in memory "
+          f"({big.nbytes / big.mask.size:.0f} B/bar) | filled in {t_fill:.1f}s")
+    for tf in ["15m", "1h", "1d"]:
+        t0 = time.perf_counter()
+        view = big.resample(tf)
+        t1 = time.perf_counter()
+        big.resample(tf)
+        print(f"  {tf:>3}: {len(view.times):,} bars x {n} tickers in {(t1 - t0) * 1000:.0f} ms "
+              f"(cached re-read {(time.perf_counter() - t1) * 1e6:.0f} µs)")
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e6:.2f} GB")
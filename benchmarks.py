@@ -0,0 +1,330 @@
+import os
+import sys
+import io
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from functools import cached_property
+
+# Offline benchmark suite: every hot path runs on synthetic_data inside a
+# throwaway working directory, so no network, broker, Telegram or real DB is touched.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+REPORT_FILE = os.path.join(REPO_DIR, "benchmark_report.json")
+BASELINE_FILE = os.path.join(REPO_DIR, "benchmark_baseline.json")
+THRESHOLD = 0.25          # Fail when a benchmark runs >25% slower than the baseline
+MEMORY_THRESHOLD = 0.50   # ...or needs >50% more peak memory
+REPEATS = 5               # Best-of-N wall time
+NOISE_FLOOR = 0.02        # Seconds; smaller slowdowns are timer noise, not regressions
+SCALES = {
+    "quick":   {"tickers": 50,   "years": 2,  "fills": 500,   "orders": 200},
+    "default": {"tickers": 300,  "years": 5,  "fills": 5000,  "orders": 1000},
+    "full":    {"tickers": 1000, "years": 10, "fills": 20000, "orders": 5000},
+}
+GAP_RATE = 0.01           # Share of bars dropped at random
+LATE_LISTING_FRAC = 0.10  # Tickers whose history starts late
+
+BENCHMARKS = {}
+
+
+def benchmark(name, unit):
+    """Registers fn(data) -> {"run": callable, "units": n, "reset": optional callable}."""
+    def register(fn):
+        BENCHMARKS[name] = (unit, fn)
+        return fn
+    return register
+
+
+class BenchData:
+    """Synthetic inputs shared by all benchmarks, built on first use (not timed)."""
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    @cached_property
+    def frames(self):
+        from synthetic_data import make_universe
+        return make_universe(self.scale["tickers"], self.scale["years"], gap_rate=GAP_RATE,
+                             late_listing_frac=LATE_LISTING_FRAC, seed=7)
+
+    @cached_property
+    def panel(self):
+        from indicator_engine import build_panel
+        return build_panel(self.frames)
+
+    @cached_property
+    def ind(self):
+        from indicator_engine import compute_indicators
+        return compute_indicators(self.panel)
+
+    @cached_property
+    def history(self):
+        from synthetic_data import make_trade_history
+        return make_trade_history(self.scale["fills"], n_tickers=50, seed=11)
+
+    @property
+    def bars(self):
+        return int(self.panel.mask.sum())
+
+    @property
+    def sim_start(self):
+        return str(self.panel.dates[min(60, len(self.panel.dates) - 1)].date())
+
+
+# --- Hot paths ---
+@benchmark("apply_strategy", unit="bars")
+def bench_apply_strategy(data):
+    from backtester import SilentBacktester
+    bots = []
+    for ticker, df in data.frames.items():
+        bot = SilentBacktester(ticker, str(df.index[0].date()), str(df.index[-1].date()), use_cache=False)
+        bots.append((bot, df))
+
+    def run():
+        for bot, df in bots:
+            bot.data = df
+            bot.apply_strategy()
+    return {"run": run, "units": sum(len(df) for df in data.frames.values())}
+
+
+@benchmark("universe_load_replay", unit="bars")
+def bench_universe_load_replay(data):
+    # UniverseLoader on the in-memory replay source: loader overhead with zero network latency
+    from data_providers import ReplayProvider
+    from universe_loader import UniverseLoader
+    provider = ReplayProvider.from_frames(data.frames)
+    start, end = str(data.panel.dates[0].date()), str((data.panel.dates[-1] + pd.Timedelta(days=1)).date())
+    return {"run": lambda: UniverseLoader(provider=provider).load(list(data.frames), start, end), "units": data.bars}
+
+
+@benchmark("build_panel", unit="bars")
+def bench_build_panel(data):
+    from indicator_engine import build_panel
+    return {"run": lambda: build_panel(data.frames), "units": data.bars}
+
+
+@benchmark("compute_indicators", unit="bars")
+def bench_compute_indicators(data):
+    from indicator_engine import compute_indicators
+    return {"run": lambda: compute_indicators(data.panel), "units": data.bars}
+
+
+@benchmark("autopilot_selection", unit="tickers")
+def bench_autopilot_selection(data):
+    # run_autopilot minus the network: last-bar scan + ranking
+    from indicator_engine import evaluate_latest
+    from main_autopilot import select_targets
+    start = str(data.panel.dates[-30].date())
+    return {"run": lambda: select_targets(evaluate_latest(data.panel, start)), "units": len(data.panel.tickers)}
+
+
+@benchmark("sim_triple_threat", unit="ticker-days")
+def bench_sim_triple_threat(data):
+    from simulation_engine import run_portfolio, triple_threat_rules
+    return {"run": lambda: run_portfolio(data.panel, data.ind, triple_threat_rules(), start_date=data.sim_start),
+            "units": data.panel.mask.size}
+
+
+@benchmark("sim_refined", unit="ticker-days")
+def bench_sim_refined(data):
+    from simulation_engine import run_portfolio, refined_rules
+    return {"run": lambda: run_portfolio(data.panel, data.ind, refined_rules(), start_date=data.sim_start),
+            "units": data.panel.mask.size}
+
+
+@benchmark("exit_simulator", unit="trades")
+def bench_exit_simulator(data):
+    # Every setup hit as a bracket entry: exits for all of them in one vectorized call
+    from exit_simulator import simulate_exits
+    from indicator_engine import NO_SETUP
+    t, j = np.nonzero((data.ind["Setup"] != NO_SETUP) & data.panel.mask & ~np.isnan(data.ind["ATR"]))
+    entries = pd.DataFrame({"Ticker": np.array(data.panel.tickers)[j], "Entry_Date": data.panel.dates[t]})
+    return {"run": lambda: simulate_exits(data.panel, data.ind, entries, "bracket"), "units": len(entries)}
+
+
+@benchmark("realized_performance", unit="fills")
+def bench_realized_performance(data):
+    from performance import calculate_realized_performance
+    return {"run": lambda: calculate_realized_performance(data.history), "units": len(data.history)}
+
+
+@benchmark("equity_curve", unit="fills")
+def bench_equity_curve(data):
+    # Full daily rebuild (fills x closes); the dashboard only pays this for new days
+    from equity_history import daily_equity
+    days = pd.bdate_range(data.history["date"].min().normalize(), data.history["date"].max().normalize())
+    return {"run": lambda: daily_equity(data.history, data.frames, days), "units": len(data.history)}
+
+
+@benchmark("check_fills", unit="fills")
+def bench_check_fills(data):
+    # The DB knows every fill but the broker's `orders // 10` newest ones
+    import storage
+    import ledger
+    from fake_broker import FakeBroker
+    from trade_monitor import TradeMonitor
+    n_new = max(1, min(data.scale["orders"], len(data.history)) // 10)
+    broker = FakeBroker(data.history)
+    known = data.history.iloc[:len(data.history) - n_new]
+    known_rows = known.to_dict("records")
+    new_ids = set(data.history["order_id"].iloc[len(known):])
+    # The previous poll ran after every submission and saw the new fills' orders still open
+    watermark = max(o.submitted_at for o in broker.orders) + pd.Timedelta(seconds=1)
+    state = {"resets": 0}
+
+    def reset():
+        if "engine" in state:
+            state["engine"].dispose()
+        # Fresh file each time (WAL leaves -wal/-shm siblings behind, so no reuse)
+        state["resets"] += 1
+        state["engine"] = storage.open_engine(f"bench_fills_{state['resets']}.db")  # Relative: lands in the sandbox
+        storage.insert_trades(known_rows, state["engine"])
+        ledger.sync(state["engine"])  # closed_trades is built once at startup, polls only extend it
+        monitor = TradeMonitor(client=broker, db=state["engine"])
+        monitor._ensure_ledger()  # One-off startup cost (index build, id set), not part of a poll
+        monitor._save_watermark(watermark, new_ids)
+        state["monitor"] = monitor
+
+    return {"run": lambda: state["monitor"].check_fills(), "units": n_new, "reset": reset}
+
+
+# --- Runner ---
+@contextlib.contextmanager
+def sandbox():
+    """Runs the suite in a throwaway directory with an offline environment, then puts both back.
+
+    Repo modules are imported inside the benchmarks, so they pick these settings up.
+    """
+    work_dir = tempfile.mkdtemp(prefix="swing_bench_")
+    saved_env, cwd = dict(os.environ), os.getcwd()
+    os.environ["OHLCV_CACHE_DIR"] = os.path.join(work_dir, "data_cache")
+    os.environ["INDICATOR_STATE_FILE"] = os.path.join(work_dir, "indicator_state.json")
+    os.environ["MARKET_DATA_PROVIDER"] = "replay"  # Nothing here may reach a vendor
+    os.environ["TELEGRAM_TOKEN"] = ""  # Alerts print "Alert Skipped" instead of posting
+    os.chdir(work_dir)  # Anything that writes relative paths (sqlite, state files) lands in the sandbox
+    try:
+        yield work_dir
+    finally:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def measure(spec, repeats):
+    reset = spec.get("reset") or (lambda: None)
+    times = []
+    for _ in range(repeats):
+        reset()
+        t0 = time.perf_counter()
+        spec["run"]()
+        times.append(time.perf_counter() - t0)
+
+    # Separate pass: tracemalloc slows the code down, so it never feeds the timings
+    reset()
+    tracemalloc.start()
+    spec["run"]()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), float(np.median(times)), peak
+
+
+def run_suite(scale_name="default", only=None, repeats=REPEATS):
+    data = BenchData(SCALES[scale_name])
+    results = {}
+    for name, (unit, factory) in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec = factory(data)
+            best, median, peak = measure(spec, repeats)
+        results[name] = {
+            "seconds": round(best, 6),
+            "median_seconds": round(median, 6),
+            "throughput": round(spec["units"] / best, 1) if best > 0 else None,
+            "unit": f"{unit}/s",
+            "units": spec["units"],
+            "peak_mb": round(peak / 1e6, 2),
+        }
+        print(f"{name:<22} {best * 1000:10.1f} ms  {results[name]['throughput']:>14,.0f} {unit}/s  {peak / 1e6:8.1f} MB")
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "scale": scale_name, **SCALES[scale_name], "repeats": repeats,
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=THRESHOLD, memory_threshold=MEMORY_THRESHOLD):
+    """Returns the list of regressions (benchmarks slower / bigger than the baseline allows)."""
+    if baseline["meta"].get("scale") != report["meta"]["scale"]:
+        print(f"⚠️ Baseline scale '{baseline['meta'].get('scale')}' != '{report['meta']['scale']}', ratios are not comparable")
+    regressions = []
+    print(f"\n{'benchmark':<22} {'time':>8} {'memory':>8}")
+    for name, now in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<22} {'new':>8}")
+            continue
+        t_ratio = now["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        m_ratio = now["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+        slow = t_ratio > 1 + threshold and now["seconds"] - base["seconds"] > NOISE_FLOOR
+        big = m_ratio > 1 + memory_threshold
+        flag = " ❌" if slow or big else ""
+        print(f"{name:<22} {t_ratio:7.2f}x {m_ratio:7.2f}x{flag}")
+        if slow or big:
+            regressions.append({"benchmark": name, "time_ratio": round(t_ratio, 3), "memory_ratio": round(m_ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Silent Swing hot paths")
+    parser.add_argument("--scale", choices=list(SCALES), default="default")
+    parser.add_argument("--only", nargs="*", help=f"Subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    with sandbox():
+        print(f"--- BENCHMARKS ({args.scale}: {SCALES[args.scale]}) ---")
+        report = run_suite(args.scale, args.only, args.repeats)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold, args.memory_threshold)
+    report["regressions"] = regressions
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report saved to {args.report}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over the threshold: {', '.join(r['benchmark'] for r in regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,14 +16,13 @@ for ticker in universe:
                                (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d'),
                                datetime.datetime.now().strftime('%Y-%m-%d'))
         df = bot.fetch_data()
-        bot.apply_strategy()
-        
-        last_row = bot.data.iloc[-1]
+        last_row = bot.evaluate_last_bar()
+        if last_row is None: continue
         rsi_val = round(last_row['RSI'], 2)
         price = round(last_row['Close'], 2)
         
-        # Determine the Actionable Advice
-        if last_row['Signal'] == 1:
+        # Determine the Actionable Advice (any active setup = buy signal)
+        if last_row['Setup'] != 'None':
             action = "BUY / HOLD"
         else:
             action = "CASH / SELL"
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import sqlalchemy
 import plotly.express as px
 import plotly.graph_objects as go
 import yfinance as yf
@@ -12,6 +11,12 @@ import subprocess
 import sys
 import os
 from dotenv import load_dotenv
+from performance import calculate_realized_performance, realized_frame
+import equity_history
+import ledger
+from storage import get_engine, get_readonly_engine, HistoryCache
+import monte_carlo
+import tracing
 
 # --- LOAD SECRETS ---
 load_dotenv()
@@ -24,6 +29,11 @@ CHAMP_SECRET = os.getenv("CHAMP_SECRET")
 PAPER = os.getenv("ALPACA_PAPER") == "True"
 
 # --- CONFIGURATION ---
+# Streamlit reruns this file on every click; broker reads are shared by all
+# sessions/tabs for this long, so API usage doesn't grow with open browsers
+ACCOUNT_TTL = 15    # Seconds: equity / buying power
+POSITIONS_TTL = 15  # Seconds: open positions
+ORDERS_TTL = 30     # Seconds: pending orders
 st.set_page_config(
     page_title="Silent Swing | Fund Terminal",
     layout="wide",
@@ -40,6 +50,117 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- CACHED DATA ACCESS ---
+# Clients/engines live for the whole server process; broker calls are cached per
+# account for a few seconds; history is pulled incrementally (only new row ids).
+@st.cache_resource
+def get_client(key, secret, paper):
+    return TradingClient(key, secret, paper=paper)
+
+@st.cache_resource
+def get_history_cache(path):
+    # WAL engine shared with the bot's writers
+    return HistoryCache(get_engine(path))
+
+# 1. DATABASE (History)
+def load_db_history(path):
+    try:
+        # A missing DB is just "no history yet"; storage migrates older layouts (incl. 'trades')
+        if not os.path.exists(path): return pd.DataFrame(columns=['date', 'ticker', 'action', 'price', 'qty'])
+        return get_history_cache(path).refresh()
+    except Exception as e:
+        print(f"⚠️ History Load Error: {e}")
+        return pd.DataFrame(columns=['date', 'ticker', 'action', 'price', 'qty'])
+
+def get_equity_curve(path, total_equity):
+    # End-of-day rows are written by the monitor (equity_history.update_snapshots); the dashboard only reads them
+    live_only = pd.DataFrame([{'Date': datetime.now(), 'Balance': total_equity}])
+    if not os.path.exists(path):
+        return live_only
+    try:
+        return equity_history.equity_curve(get_readonly_engine(path), total_equity)
+    except Exception as e:
+        print(f"⚠️ Equity Snapshot Read Error: {e}")
+        return live_only
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_realized_performance(path, last_id, _history_df):
+    # Precomputed closed_trades, kept current by the bot's writers (trade_monitor / alpaca_manager);
+    # the dashboard only reads it. A DB that was never synced falls back to the history walk.
+    try:
+        closed = ledger.load_closed_trades(get_readonly_engine(path))
+        if closed.empty and not _history_df.empty:
+            return calculate_realized_performance(_history_df)
+        return realized_frame(closed)
+    except Exception as e:
+        print(f"⚠️ Ledger Read Error: {e}")
+        return calculate_realized_performance(_history_df)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_ledger_view(path, last_id, _history_df):
+    df_disp = _history_df.sort_values('date', ascending=False).copy()
+    df_disp['Value'] = df_disp['price'] * df_disp['qty']
+    df_disp['Action'] = df_disp['action'].apply(lambda x: "🟢 BUY" if "BUY" in x else "🔴 SELL")
+    return df_disp[['date', 'ticker', 'Action', 'qty', 'price', 'Value']]
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def get_monte_carlo(path, mtime):
+    # Written by `python monte_carlo.py`; re-read only when the file changes
+    try:
+        return monte_carlo.load_results(path)
+    except Exception as e:
+        print(f"⚠️ Monte Carlo Load Error: {e}")
+        return None
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def get_metrics(path, mtime):
+    # metrics.jsonl from SWING_TRACE=1 runs; re-parsed only when it grows
+    return tracing.load_runs(path)
+
+# 2. ALPACA (Live Truth)
+@st.cache_data(ttl=POSITIONS_TTL, show_spinner=False)
+def get_live_positions(key, secret, paper):
+    try:
+        positions = get_client(key, secret, paper).get_all_positions()
+        data = []
+        for p in positions:
+            data.append({
+                "Ticker": p.symbol,
+                "Qty": float(p.qty),
+                "Entry": float(p.avg_entry_price),
+                "Price": float(p.current_price),
+                "Value": float(p.market_value),
+                "PnL": float(p.unrealized_pl),
+                "ROI": float(p.unrealized_plpc) * 100
+            })
+        return pd.DataFrame(data)
+    except Exception as e:
+        return pd.DataFrame()
+
+@st.cache_data(ttl=ACCOUNT_TTL, show_spinner=False)
+def get_account_balances(key, secret, paper):
+    try:
+        account = get_client(key, secret, paper).get_account()
+        return float(account.equity), float(account.buying_power)
+    except:
+        return 100000.0, 0.0
+
+@st.cache_data(ttl=ORDERS_TTL, show_spinner=False)
+def get_pending_orders(key, secret, paper):
+    try:
+        req = GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=50)
+        orders = get_client(key, secret, paper).get_orders(filter=req)
+        return [{
+            "Date": o.created_at,
+            "Ticker": o.symbol,
+            "Action": "⏳ " + o.side.value.upper(),
+            "Qty": float(o.qty),
+            "Price": 0.0,
+            "Value": 0.0
+        } for o in orders]
+    except:
+        return []
+
 # --- SIDEBAR & CONNECTION SWITCHER ---
 with st.sidebar:
     st.title("⚡ Silent Swing")
@@ -85,142 +206,23 @@ with st.sidebar:
             st.success("Scan started!")
     if st.button("🔄 Force Refresh"):
         st.cache_data.clear()
+        get_history_cache.clear()
         st.rerun()
 
 # --- INITIALIZE CLIENTS WITH SELECTED KEYS ---
 try:
-    engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
-    alpaca = TradingClient(active_key, active_secret, paper=PAPER)
+    alpaca = get_client(active_key, active_secret, PAPER)
 except Exception as e:
     st.error(f"Connection Error: {e}")
     st.stop()
 
-# 1. DATABASE (History)
-def load_db_history():
-    try:
-        if not os.path.exists(db_path): return pd.DataFrame(columns=['date', 'ticker', 'action', 'price', 'qty'])
-        # Try finding the table, fallback if needed or just use 'trade_history' as default
-        # Based on your previous checks, both DBs seem to use 'trade_history' now.
-        try:
-            df = pd.read_sql('trade_history', engine)
-        except:
-            # Fallback for older live db versions if they revert
-            df = pd.read_sql('trades', engine)
-            
-        df['date'] = pd.to_datetime(df['date'])
-        return df.sort_values('date', ascending=True)
-    except:
-        return pd.DataFrame(columns=['date', 'ticker', 'action', 'price', 'qty'])
-
-# 2. ALPACA (Live Truth)
-def get_live_positions():
-    try:
-        positions = alpaca.get_all_positions()
-        data = []
-        for p in positions:
-            data.append({
-                "Ticker": p.symbol,
-                "Qty": float(p.qty),
-                "Entry": float(p.avg_entry_price),
-                "Price": float(p.current_price),
-                "Value": float(p.market_value),
-                "PnL": float(p.unrealized_pl),
-                "ROI": float(p.unrealized_plpc) * 100
-            })
-        return pd.DataFrame(data)
-    except Exception as e:
-        return pd.DataFrame()
-
-def get_pending_orders():
-    try:
-        req = GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=50)
-        orders = alpaca.get_orders(filter=req)
-        return [{
-            "Date": o.created_at,
-            "Ticker": o.symbol,
-            "Action": "⏳ " + o.side.value.upper(),
-            "Qty": float(o.qty),
-            "Price": 0.0,
-            "Value": 0.0
-        } for o in orders]
-    except:
-        return []
-
-# --- ENGINE: Balance Curve ---
-def calculate_equity_curve(history_df, current_equity):
-    if history_df.empty:
-        return pd.DataFrame([{'Date': datetime.now(), 'Balance': 100000.0}])
-
-    curve = []
-    running_equity = current_equity
-    history_rev = history_df.sort_values('date', ascending=False)
-
-    curve.append({'Date': datetime.now(), 'Balance': running_equity})
-    for _, row in history_rev.iterrows():
-        curve.append({'Date': row['date'], 'Balance': running_equity})
-
-    return pd.DataFrame(curve).sort_values('Date')
-
-# --- ENGINE: Realized PnL (Sold Only) ---
-def calculate_realized_performance(history_df):
-    if history_df.empty:
-        return pd.DataFrame()
-
-    inventory = {}
-    closed_trades = []
-
-    for index, row in history_df.iterrows():
-        ticker = row['ticker']
-        action = row['action']
-        price = float(row['price'])
-        qty = float(row['qty'])
-        date = row['date']
-
-        if "BUY" in action:
-            if ticker not in inventory:
-                inventory[ticker] = {'qty': 0.0, 'cost': 0.0}
-
-            curr_qty = inventory[ticker]['qty']
-            curr_cost = inventory[ticker]['cost']
-
-            new_cost = ((curr_qty * curr_cost) + (qty * price)) / (curr_qty + qty)
-            inventory[ticker]['qty'] += qty
-            inventory[ticker]['cost'] = new_cost
-
-        elif "SELL" in action:
-            if ticker in inventory and inventory[ticker]['qty'] > 0:
-                avg_entry = inventory[ticker]['cost']
-                pnl = (price - avg_entry) * qty
-
-                closed_trades.append({
-                    'Date': date,
-                    'Ticker': ticker,
-                    'Realized PnL': pnl
-                })
-
-                inventory[ticker]['qty'] -= qty
-                if inventory[ticker]['qty'] < 0: inventory[ticker]['qty'] = 0
-
-    if not closed_trades:
-        return pd.DataFrame()
-
-    df_closed = pd.DataFrame(closed_trades)
-    df_closed['Cumulative PnL'] = df_closed['Realized PnL'].cumsum()
-    return df_closed
-
 # --- MAIN LOGIC ---
 st.title(f"Control Room: {bot_choice}")
 
-history_df = load_db_history()
-active_df = get_live_positions()
-
-try:
-    account = alpaca.get_account()
-    total_equity = float(account.equity)
-    buying_power = float(account.buying_power)
-except:
-    total_equity = 100000.0
-    buying_power = 0.0
+history_df = load_db_history(db_path)
+history_id = int(history_df['id'].max()) if not history_df.empty else 0
+active_df = get_live_positions(active_key, active_secret, PAPER)
+total_equity, buying_power = get_account_balances(active_key, active_secret, PAPER)
 
 # --- METRICS ---
 active_exposure = active_df['Value'].sum() if not active_df.empty else 0.0
@@ -234,7 +236,7 @@ c3.metric("YTD Profit/Loss", f"${ytd_pnl:,.2f}", delta_color="normal")
 c4.metric("Buying Power", f"${buying_power:,.2f}", help="Available Leverage")
 
 # --- TABS ---
-tab_market, tab_perf, tab_ledger = st.tabs(["📊 Market Overview", "📈 Portfolio Performance", "📜 Transaction Ledger"])
+tab_market, tab_perf, tab_ledger, tab_latency = st.tabs(["📊 Market Overview", "📈 Portfolio Performance", "📜 Transaction Ledger", "⏱️ Latency"])
 
 # TAB 1: MARKET OVERVIEW
 with tab_market:
@@ -285,7 +287,7 @@ with tab_market:
 # TAB 2: PERFORMANCE
 with tab_perf:
     st.subheader("Total Balance Growth")
-    curve_df = calculate_equity_curve(history_df, total_equity)
+    curve_df = get_equity_curve(db_path, total_equity)
     if not curve_df.empty:
         # Green for Champ, Red/White for Live
         line_col = '#00FF00' if "Champion" in bot_choice else '#FF4B4B'
@@ -300,7 +302,7 @@ with tab_perf:
 
     st.markdown("---")
     st.subheader("Realized Gains (Sold Orders Only)")
-    realized_df = calculate_realized_performance(history_df)
+    realized_df = get_realized_performance(db_path, history_id, history_df)
 
     if not realized_df.empty:
         fig_real = px.line(realized_df, x='Date', y='Cumulative PnL', markers=True, title="Total Banked Profit/Loss")
@@ -314,19 +316,43 @@ with tab_perf:
     else:
         st.info("No closed trades yet.")
 
+    st.markdown("---")
+    st.subheader("Backtest Robustness (Monte Carlo)")
+    mc_path = monte_carlo.RESULT_FILE
+    mc = get_monte_carlo(mc_path, os.path.getmtime(mc_path)) if os.path.exists(mc_path) else None
+    if mc:
+        mc_meta, mc_tables, mc_results = mc
+        actual = mc_meta['actual']
+        st.caption(f"{mc_meta['paths']:,} paths over {mc_meta['trades']} backtest trades ({', '.join(mc_meta['tickers'])}) "
+                   f"| {mc_meta['alloc_pct']:.0%} of equity per trade | built {mc_meta['created']}")
+        m1, m2, m3 = st.columns(3)
+        boot = mc_results['bootstrap']
+        m1.metric("Actual Final Equity", f"${actual['final_equity']:,.0f}",
+                  f"P{(boot['final_equity'] < actual['final_equity']).mean() * 100:.0f} of bootstrap")
+        m2.metric("Actual Max Drawdown", f"{actual['max_drawdown'] * 100:.1f}%")
+        m3.metric("Chance of Ending Down", f"{(boot['final_equity'] < mc_meta['start_capital']).mean() * 100:.1f}%")
+        for method, table in mc_tables.items():
+            st.caption(method.title())
+            st.dataframe(table.style.format({"Final Equity": "${:,.0f}", "Return %": "{:.1f}%", "Max Drawdown %": "{:.1f}%", "Losing Streak": "{:.0f}"}),
+                         use_container_width=True)
+        fig_mc = px.histogram(x=boot['final_equity'][:20000], nbins=80, title="Bootstrap Final Equity (20k paths)")
+        fig_mc.add_vline(x=actual['final_equity'], line_dash="dash", line_color="#00FFFF")
+        fig_mc.update_layout(template="plotly_dark", height=300, xaxis_title="Final Equity ($)", yaxis_title="Paths")
+        st.plotly_chart(fig_mc, use_container_width=True)
+    else:
+        st.info("No Monte Carlo results yet. Run `python monte_carlo.py` after a backtest.")
+
 # TAB 3: LEDGER
 with tab_ledger:
     st.subheader("Transaction History")
-    pending_df = pd.DataFrame(get_pending_orders())
+    pending_df = pd.DataFrame(get_pending_orders(active_key, active_secret, PAPER))
     t1, t2, t3, t4 = st.tabs(["📜 All Activity", "⏳ Pending", "🟢 Entries", "🔴 Exits"])
     cfg = {"date": st.column_config.DatetimeColumn("Time", format="MMM DD, HH:mm"), "price": "$%.2f", "Value": "$%.2f"}
 
     with t1:
         if not history_df.empty:
-            df_disp = history_df.sort_values('date', ascending=False).copy()
-            df_disp['Value'] = df_disp['price'] * df_disp['qty']
-            df_disp['Action'] = df_disp['action'].apply(lambda x: "🟢 BUY" if "BUY" in x else "🔴 SELL")
-            st.dataframe(df_disp[['date', 'ticker', 'Action', 'qty', 'price', 'Value']], column_config=cfg, use_container_width=True, hide_index=True)
+            df_disp = get_ledger_view(db_path, history_id, history_df)
+            st.dataframe(df_disp, column_config=cfg, use_container_width=True, hide_index=True)
     with t2:
         if not pending_df.empty:
             st.dataframe(pending_df, column_config=cfg, use_container_width=True, hide_index=True)
@@ -338,3 +364,37 @@ with tab_ledger:
     with t4:
         if not history_df.empty:
             st.dataframe(df_disp[df_disp['Action'].str.contains("SELL")], column_config=cfg, use_container_width=True, hide_index=True)
+
+# TAB 4: LATENCY
+with tab_latency:
+    metrics_path = tracing.METRICS_FILE
+    metrics_df = get_metrics(metrics_path, os.path.getmtime(metrics_path)) if os.path.exists(metrics_path) else pd.DataFrame()
+    if not metrics_df.empty:
+        st.subheader("Morning Scan Duration")
+        scans = metrics_df[metrics_df['run'] == 'autopilot']
+        totals = scans[scans['span'] == 'autopilot.run']
+        if not totals.empty:
+            fig_scan = px.line(totals, x='at', y='total', markers=True, title="Autopilot run (seconds)")
+            fig_scan.update_traces(line_color='#00FFFF')
+            fig_scan.update_layout(template="plotly_dark", height=300, xaxis_title=None, yaxis_title="Seconds")
+            st.plotly_chart(fig_scan, use_container_width=True)
+
+            stages = scans[scans['span'].str.startswith('autopilot.') & (scans['span'] != 'autopilot.run')]
+            fig_stage = px.bar(stages, x='at', y='total', color='span', title="Where the scan's time goes (seconds per stage)")
+            fig_stage.update_layout(template="plotly_dark", height=350, xaxis_title=None, yaxis_title="Seconds")
+            st.plotly_chart(fig_stage, use_container_width=True)
+        else:
+            st.info("No autopilot runs traced yet.")
+
+        st.subheader("Per-Call Latency")
+        calls = metrics_df[~metrics_df['span'].str.startswith('autopilot.')]
+        if not calls.empty:
+            fig_calls = px.line(calls, x='at', y='mean', color='span', markers=True, log_y=True,
+                                title="Mean seconds per call (monitor cycles, broker, alerts, backtester)")
+            fig_calls.update_layout(template="plotly_dark", height=350, xaxis_title=None, yaxis_title="Seconds")
+            st.plotly_chart(fig_calls, use_container_width=True)
+        with st.expander("Latest run per process"):
+            latest_runs = metrics_df[metrics_df['at'] == metrics_df.groupby('run')['at'].transform('max')]
+            st.dataframe(latest_runs.sort_values(['run', 'total'], ascending=[True, False]), use_container_width=True, hide_index=True)
+    else:
+        st.info("No timings yet. Set `SWING_TRACE=1` for the autopilot / trade monitor to record them.")
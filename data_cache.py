@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- CONFIGURATION ---
+CACHE_DIR = os.getenv("OHLCV_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache"))
+MAX_AGE_MINUTES = float(os.getenv("OHLCV_CACHE_MAX_AGE", "30"))  # How long a top-up stays "fresh"
+META_KEY = b"swing_cache"
+
+
+class OHLCVCache:
+    """On-disk OHLCV store: one Parquet file per ticker, topped up incrementally.
+
+    Each file remembers the date range it has already asked the data source for
+    (`covered_start` inclusive, `covered_end` exclusive, yfinance style) so a
+    request only downloads the part that is genuinely missing.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_age_minutes=MAX_AGE_MINUTES):
+        self.cache_dir = cache_dir
+        self.max_age = datetime.timedelta(minutes=max_age_minutes)
+
+    def path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker.upper()}.parquet")
+
+    # --- Raw file access ---
+    def load(self, ticker):
+        """Returns (DataFrame, meta) or (None, None) if the ticker is not cached."""
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return None, None
+        try:
+            table = pq.read_table(path)
+            meta = json.loads((table.schema.metadata or {}).get(META_KEY, b"{}"))
+            return table.to_pandas(), meta
+        except Exception as e:
+            print(f"⚠️ Cache Read Error ({ticker}): {e}")
+            return None, None
+
+    def save(self, ticker, df, meta):
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: json.dumps(meta).encode()})
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write-then-rename so a crashed run never leaves a half-written file behind
+        tmp_path = f"{self.path(ticker)}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.path(ticker))
+
+    def invalidate(self, ticker=None):
+        """Drops one ticker (or the whole cache when ticker is None)."""
+        tickers = [ticker] if ticker else self.tickers()
+        for t in tickers:
+            try:
+                os.remove(self.path(t))
+            except FileNotFoundError:
+                pass
+        return len(tickers)
+
+    def tickers(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return sorted(f[:-len(".parquet")] for f in os.listdir(self.cache_dir) if f.endswith(".parquet"))
+
+    def is_fresh(self, meta):
+        """Fresh = topped up within MAX_AGE_MINUTES, and on the same calendar day."""
+        if not meta or "fetched_at" not in meta:
+            return False
+        fetched_at = datetime.datetime.fromtimestamp(meta["fetched_at"])
+        now = datetime.datetime.now()
+        return fetched_at.date() == now.date() and now - fetched_at < self.max_age
+
+    # --- Main entry point ---
+    def get(self, ticker, start, end, fetcher, refresh=False):
+        """Returns bars in [start, end), downloading only what the cache is missing.
+
+        `fetcher(ticker, start, end)` must return a DataFrame indexed by date.
+        """
+        start, end = to_day(start), to_day(end)
+        cached, meta = (None, None) if refresh else self.load(ticker)
+        pieces = [((s, e), clean_frame(fetcher(ticker, s, e))) for s, e in self.missing_ranges(start, end, cached, meta)]
+        return self.merge(ticker, start, end, pieces, cached, meta)
+
+    def missing_ranges(self, start, end, cached, meta):
+        """Date ranges that still have to be requested to serve [start, end)."""
+        start, end = to_day(start), to_day(end)
+        if cached is None:
+            return [(start, end)]
+        covered_start, covered_end = self._coverage(cached, meta)
+        ranges = []
+
+        # 1. Head: history older than anything we have asked for before
+        if start < covered_start:
+            ranges.append((start, covered_start))
+
+        # 2. Tail: new bars since the last top-up. We re-request from the last cached
+        # bar so a provisional (intraday) bar gets replaced by its final values.
+        if end > covered_end and not self.is_fresh(meta):
+            ranges.append((min(cached.index[-1], covered_end), end))
+        return ranges
+
+    def peek(self, ticker, start, end):
+        """Cached bars for [start, end) if no download is needed, else None."""
+        cached, meta = self.load(ticker)
+        if cached is None or self.missing_ranges(start, end, cached, meta):
+            return None
+        return slice_frame(cached, to_day(start), to_day(end))
+
+    def merge(self, ticker, start, end, pieces, cached=None, meta=None):
+        """Folds freshly downloaded ((range_start, range_end), DataFrame) pieces into the store."""
+        start, end = to_day(start), to_day(end)
+        if not pieces:
+            return slice_frame(cached, start, end) if cached is not None else pd.DataFrame()
+
+        today = to_day(datetime.date.today())
+        if cached is None:
+            covered_start, covered_end = pd.Timestamp.max, pd.Timestamp.min
+            fetched_at, frames = None, []
+        else:
+            covered_start, covered_end = self._coverage(cached, meta)
+            fetched_at, frames = meta.get("fetched_at"), [cached]
+
+        for (s, e), df in pieces:
+            frames.append(df)
+            # An empty piece is usually a failed download; only count it as covered
+            # when the range holds no weekdays at all (nothing to trade on)
+            if df.empty and len(pd.bdate_range(s, e - pd.Timedelta(days=1))):
+                continue
+            covered_start = min(covered_start, s)
+            if e > covered_end:
+                fetched_at = time.time()
+            covered_end = max(covered_end, min(e, today))
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        self.save(ticker, df, self._meta(covered_start, covered_end, fetched_at))
+        return slice_frame(df, start, end)
+
+    def _coverage(self, cached, meta):
+        covered_start = pd.Timestamp(meta.get("covered_start", cached.index[0]))
+        covered_end = pd.Timestamp(meta.get("covered_end", cached.index[-1] + pd.Timedelta(days=1)))
+        return covered_start, covered_end
+
+    def _meta(self, covered_start, covered_end, fetched_at=None):
+        return {
+            "covered_start": covered_start.strftime("%Y-%m-%d"),
+            "covered_end": covered_end.strftime("%Y-%m-%d"),
+            "fetched_at": fetched_at or time.time(),
+        }
+
+
+def to_day(value):
+    """Midnight Timestamp for a date-like value (the cache works in whole days)."""
+    return pd.Timestamp(value).normalize()
+
+
+def clean_frame(df):
+    """Empty frame for a failed download, tz-naive index otherwise."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    if getattr(df.index, "tz", None) is not None:
+        df = df.tz_localize(None)
+    return df
+
+
+def slice_frame(df, start, end):
+    """Rows in [start, end)."""
+    if df.empty:
+        return df
+    return df.loc[(df.index >= start) & (df.index < end)]
+
+
+# Shared instance used by SilentBacktester.fetch_data
+CACHE = OHLCVCache()
+
+if __name__ == "__main__":
+    # python data_cache.py            -> list cached tickers
+    # python data_cache.py --clear    -> wipe the cache (optionally: --clear AAPL MSFT)
+    if len(sys.argv) > 1 and sys.argv[1] == "--clear":
+        targets = sys.argv[2:] or [None]
+        removed = sum(CACHE.invalidate(t) for t in targets)
+        print(f"🧹 Cache cleared ({removed} file(s)) in {CACHE.cache_dir}")
+    else:
+        for t in CACHE.tickers():
+            df, meta = CACHE.load(t)
+            rows = 0 if df is None else len(df)
+            print(f"{t:<10} | {rows:>5} bars | {meta.get('covered_start')} -> {meta.get('covered_end')} | fresh={CACHE.is_fresh(meta)}")
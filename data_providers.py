@@ -0,0 +1,286 @@
+import os
+import sys
+import threading
+import pandas as pd
+import yfinance as yf
+from dotenv import load_dotenv
+from data_cache import CACHE, clean_frame, slice_frame, to_day
+
+# Market-data providers behind one interface. Scripts never pick a vendor
+# themselves: SilentBacktester and UniverseLoader ask get_provider(), which
+# reads MARKET_DATA_PROVIDER from the environment.
+#
+#   MARKET_DATA_PROVIDER=yfinance          (default)
+#   MARKET_DATA_PROVIDER=alpaca,yfinance   failover: Alpaca first, yfinance for whatever it can't serve (e.g. crypto)
+#   MARKET_DATA_PROVIDER=cache             offline: only what is already in data_cache/
+#   MARKET_DATA_PROVIDER=replay            offline: files in REPLAY_DIR, held in memory
+
+# --- CONFIGURATION ---
+load_dotenv()
+PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+REPLAY_DIR = os.getenv("REPLAY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_data"))
+ALPACA_FEED = os.getenv("ALPACA_DATA_FEED", "iex")  # "sip" needs a paid data plan
+
+COLUMNS = ["Close", "High", "Low", "Open", "Volume"]
+
+
+# --- Raw yfinance calls (the original fetchers) ---
+def download_ohlcv(ticker, start, end):
+    """Raw yfinance download with the column MultiIndex flattened."""
+    df = yf.download(ticker, start=start, end=end, progress=False)
+    df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+    return df
+
+
+def download_many(tickers, start, end):
+    """One yfinance request for a whole chunk -> {ticker: DataFrame}."""
+    df = yf.download(tickers, start=start, end=end, group_by="ticker", progress=False, threads=False)
+    if df is None or df.empty:
+        return {}
+    if not isinstance(df.columns, pd.MultiIndex):
+        return {tickers[0]: df}
+
+    frames = {}
+    for ticker in df.columns.get_level_values(0).unique():
+        # A multi-symbol download is aligned on the union calendar; drop the
+        # rows this symbol did not trade so it matches a single-ticker download
+        sub = df[ticker].dropna(how="all")
+        if not sub.empty:
+            frames[ticker] = sub
+    return frames
+
+
+class MarketDataProvider:
+    """Daily OHLCV source. Frames are indexed by tz-naive date, columns COLUMNS, range [start, end).
+
+    `cacheable` tells callers whether results should be written to the Parquet
+    cache (network sources) or served as is (local sources).
+    """
+
+    name = "base"
+    cacheable = True
+
+    def fetch(self, ticker, start, end):
+        raise NotImplementedError(f"{self.name} must implement fetch()")
+
+    def fetch_many(self, tickers, start, end):
+        # Default: one fetch() per ticker; network providers override with a bulk request
+        frames = {}
+        for ticker in tickers:
+            df = self.fetch(ticker, start, end)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def latest_price(self, ticker):
+        raise NotImplementedError(f"{self.name} has no latest-price endpoint")
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def fetch(self, ticker, start, end):
+        return clean_frame(download_ohlcv(ticker, start, end))
+
+    def fetch_many(self, tickers, start, end):
+        return {t: clean_frame(df) for t, df in download_many(list(tickers), start, end).items()}
+
+
+class AlpacaProvider(MarketDataProvider):
+    """Daily bars from Alpaca's market-data API (split/dividend adjusted, like yfinance's default)."""
+
+    name = "alpaca"
+
+    def __init__(self, client=None, feed=ALPACA_FEED):
+        if client is None:
+            from alpaca.data.historical import StockHistoricalDataClient
+            key, secret = os.getenv("ALPACA_KEY"), os.getenv("ALPACA_SECRET")
+            if not key or not secret:
+                raise ValueError("❌ Alpaca data provider needs ALPACA_KEY / ALPACA_SECRET in .env")
+            client = StockHistoricalDataClient(key, secret)
+        self.client = client
+        self.feed = feed
+
+    def fetch(self, ticker, start, end):
+        return self.fetch_many([ticker], start, end).get(ticker, pd.DataFrame())
+
+    def fetch_many(self, tickers, start, end):
+        from alpaca.data.requests import StockBarsRequest
+        from alpaca.data.timeframe import TimeFrame
+        from alpaca.data.enums import Adjustment
+        # Alpaca's end is inclusive; stop one second before our exclusive end date
+        req = StockBarsRequest(symbol_or_symbols=list(tickers), timeframe=TimeFrame.Day, start=to_day(start),
+                               end=to_day(end) - pd.Timedelta(seconds=1), adjustment=Adjustment.ALL, feed=self.feed)
+        bars = self.client.get_stock_bars(req).df
+        if bars is None or bars.empty:
+            return {}
+        bars = bars.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"})
+        frames = {}
+        for ticker, df in bars.groupby(level="symbol"):
+            df = df.droplevel("symbol")[COLUMNS]
+            df.index = df.index.tz_convert("America/New_York").tz_localize(None).normalize().rename("Date")
+            frames[ticker] = df
+        return frames
+
+    def latest_price(self, ticker):
+        from alpaca.data.requests import StockLatestTradeRequest
+        trade = self.client.get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=ticker, feed=self.feed))
+        return float(trade[ticker].price)
+
+
+class CacheProvider(MarketDataProvider):
+    """Whatever data_cache/ already holds; never touches the network."""
+
+    name = "cache"
+    cacheable = False
+
+    def __init__(self, cache=CACHE):
+        self.cache = cache
+
+    def fetch(self, ticker, start, end):
+        df, _ = self.cache.load(ticker)
+        return pd.DataFrame() if df is None else slice_frame(df, to_day(start), to_day(end))
+
+    def latest_price(self, ticker):
+        df, _ = self.cache.load(ticker)
+        return float(df["Close"].iloc[-1]) if df is not None and not df.empty else 0.0
+
+
+class ReplayProvider(MarketDataProvider):
+    """Recorded bars (<TICKER>.parquet or .csv per file) loaded into memory once.
+
+    Point REPLAY_DIR at a copy of data_cache/ or at the output of `record()` to
+    rerun scans, simulations and benchmarks with no network at memory speed.
+    `now` pins the replay clock: bars after it are invisible.
+    """
+
+    name = "replay"
+    cacheable = False
+
+    def __init__(self, path=REPLAY_DIR, frames=None, now=None):
+        self.path = path
+        self.now = pd.Timestamp(now) if now is not None else None
+        self.frames = dict(frames) if frames is not None else None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frames(cls, frames, now=None):
+        return cls(path=None, frames=frames, now=now)
+
+    def _load(self):
+        with self._lock:
+            if self.frames is None:
+                self.frames = {}
+                if self.path and os.path.isdir(self.path):
+                    for name in sorted(os.listdir(self.path)):
+                        ticker, ext = os.path.splitext(name)
+                        if ext == ".parquet":
+                            self.frames[ticker] = clean_frame(pd.read_parquet(os.path.join(self.path, name)))
+                        elif ext == ".csv":
+                            self.frames[ticker] = clean_frame(pd.read_csv(os.path.join(self.path, name), index_col=0, parse_dates=True))
+        return self.frames
+
+    def tickers(self):
+        return sorted(self._load())
+
+    def fetch(self, ticker, start, end):
+        df = self._load().get(ticker)
+        if df is None:
+            return pd.DataFrame()
+        end = to_day(end) if self.now is None else min(to_day(end), self.now + pd.Timedelta(days=1))
+        return slice_frame(df, to_day(start), end)
+
+    def latest_price(self, ticker):
+        df = self._load().get(ticker)
+        if df is not None and self.now is not None:
+            df = df.loc[df.index < self.now + pd.Timedelta(days=1)]
+        return float(df["Close"].iloc[-1]) if df is not None and not df.empty else 0.0
+
+
+class FailoverProvider(MarketDataProvider):
+    """Tries providers in order; each ticker comes from the first one that returns bars."""
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+        self.name = ",".join(p.name for p in self.providers)
+        self.cacheable = all(p.cacheable for p in self.providers)
+        self.errors = {}
+
+    def fetch_many(self, tickers, start, end):
+        frames, missing = {}, list(tickers)
+        for provider in self.providers:
+            if not missing:
+                break
+            try:
+                got = provider.fetch_many(missing, start, end)
+            except Exception as e:
+                self.errors[provider.name] = str(e)
+                print(f"⚠️ {provider.name} failed, falling back: {e}")
+                continue
+            frames.update({t: df for t, df in got.items() if not df.empty})
+            missing = [t for t in missing if t not in frames]
+        return frames
+
+    def fetch(self, ticker, start, end):
+        return self.fetch_many([ticker], start, end).get(ticker, pd.DataFrame())
+
+    def latest_price(self, ticker):
+        for provider in self.providers:
+            try:
+                price = provider.latest_price(ticker)
+                if price:
+                    return price
+            except Exception as e:
+                self.errors[provider.name] = str(e)
+        return 0.0
+
+
+def make_provider(name):
+    """'yfinance' | 'alpaca' | 'cache' | 'replay', or a comma list for failover."""
+    names = [n.strip().lower() for n in name.split(",") if n.strip()]
+    if len(names) > 1:
+        return FailoverProvider([make_provider(n) for n in names])
+    builders = {"yfinance": YFinanceProvider, "alpaca": AlpacaProvider, "cache": CacheProvider, "replay": ReplayProvider}
+    if not names or names[0] not in builders:
+        raise ValueError(f"❌ Unknown MARKET_DATA_PROVIDER '{name}' (use {', '.join(builders)})")
+    return builders[names[0]]()
+
+
+_PROVIDERS = {}
+
+
+def get_provider(name=None):
+    """Shared provider instance for `name` (default: MARKET_DATA_PROVIDER)."""
+    name = name or PROVIDER
+    if name not in _PROVIDERS:
+        _PROVIDERS[name] = make_provider(name)
+    return _PROVIDERS[name]
+
+
+def record(frames, path=REPLAY_DIR):
+    """Writes {ticker: OHLCV} as a replay directory."""
+    os.makedirs(path, exist_ok=True)
+    for ticker, df in frames.items():
+        df.to_parquet(os.path.join(path, f"{ticker}.parquet"))
+    return len(frames)
+
+
+if __name__ == "__main__":
+    # python data_providers.py --record-cache [DIR]        -> snapshot data_cache/ as a replay set
+    # python data_providers.py --record-synthetic N [DIR]  -> N synthetic tickers (5y) as a replay set
+    # python data_providers.py                             -> show the configured provider
+    args = sys.argv[1:]
+    if args[:1] == ["--record-cache"]:
+        path = args[1] if len(args) > 1 else REPLAY_DIR
+        frames = {t: CACHE.load(t)[0] for t in CACHE.tickers()}
+        print(f"✅ Recorded {record({t: df for t, df in frames.items() if df is not None}, path)} tickers to {path}")
+    elif args[:1] == ["--record-synthetic"]:
+        from synthetic_data import make_universe
+        n = int(args[1]) if len(args) > 1 else 500
+        path = args[2] if len(args) > 2 else REPLAY_DIR
+        print(f"✅ Recorded {record(make_universe(n, years=5), path)} tickers to {path}")
+    else:
+        print(f"📡 MARKET_DATA_PROVIDER={PROVIDER} -> {get_provider()!r}")
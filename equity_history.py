@@ -0,0 +1,184 @@
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from storage import get_engine, write_transaction, read_trades, db_time
+
+# Daily account value rebuilt from the fill ledger and cached daily closes:
+# equity = cash + sum(shares held x close). End-of-day rows are stored in
+# equity_snapshots, so each update only computes the days since the last one
+# and the dashboard chart is a single small table read.
+
+# --- CONFIGURATION ---
+START_BALANCE = 100000.0  # Cash before the first fill (same baseline the dashboard uses for YTD)
+
+
+def _signed(fills):
+    """+1 for buys, -1 for sells, 0 for anything else (BUY wins, like the ledger)."""
+    action = fills["action"].astype(str)
+    buy = action.str.contains("BUY").to_numpy()
+    sell = ~buy & action.str.contains("SELL").to_numpy()
+    return np.where(buy, 1.0, np.where(sell, -1.0, 0.0))
+
+
+def daily_equity(fills, closes, days, opening_qty=None, opening_price=None, opening_cash=START_BALANCE):
+    """End-of-day cash / positions_value / equity for every day in `days`.
+
+    fills: trade_history rows on or after days[0]; a fill on a non-trading day
+    counts toward the next day in `days` (fills after days[-1] are left out).
+    closes: {ticker: OHLCV}; a missing close falls back to the last known close,
+    then to the last fill price. opening_*: shares / last price per ticker and
+    cash carried in from before days[0].
+    """
+    days = pd.DatetimeIndex(days)
+    opening_qty = opening_qty if opening_qty is not None else pd.Series(dtype=float)
+    opening_price = opening_price if opening_price is not None else pd.Series(dtype=float)
+
+    slot = days.searchsorted(pd.to_datetime(fills["date"]).dt.normalize().to_numpy())
+    fills = fills.assign(day=days[np.minimum(slot, len(days) - 1)])[slot < len(days)]
+    side = _signed(fills)
+    fills = fills.assign(shares=side * fills["qty"], flow=-side * fills["qty"] * fills["price"])
+
+    tickers = pd.Index(opening_qty.index).union(pd.Index(fills["ticker"].unique()))
+    deltas = fills.pivot_table(index="day", columns="ticker", values="shares", aggfunc="sum")
+    deltas = deltas.reindex(index=days, columns=tickers, fill_value=0.0).fillna(0.0)
+    shares = deltas.cumsum() + opening_qty.reindex(tickers, fill_value=0.0)
+
+    # Close per day; gaps carry the last close, names without bars use their last fill price
+    if closes:
+        close = pd.DataFrame({t: df["Close"] for t, df in closes.items() if t in tickers and not df.empty})
+    else:
+        close = pd.DataFrame()
+    close = close.reindex(close.index.union(days)).ffill().reindex(index=days, columns=tickers)
+    fill_price = fills.pivot_table(index="day", columns="ticker", values="price", aggfunc="last")
+    fill_price = fill_price.reindex(index=days, columns=tickers)
+    fill_price.iloc[0] = fill_price.iloc[0].fillna(opening_price.reindex(tickers))
+    price = close.fillna(fill_price.ffill()).fillna(0.0)
+
+    cash = opening_cash + fills.groupby("day")["flow"].sum().reindex(days, fill_value=0.0).cumsum()
+    positions_value = (shares.to_numpy() * price.to_numpy()).sum(axis=1)
+    return pd.DataFrame({"cash": cash.to_numpy(), "positions_value": positions_value,
+                         "equity": cash.to_numpy() + positions_value}, index=days)
+
+
+def _opening_state(conn, before, max_id):
+    """Shares, last fill price and net cash flow per ticker from fills before `before` (ids up to max_id)."""
+    rows = conn.execute(text(
+        "SELECT ticker, "
+        "SUM(CASE WHEN action LIKE '%BUY%' THEN qty WHEN action LIKE '%SELL%' THEN -qty ELSE 0 END), "
+        "SUM(CASE WHEN action LIKE '%BUY%' THEN -qty * price WHEN action LIKE '%SELL%' THEN qty * price ELSE 0 END), "
+        "price, MAX(date) "  # SQLite returns the bare `price` from the MAX(date) row
+        "FROM trade_history WHERE date < :before AND id <= :max_id GROUP BY ticker"
+    ), {"before": db_time(before), "max_id": max_id}).fetchall()
+    qty = pd.Series({r[0]: r[1] for r in rows}, dtype=float)
+    price = pd.Series({r[0]: r[3] for r in rows}, dtype=float)
+    return qty, price, float(sum(r[2] for r in rows))
+
+
+def update_snapshots(engine=None, loader=None, start_balance=START_BALANCE, today=None):
+    """Appends end-of-day snapshots up to yesterday; returns how many days were computed.
+
+    Resumes after the newest snapshot. If a fill landed that is older than a stored
+    snapshot (late reconciliation), the snapshots from that day on are recomputed.
+    loader(tickers, start, end) -> {ticker: OHLCV} defaults to the cached UniverseLoader.
+    Closes are loaded between a plain read and a short write, never while the write lock is held.
+    """
+    engine = engine or get_engine()
+    today = pd.Timestamp(today or datetime.now()).normalize()
+
+    # 1. Read what needs computing (no lock beyond the read snapshot)
+    with engine.connect() as conn:
+        last = conn.execute(text("SELECT date, last_fill_id FROM equity_snapshots ORDER BY date DESC LIMIT 1")).fetchone()
+        max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM trade_history")).scalar()
+        if last is None:
+            first = conn.execute(text("SELECT MIN(date) FROM trade_history WHERE id <= :id"), {"id": max_id}).scalar()
+            if first is None:
+                return 0
+            resume = pd.Timestamp(first).normalize()
+        else:
+            resume = pd.Timestamp(last[0]) + pd.Timedelta(days=1)
+            late = conn.execute(text("SELECT MIN(date) FROM trade_history WHERE id > :id AND id <= :max_id"),
+                                {"id": last[1], "max_id": max_id}).scalar()
+            if late is not None and pd.Timestamp(late).normalize() < resume:
+                resume = pd.Timestamp(late).normalize()
+
+        days = pd.bdate_range(resume, today - pd.Timedelta(days=1))
+        if days.empty:
+            return 0
+        opening_qty, opening_price, flow = _opening_state(conn, days[0], max_id)
+        fills = read_trades(conn, start=days[0])
+        fills = fills[(fills["date"] < today) & (fills["id"] <= max_id)]
+
+    # 2. Closes (may download) outside any transaction
+    tickers = sorted(set(opening_qty[opening_qty.abs() > 1e-9].index) | set(fills["ticker"]))
+    if loader is None:
+        from universe_loader import UniverseLoader
+        loader = UniverseLoader().load
+    closes = loader(tickers, days[0], today) if tickers else {}
+    equity = daily_equity(fills, closes, days, opening_qty, opening_price, start_balance + flow)
+
+    # 3. Short write: replace everything from the first recomputed day on. Rows are stamped
+    # with the fills they saw, so a fill that arrived meanwhile is picked up next time.
+    rows = [{"date": d.strftime("%Y-%m-%d"), "cash": r.cash, "positions_value": r.positions_value,
+             "equity": r.equity, "last_fill_id": int(max_id)} for d, r in zip(equity.index, equity.itertuples())]
+    with write_transaction(engine) as conn:
+        conn.execute(text("DELETE FROM equity_snapshots WHERE date >= :d"), {"d": days[0].strftime("%Y-%m-%d")})
+        conn.execute(text("INSERT INTO equity_snapshots (date, cash, positions_value, equity, last_fill_id) "
+                          "VALUES (:date, :cash, :positions_value, :equity, :last_fill_id)"), rows)
+    return len(rows)
+
+
+def load_snapshots(engine=None):
+    with (engine or get_engine()).connect() as conn:
+        df = pd.read_sql(text("SELECT date, cash, positions_value, equity FROM equity_snapshots ORDER BY date"), conn)
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def equity_curve(engine=None, current_equity=None):
+    """Dashboard frame (Date, Balance): stored end-of-day values plus a live point for now."""
+    snaps = load_snapshots(engine)
+    curve = pd.DataFrame({"Date": snaps["date"], "Balance": snaps["equity"]})
+    if current_equity is not None:
+        curve = pd.concat([curve, pd.DataFrame([{"Date": pd.Timestamp(datetime.now()), "Balance": current_equity}])],
+                          ignore_index=True)
+    return curve
+
+
+if __name__ == "__main__":
+    # Offline: synthetic closes + fills, full rebuild vs one-day incremental update
+    import os
+    import tempfile
+    from data_providers import ReplayProvider
+    from universe_loader import UniverseLoader
+    from storage import open_engine, insert_trades
+    from synthetic_data import make_universe, make_trade_history
+
+    frames = make_universe(50, years=3, end="2025-01-01")
+    history = make_trade_history(5000, 50, start="2022-01-03")
+    history = history[history["date"] < "2024-12-31"]
+    loader = UniverseLoader(provider=ReplayProvider.from_frames(frames)).load
+
+    engine = open_engine(os.path.join(tempfile.mkdtemp(), "equity.db"))
+    insert_trades(history.to_dict("records"), engine)
+
+    t0 = time.perf_counter()
+    n_full = update_snapshots(engine, loader, today="2024-12-30")
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    n_inc = update_snapshots(engine, loader, today="2024-12-31")
+    t_inc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    curve = equity_curve(engine, current_equity=None)
+    t_read = time.perf_counter() - t0
+
+    # Same numbers as a from-scratch rebuild over the whole range?
+    check = daily_equity(history, frames, pd.bdate_range(history["date"].min().normalize(), "2024-12-30"))
+    stored = load_snapshots(engine).set_index("date")["equity"]
+    print(f"--- EQUITY HISTORY: {len(history):,} fills, 50 tickers ---")
+    print(f"Full build: {n_full} days in {t_full * 1000:.0f} ms | next day: {n_inc} day in {t_inc * 1000:.1f} ms | "
+          f"chart read: {t_read * 1000:.1f} ms ({len(curve)} rows)")
+    print(f"Incremental == full rebuild: {np.allclose(stored.to_numpy(), check['equity'].to_numpy())}")
+    print(f"Equity: start ${curve['Balance'].iloc[0]:,.0f} | end ${curve['Balance'].iloc[-1]:,.0f} | "
+          f"min ${curve['Balance'].min():,.0f} | max ${curve['Balance'].max():,.0f}")
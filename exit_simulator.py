@@ -0,0 +1,228 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from indicator_engine import _compact
+
+# Exits for many trades at once. Each trade's future bars are gathered into a
+# (trades x bars) block, the stop path is a running max along the block and
+# the exit is the first bar that crosses a level -- no per-trade Python loop.
+# Trades still open after a block carry their stop into the next, twice as wide.
+#
+# Styles:
+#   "atr"      new_logic_simulation / run_portfolio: stop ratchets to Close - m*ATR
+#              (today's close included), fills at the stop (or on the Close, trigger="close")
+#   "bracket"  AlpacaExecutor.execute_buy: fixed stop + take-profit, no trailing
+#   "trail"    bracket whose stop trade_monitor trails at TRAIL_PCT under the high-water mark
+
+# --- CONFIGURATION ---
+STOP_ATR_MULT = 2.0     # select_targets: stop_price = Close - 2 * ATR
+TAKE_PROFIT = 0.10      # bracket_prices: +10% limit
+FALLBACK_STOP = 0.98    # bracket_prices: stop at -2% when the signal stop isn't below the price
+TRAIL_PCT = 0.05        # trade_monitor: stop = 95% of the high-water mark
+SAME_BAR = "stop"       # Stop and target inside one bar (open between them): "stop" (pessimistic) or "target"
+HORIZON = 16            # Bars in the first block (doubles for the trades still open after it)
+STYLES = ("atr", "bracket", "trail")
+
+
+def simulate_exits(panel, ind, entries, style="atr", stop_atr_mult=STOP_ATR_MULT, take_profit=TAKE_PROFIT,
+                   trail_pct=TRAIL_PCT, trigger="low", same_bar=SAME_BAR, horizon=HORIZON):
+    """Exit date, price and reason for every entry (a trade log or setup hits).
+
+    `entries` needs Ticker + Entry_Date; optional Entry_Price (default: that
+    day's Close) and Stop (default: Entry_Price - stop_atr_mult * ATR). Entries
+    fill on the entry bar's close, so exits are checked from the next bar.
+    Bracket and trail stops fill at the open when it gaps through them. The
+    trailing stop in force during a bar uses the high-water mark up to the
+    previous bar (trade_monitor only sees prices as they print); its 0.5%
+    replace threshold is ignored.
+
+    Returns the entries with Exit_Date, Exit_Price, Reason (stop/target/end),
+    Bars and PnL. "end" means still open at the last bar (marked at its close).
+    """
+    if style not in STYLES:
+        raise ValueError(f"Unknown exit style {style!r} (use one of {STYLES})")
+    if same_bar not in ("stop", "target"):
+        raise ValueError(f"same_bar must be 'stop' or 'target', not {same_bar!r}")
+    entries = entries.reset_index(drop=True)
+    if entries.empty:
+        return entries.assign(Exit_Date=pd.Series(dtype="datetime64[ns]"), Exit_Price=np.nan, Reason="", Bars=0, PnL=np.nan)
+
+    cols = np.array([panel.column[t] for t in entries["Ticker"]], dtype=np.int64)
+    rows = panel.dates.get_indexer(pd.to_datetime(entries["Entry_Date"]))
+    if (rows < 0).any() or not panel.mask[rows.clip(min=0), cols].all():
+        raise ValueError("Every entry must be on a date the ticker has a bar")
+
+    # Per-ticker bar order (as in indicator_engine), so gaps in the union calendar are skipped
+    order = None if panel.mask.all() else np.argsort(~panel.mask, axis=0, kind="stable")
+    bars = {f: _compact(panel[f], order) for f in ["Open", "High", "Low", "Close"]}
+    atr = _compact(ind["ATR"], order)
+    counts = panel.mask.sum(axis=0)
+    start = np.cumsum(panel.mask, axis=0)[rows, cols] - 1  # Entry bar's position in the ticker's own bars
+
+    entry = entries["Entry_Price"].to_numpy(dtype=float) if "Entry_Price" in entries else panel["Close"][rows, cols].astype(float)
+    stop0 = (entries["Stop"].to_numpy(dtype=float) if "Stop" in entries
+             else entry - stop_atr_mult * ind["ATR"][rows, cols])
+    if style == "atr":
+        target = np.full(len(entry), np.inf)
+    else:
+        stop0 = np.where(~(stop0 < entry), entry * FALLBACK_STOP, stop0)
+        target = entry * (1 + take_profit)
+
+    n = len(entries)
+    exit_pos = np.full(n, -1, dtype=np.int64)
+    exit_price = np.full(n, np.nan)
+    reason = np.full(n, "end", dtype=object)
+    carry = stop0.copy() if style == "atr" else entry.copy()  # Running stop (atr) or high-water mark (trail)
+    active = np.arange(n)
+    offset, width = 0, horizon
+
+    while active.size:
+        pos = start[active, None] + offset + np.arange(1, width + 1)  # Compact rows of the next `width` bars
+        inside = pos < counts[cols[active], None]
+        at = (pos.clip(max=bars["Close"].shape[0] - 1), cols[active, None])
+        o, h, lo, c = (bars[f][at] for f in ["Open", "High", "Low", "Close"])
+
+        if style == "atr":
+            level = c - stop_atr_mult * atr[at]
+            stop = np.fmax.accumulate(np.hstack([carry[active, None], level]), axis=1)[:, 1:]
+            carry_next = stop[:, -1]
+        elif style == "trail":
+            hwm = np.fmax.accumulate(np.hstack([carry[active, None], h]), axis=1)
+            stop = np.fmax(stop0[active, None], hwm[:, :-1] * (1 - trail_pct))
+            carry_next = hwm[:, -1]
+        else:
+            stop = np.broadcast_to(stop0[active, None], pos.shape)
+            carry_next = carry[active]
+
+        tgt = target[active, None]
+        if style == "atr" and trigger == "close":
+            stop_hit, stop_fill = c <= stop, c
+        elif style == "atr":
+            stop_hit, stop_fill = lo <= stop, stop
+        else:
+            stop_hit, stop_fill = lo <= stop, np.where(o <= stop, o, stop)
+        target_hit = h >= tgt
+        target_fill = np.where(o >= tgt, o, tgt)
+        # Both levels inside one bar: a gap at the open decides, otherwise the same_bar assumption
+        both = stop_hit & target_hit
+        stop_first = np.where(o <= stop, True, np.where(o >= tgt, False, same_bar == "stop"))
+        stop_hit = stop_hit & ~(both & ~stop_first)
+        target_hit = target_hit & ~(both & stop_first)
+
+        hit = (stop_hit | target_hit) & inside
+        first = hit.argmax(axis=1)
+        done = hit[np.arange(len(active)), first]
+        k, f = active[done], first[done]
+        by_stop = stop_hit[done, f]
+        exit_pos[k] = start[k] + offset + 1 + f
+        exit_price[k] = np.where(by_stop, stop_fill[done, f], target_fill[done, f])
+        reason[k] = np.where(by_stop, "stop", "target")
+
+        # Out of bars before any exit: still open, marked at the last close
+        ended = ~done & ~inside[:, -1]
+        k = active[ended]
+        exit_pos[k] = np.maximum(counts[cols[k]] - 1, start[k])
+        exit_price[k] = bars["Close"][exit_pos[k], cols[k]]
+
+        carry[active] = carry_next
+        active = active[~done & ~ended]
+        offset, width = offset + width, width * 2
+
+    exit_rows = exit_pos if order is None else order[exit_pos, cols]
+    out = entries.copy()
+    out["Entry_Date"] = panel.dates[rows]
+    out["Entry_Price"] = entry
+    out["Exit_Date"] = panel.dates[exit_rows]
+    out["Exit_Price"] = exit_price
+    out["Reason"] = reason
+    out["Bars"] = exit_pos - start
+    out["PnL"] = (exit_price - entry) / entry
+    return out
+
+
+def _loop_reference(panel, ind, entries, style, trigger="low", same_bar=SAME_BAR):
+    """Bar-by-bar version of simulate_exits (the correctness reference in tests/test_exit_simulator.py)."""
+    out = []
+    for ticker, date in zip(entries["Ticker"], entries["Entry_Date"]):
+        j = panel.column[ticker]
+        days = np.flatnonzero(panel.mask[:, j])
+        t0 = int(np.searchsorted(days, panel.dates.get_loc(date)))
+        o, h, lo, c = (panel[f][days, j] for f in ["Open", "High", "Low", "Close"])
+        atr = ind["ATR"][days, j]
+        entry = c[t0]
+        stop = entry - STOP_ATR_MULT * atr[t0]
+        if style != "atr" and not stop < entry:
+            stop = entry * FALLBACK_STOP
+        target, hwm = entry * (1 + TAKE_PROFIT), entry
+        result = (panel.dates[days[-1]], c[-1], "end")
+        for t in range(t0 + 1, len(days)):
+            if style == "atr":
+                stop = max(stop, c[t] - STOP_ATR_MULT * atr[t]) if not np.isnan(atr[t]) else stop
+                if (c[t] if trigger == "close" else lo[t]) <= stop:
+                    result = (panel.dates[days[t]], c[t] if trigger == "close" else stop, "stop")
+                    break
+                continue
+            if style == "trail":
+                stop = max(stop, hwm * (1 - TRAIL_PCT))
+                hwm = max(hwm, h[t])
+            stop_hit, target_hit = lo[t] <= stop, h[t] >= target
+            if stop_hit and target_hit:
+                stop_first = True if o[t] <= stop else False if o[t] >= target else same_bar == "stop"
+                stop_hit, target_hit = stop_first, not stop_first
+            if stop_hit:
+                result = (panel.dates[days[t]], min(o[t], stop), "stop")
+                break
+            if target_hit:
+                result = (panel.dates[days[t]], max(o[t], target), "target")
+                break
+        out.append(result)
+    return pd.DataFrame(out, columns=["Exit_Date", "Exit_Price", "Reason"])
+
+
+if __name__ == "__main__":
+    # python exit_simulator.py --demo  -> offline: matches run_portfolio and a bar-by-bar loop, then timings
+    if "--demo" not in sys.argv:
+        print("Usage: python exit_simulator.py --demo")
+        sys.exit(0)
+
+    from indicator_engine import build_panel, compute_indicators, NO_SETUP
+    from simulation_engine import run_portfolio, triple_threat_rules
+    from synthetic_data import make_universe
+
+    panel = build_panel(make_universe(200, years=5, gap_rate=0.02, late_listing_frac=0.1, seed=3))
+    ind = compute_indicators(panel)
+
+    # 1. Same exits as the portfolio loop for the trades it took
+    result = run_portfolio(panel, ind, triple_threat_rules(), start_date="2020-03-01")
+    taken = result.trades[["Ticker", "Entry_Date"]]
+    fast = simulate_exits(panel, ind, taken, "atr")
+    same = (fast["Exit_Date"].to_numpy() == result.trades["Exit_Date"].to_numpy()).all()
+    diff = np.abs(fast["Exit_Price"].to_numpy() - result.trades["Exit_Price"].to_numpy()).max()
+    print(f"--- EXIT SIMULATOR: {len(panel.tickers)} tickers x {len(panel.dates)} days ---")
+    print(f"ATR ratchet vs run_portfolio on its {len(taken)} trades: exit dates equal {same} | max price diff {diff:.1e}")
+
+    # 2. Every setup hit as an entry, each style vs the bar-by-bar loop
+    valid = (ind["Setup"] != NO_SETUP) & panel.mask & ~np.isnan(ind["ATR"])
+    t, j = np.nonzero(valid)
+    hits = pd.DataFrame({"Ticker": np.array(panel.tickers)[j], "Entry_Date": panel.dates[t]})
+    sample = hits.sample(400, random_state=0)
+    runs = {}
+    for style in STYLES:
+        t0 = time.perf_counter()
+        fast = simulate_exits(panel, ind, hits, style)
+        t_fast = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        slow = _loop_reference(panel, ind, sample, style)
+        t_slow = (time.perf_counter() - t0) / len(sample) * len(hits)
+        check = fast.loc[sample.index].reset_index(drop=True)
+        ok = ((check["Exit_Date"] == slow["Exit_Date"]).all() and (check["Reason"] == slow["Reason"]).all()
+              and np.allclose(check["Exit_Price"], slow["Exit_Price"]))
+        runs[style] = fast
+        mix = fast["Reason"].value_counts().to_dict()
+        print(f"{style:>7}: {len(hits):,} trades in {t_fast * 1000:.0f} ms ({t_fast / len(hits) * 1e6:.1f} µs/trade) "
+              f"vs ~{t_slow:.1f}s looped | matches loop: {ok} | {mix} | avg PnL {fast['PnL'].mean() * 100:+.2f}%")
+
+    both = simulate_exits(panel, ind, hits, "trail", same_bar="target")
+    print(f"Trail with target-first same-bar fills: avg PnL {both['PnL'].mean() * 100:+.2f}% "
+          f"({(both['Reason'] == 'target').sum() - (runs['trail']['Reason'] == 'target').sum():+d} targets)")
@@ -1,22 +1,11 @@
 import pandas as pd
-import requests
-from backtester import SilentBacktester
+from universe_loader import UniverseLoader
+from indicator_engine import build_panel, evaluate_latest
+from universe import get_universe
 import datetime
-from io import StringIO
 
 # --- 1. Get the S&P 500 List ---
-def get_sp500_tickers():
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        response = requests.get(url, headers=headers)
-        table = pd.read_html(StringIO(response.text))
-        tickers = table[0]['Symbol'].tolist()
-        return [t.replace('.', '-') for t in tickers]
-    except:
-        return ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "AMD", "SPY", "QQQ", "IWM"]
-
-UNIVERSE = get_sp500_tickers()
+UNIVERSE = get_universe(extra=[])  # S&P 500 members only (cached snapshot)
 
 # --- 2. Scanning Buckets ---
 dips = []
@@ -26,18 +15,19 @@ reclaims = []
 print(f"--- SWING TRADER'S DAILY ACTION REPORT ({datetime.date.today()}) ---")
 print(f"Scanning {len(UNIVERSE)} Tickers... (This may take 2-3 minutes)")
 
-for ticker in UNIVERSE:
+# Fetching strictly the recent data (bulk, cache-first)
+START_DATE = (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%d')
+END_DATE = datetime.datetime.now().strftime('%Y-%m-%d')
+loader = UniverseLoader()
+UNIVERSE_DATA = loader.load(UNIVERSE, START_DATE, END_DATE)
+loader.report()
+
+# Tail-only vectorized pass: score each ticker's last bar
+PANEL = build_panel(UNIVERSE_DATA)
+LATEST = evaluate_latest(PANEL, START_DATE)
+
+for ticker, last in LATEST.iterrows():
     try:
-        # Fetching strictly the recent data
-        bot = SilentBacktester(ticker, 
-                               (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%d'),
-                               datetime.datetime.now().strftime('%Y-%m-%d'))
-        bot.fetch_data()
-        bot.apply_strategy()
-        
-        if bot.data.empty: continue
-        
-        last = bot.data.iloc[-1]
         setup = last['Setup']
         
         info = {
@@ -0,0 +1,142 @@
+import time
+import uuid
+import threading
+from types import SimpleNamespace
+import pandas as pd
+from alpaca.trading.enums import OrderSide
+
+# Stand-in for the broker, next to data_providers.ReplayProvider: what the
+# tests, the --fake demos and the benchmarks use instead of Alpaca.
+
+OPEN_STATUSES = ("new", "accepted", "held", "partially_filled")
+
+
+class FakeBroker:
+    """Stand-in for alpaca's TradingClient (and the latest-trade call of its data client).
+
+    Closed orders come from a trade_history frame; every call sleeps `latency`
+    seconds like a network round-trip. `timeout_symbols` accept the order but
+    raise on the response, `reject_symbols` refuse it, and methods named in
+    `fail_calls` raise a connection error. A latest-trade request with a symbol
+    missing from `prices` fails as a whole, as Alpaca's does.
+    """
+
+    def __init__(self, history=None, equity=100000.0, cash=50000.0, latency=0.0, prices=None,
+                 timeout_symbols=(), reject_symbols=()):
+        self.orders = []
+        if history is not None:
+            stamps = pd.to_datetime(history["date"])
+            if stamps.dt.tz is None:
+                stamps = stamps.dt.tz_localize("UTC")
+            entered = {}
+            for r, ts in zip(history.itertuples(), stamps):
+                # A sell is the stop/target leg of the last entry: submitted with it, filled later
+                if r.action == "SELL":
+                    submitted = entered.get(r.ticker, ts)
+                else:
+                    submitted = entered[r.ticker] = ts
+                self.orders.append(self.order(r.ticker, OrderSide.SELL if r.action == "SELL" else OrderSide.BUY, r.qty,
+                                              submitted, filled_at=ts, price=r.price, id=r.order_id))
+        self.account = SimpleNamespace(equity=equity, cash=cash, buying_power=cash)
+        self.positions = []
+        self.prices = dict(prices or {})
+        self.latency = latency
+        self.timeout_symbols = set(timeout_symbols)
+        self.reject_symbols = set(reject_symbols)
+        self.fail_calls = set()  # Method names that raise, e.g. {"get_account"}
+        self.calls = 0
+        self.replaced = []  # (order id, new stop) per replace_order_by_id
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def order(symbol, side, qty, submitted_at, filled_at=None, price=None, id=None, status=None):
+        """An alpaca-like Order; filled when filled_at is given, otherwise open ("new")."""
+        id = id or str(uuid.uuid4())
+        return SimpleNamespace(id=id, client_order_id=id, symbol=symbol, side=side, qty=qty,
+                               filled_qty=qty if filled_at is not None else 0, filled_avg_price=price,
+                               filled_at=filled_at, created_at=submitted_at, submitted_at=submitted_at,
+                               stop_price=None, status=status or ("filled" if filled_at is not None else "new"))
+
+    def _call(self, name=None):
+        if name in self.fail_calls:
+            raise ConnectionError(f"{name}: connection reset by peer")
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def get_orders(self, filter=None):
+        self._call("get_orders")
+        status = str(getattr(getattr(filter, "status", None), "value", "all"))
+        side = getattr(filter, "side", None)
+        with self._lock:
+            orders = list(self.orders)
+        if status == "open":
+            orders = [o for o in orders if o.status in OPEN_STATUSES]
+        elif status == "closed":
+            orders = [o for o in orders if o.status not in OPEN_STATUSES]
+        if side is not None:
+            orders = [o for o in orders if o.side == side]
+        after = getattr(filter, "after", None)
+        if after is not None:
+            orders = [o for o in orders if o.submitted_at > pd.Timestamp(after)]
+        # Alpaca pages: newest first unless direction=asc, 50 per request by default
+        ascending = str(getattr(getattr(filter, "direction", None), "value", "desc")) == "asc"
+        orders.sort(key=lambda o: o.submitted_at, reverse=not ascending)
+        return orders[:getattr(filter, "limit", None) or 50]
+
+    def get_order_by_id(self, order_id):
+        self._call("get_order_by_id")
+        with self._lock:
+            return next(o for o in self.orders if str(o.id) == str(order_id))
+
+    def replace_order_by_id(self, order_id, order_data):
+        self._call("replace_order_by_id")
+        with self._lock:
+            order = next(o for o in self.orders if str(o.id) == str(order_id))
+            if order_data.stop_price is not None:
+                order.stop_price = order_data.stop_price
+            self.replaced.append((str(order_id), order_data.stop_price))
+        return order
+
+    def get_all_positions(self):
+        self._call("get_all_positions")
+        return list(self.positions)
+
+    def get_account(self):
+        self._call("get_account")
+        return self.account
+
+    def get_stock_latest_trade(self, req):
+        self._call("get_stock_latest_trade")
+        symbols = req.symbol_or_symbols if isinstance(req.symbol_or_symbols, list) else [req.symbol_or_symbols]
+        unknown = [s for s in symbols if s not in self.prices]
+        if unknown:  # Like the real endpoint: one invalid symbol fails the whole request
+            raise RuntimeError(f'{{"code": 42210000, "message": "invalid symbol: {unknown[0]}"}}')
+        return {s: SimpleNamespace(price=self.prices[s]) for s in symbols}
+
+    def submit_order(self, order_data):
+        self._call("submit_order")
+        symbol = order_data.symbol
+        if symbol in self.reject_symbols:
+            raise RuntimeError(f'{{"code": 40310000, "message": "insufficient buying power for {symbol}"}}')
+        with self._lock:
+            if order_data.client_order_id and any(o.client_order_id == order_data.client_order_id for o in self.orders):
+                raise RuntimeError('{"code": 40010001, "message": "client_order_id must be unique"}')
+            order = SimpleNamespace(id=str(uuid.uuid4()), client_order_id=order_data.client_order_id, symbol=symbol,
+                             side=order_data.side, qty=order_data.qty, filled_qty=0, filled_avg_price=None,
+                             filled_at=None, created_at=pd.Timestamp.now(tz="UTC"), submitted_at=pd.Timestamp.now(tz="UTC"),
+                             stop_price=None, status="accepted")
+            self.orders.append(order)
+            self.account.cash -= order_data.qty * self.prices.get(symbol, 0.0)
+        if symbol in self.timeout_symbols:
+            raise TimeoutError(f"read timed out submitting {symbol}")
+        return order
@@ -1,38 +1,29 @@
 import pandas as pd
-import requests
-from backtester import SilentBacktester
+from universe_loader import UniverseLoader
+from indicator_engine import build_panel, evaluate_latest
+from universe import get_universe
 import datetime
-from io import StringIO
 
-def get_sp500_tickers():
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        response = requests.get(url, headers=headers)
-        table = pd.read_html(StringIO(response.text))
-        return [t.replace('.', '-') for t in table[0]['Symbol'].tolist()]
-    except:
-        return ["SPY", "QQQ", "IWM", "NVDA", "TSLA", "AAPL", "AMD", "AMZN", "MSFT", "GOOGL"]
-
-UNIVERSE = get_sp500_tickers()
+UNIVERSE = get_universe(extra=[])  # S&P 500 members only (cached snapshot)
 dips = []
 breakouts = []
 
 print(f"--- SILENT SWING: LIVE MARKET SCANNER ({datetime.date.today()}) ---")
 print(f"Scanning {len(UNIVERSE)} Tickers... (Targeting Momentum & Panic)")
 
-for ticker in UNIVERSE:
+# Fetch 60 days for accurate MA and Volume data (bulk, cache-first)
+START_DATE = (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%d')
+END_DATE = datetime.datetime.now().strftime('%Y-%m-%d')
+loader = UniverseLoader()
+UNIVERSE_DATA = loader.load(UNIVERSE, START_DATE, END_DATE)
+loader.report()
+
+# Tail-only vectorized pass: score each ticker's last bar
+PANEL = build_panel(UNIVERSE_DATA)
+LATEST = evaluate_latest(PANEL, START_DATE)
+
+for ticker, last in LATEST.iterrows():
     try:
-        # Fetch 60 days for accurate MA and Volume data
-        bot = SilentBacktester(ticker, 
-                               (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%d'),
-                               datetime.datetime.now().strftime('%Y-%m-%d'))
-        bot.fetch_data()
-        bot.apply_strategy()
-        
-        if bot.data.empty: continue
-        
-        last = bot.data.iloc[-1]
         
         info = {
             'ticker': ticker,
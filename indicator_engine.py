@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from backtester import RSI_OVERSOLD, RVOL_BREAKOUT, LOOKBACK_BARS
+
+# Same indicators and setups as SilentBacktester.apply_strategy, but computed
+# for the whole universe at once on aligned (dates x tickers) NumPy arrays.
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+SETUP_NAMES = np.array(["None", "OVERSOLD_DIP", "MOMENTUM_BREAK", "TREND_RECLAIM"], dtype=object)
+NO_SETUP, OVERSOLD_DIP, MOMENTUM_BREAK, TREND_RECLAIM = range(4)
+
+
+class PricePanel:
+    """Aligned OHLCV for many tickers: one (dates x tickers) float array per field.
+
+    `mask[t, j]` is True when ticker j has a bar on dates[t]. Rolling windows are
+    always taken over each ticker's own bars, so a gap in the union calendar
+    (e.g. BTC-USD trading on weekends) never bleeds into a stock's indicators.
+    """
+
+    def __init__(self, dates, tickers, fields, mask):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.fields = fields
+        self.mask = mask
+        self.column = {t: j for j, t in enumerate(self.tickers)}
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    @property
+    def shape(self):
+        return self.mask.shape
+
+
+def build_panel(frames):
+    """{ticker: OHLCV DataFrame} -> PricePanel on the union of all dates."""
+    frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+    tickers = list(frames)
+    dates = pd.DatetimeIndex([])
+    for df in frames.values():
+        dates = dates.union(df.index)
+    block = np.full((len(FIELDS), len(dates), len(tickers)), np.nan)
+    mask = np.zeros((len(dates), len(tickers)), dtype=bool)
+
+    for j, ticker in enumerate(tickers):
+        df = frames[ticker]
+        rows = dates.get_indexer(df.index)
+        mask[rows, j] = True
+        block[:, rows, j] = df.to_numpy(dtype=float)[:, df.columns.get_indexer(FIELDS)].T
+    return PricePanel(dates, tickers, dict(zip(FIELDS, block)), mask)
+
+
+def compute_indicators(panel, rsi_max=RSI_OVERSOLD, rvol_min=RVOL_BREAKOUT):
+    """One vectorized pass: MA20/MA50/RSI(7)/AvgVol/RVOL/ATR(14) and the setup codes."""
+    order = None if panel.mask.all() else np.argsort(~panel.mask, axis=0, kind="stable")
+    ind = _indicators({f: _compact(panel[f], order) for f in FIELDS}, rsi_max, rvol_min)
+    return {k: _expand(v, order, panel.mask, fill=NO_SETUP if k == "Setup" else np.nan) for k, v in ind.items()}
+
+
+def reclassify(panel, ind, rsi_max=RSI_OVERSOLD, rvol_min=RVOL_BREAKOUT):
+    """Setup codes for new thresholds, reusing already computed indicators."""
+    order = None if panel.mask.all() else np.argsort(~panel.mask, axis=0, kind="stable")
+    setup = classify_setups(_compact(panel["Close"], order), _compact(panel["Open"], order), _compact(ind["MA20"], order),
+                            _compact(ind["RSI"], order), _compact(ind["RVOL"], order), rsi_max, rvol_min)
+    return _expand(setup, order, panel.mask, fill=NO_SETUP)
+
+
+def evaluate_latest(panel, start_date=None, rsi_max=RSI_OVERSOLD, rvol_min=RVOL_BREAKOUT):
+    """Tail-only scan: scores just each ticker's last bar from its last LOOKBACK_BARS bars.
+
+    Returns the same frame as latest_rows(panel, compute_indicators(panel)).
+    """
+    n_dates, n_tickers = panel.shape
+    order = np.argsort(~panel.mask, axis=0, kind="stable")
+    counts = panel.mask.sum(axis=0)
+
+    # Row k of the tail block = the ticker's (count - LOOKBACK_BARS + k)-th bar;
+    # tickers with a shorter history get NaN rows on top, which behave exactly
+    # like "no bar yet" in every rolling window.
+    positions = counts[None, :] - LOOKBACK_BARS + np.arange(LOOKBACK_BARS)[:, None]
+    missing = positions < 0
+    src_rows = np.take_along_axis(order, np.clip(positions, 0, max(n_dates - 1, 0)), axis=0)
+    cols = np.arange(n_tickers)[None, :]
+    tail = {}
+    for f in FIELDS:
+        block = panel[f][src_rows, cols]
+        block[missing] = np.nan
+        tail[f] = block
+    ind = {k: v[-1] for k, v in _indicators(tail, rsi_max, rvol_min, padding=missing).items()}
+
+    has_bar = counts > 0
+    last_rows = src_rows[-1]
+    if start_date is not None:
+        has_bar &= panel.dates[last_rows] >= pd.Timestamp(start_date)
+    keep = np.flatnonzero(has_bar)
+
+    out = pd.DataFrame({f: tail[f][-1, keep] for f in FIELDS}, index=pd.Index([panel.tickers[j] for j in keep], name="Ticker"))
+    for k in ["MA20", "MA50", "RSI", "AvgVol", "RVOL", "ATR"]:
+        out[k] = ind[k][keep]
+    out["Setup"] = SETUP_NAMES[ind["Setup"][keep]]
+    out["Date"] = panel.dates[last_rows[keep]]
+    return out
+
+
+def _indicators(bars, rsi_max, rvol_min, padding=None):
+    """Core math on arrays laid out in per-ticker bar order (time runs down axis 0).
+
+    `padding` marks leading filler rows that are not bars at all, so they must
+    not count as zero gain/loss in the RSI windows.
+    """
+    close, open_, volume = bars["Close"], bars["Open"], bars["Volume"]
+    high_low = bars["High"] - bars["Low"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ma20 = _rolling_mean(close, 20)
+        ma50 = _rolling_mean(close, 50)
+
+        # RSI (7-period): a NaN delta counts as 0 gain / 0 loss, exactly like pandas .where()
+        delta = _shift(close, 1)
+        np.subtract(close, delta, out=delta)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        if padding is not None:
+            gain[padding] = loss[padding] = np.nan
+        gain, loss = _rolling_mean(gain, 7), _rolling_mean(loss, 7)
+        rsi = 100 - (100 / (1 + gain / loss))
+
+        avg_vol = _rolling_mean(volume, 20)
+        rvol = volume / avg_vol
+        atr = _rolling_mean(high_low, 14)
+
+    setup = classify_setups(close, open_, ma20, rsi, rvol, rsi_max, rvol_min)
+    return {"MA20": ma20, "MA50": ma50, "RSI": rsi, "AvgVol": avg_vol, "RVOL": rvol, "ATR": atr, "Setup": setup}
+
+
+def classify_setups(close, open_, ma20, rsi, rvol, rsi_max=RSI_OVERSOLD, rvol_min=RVOL_BREAKOUT):
+    """Setup code per bar. Later setups override earlier ones, as in apply_strategy.
+
+    Arrays must be in per-ticker bar order (the compacted layout used above, or
+    a panel with no gaps) because TREND_RECLAIM looks at the previous bar.
+    """
+    setup = np.zeros(close.shape, dtype=np.int8)
+    setup[rsi < rsi_max] = OVERSOLD_DIP
+    setup[(rvol > rvol_min) & (close > open_) & (close > ma20)] = MOMENTUM_BREAK
+    setup[(close > ma20) & (_shift(close, 1) < _shift(ma20, 1))] = TREND_RECLAIM
+    return setup
+
+
+def frame_for(panel, ind, ticker, start_date=None):
+    """Rebuilds the DataFrame apply_strategy would have produced for one ticker."""
+    j = panel.column[ticker]
+    rows = panel.mask[:, j]
+    df = pd.DataFrame({f: panel[f][rows, j] for f in ["Close", "High", "Low", "Open", "Volume"]}, index=panel.dates[rows])
+    for k in ["MA20", "MA50", "RSI", "AvgVol", "RVOL", "ATR"]:
+        df[k] = ind[k][rows, j]
+    df["Setup"] = SETUP_NAMES[ind["Setup"][rows, j]]
+    return df.loc[start_date:] if start_date else df
+
+
+def latest_rows(panel, ind, start_date=None):
+    """Last available bar per ticker (what the scanners read via data.iloc[-1])."""
+    has_bar = panel.mask.any(axis=0)
+    last = panel.mask.shape[0] - 1 - np.argmax(panel.mask[::-1], axis=0)
+    if start_date is not None:
+        has_bar &= panel.dates[last] >= pd.Timestamp(start_date)
+    cols = np.flatnonzero(has_bar)
+    rows = last[cols]
+
+    out = pd.DataFrame({f: panel[f][rows, cols] for f in FIELDS}, index=pd.Index([panel.tickers[j] for j in cols], name="Ticker"))
+    for k in ["MA20", "MA50", "RSI", "AvgVol", "RVOL", "ATR"]:
+        out[k] = ind[k][rows, cols]
+    out["Setup"] = SETUP_NAMES[ind["Setup"][rows, cols]]
+    out["Date"] = panel.dates[rows]
+    return out
+
+
+# --- Array helpers ---
+def _compact(x, order):
+    """Moves each ticker's bars to the top of its column (time order kept)."""
+    return x if order is None else np.take_along_axis(x, order, axis=0)
+
+
+def _expand(x, order, mask, fill=np.nan):
+    """Inverse of _compact, with `fill` on dates the ticker has no bar."""
+    if order is None:
+        return x
+    out = np.empty_like(x)
+    np.put_along_axis(out, order, x, axis=0)
+    out[~mask] = fill
+    return out
+
+
+def _rolling_mean(x, window):
+    """pandas .rolling(window).mean() along axis 0 (NaN until the window is full)."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).mean(axis=-1)
+    return out
+
+
+def _shift(x, n):
+    out = np.full(x.shape, np.nan)
+    out[n:] = x[:-n]
+    return out
+
+
+if __name__ == "__main__":
+    # Benchmark + equivalence check against the per-ticker pandas path (offline)
+    import time
+    from backtester import SilentBacktester
+    from synthetic_data import make_ohlcv
+
+    N_TICKERS = 500
+    START, END = "2025-01-01", "2025-03-15"
+    frames = {f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2024-11-20", END, seed=i) for i in range(N_TICKERS)}
+    # Give a few tickers holes so the gap handling is exercised
+    for i in range(0, N_TICKERS, 50):
+        df = frames[f"SYN{i:03d}"]
+        frames[f"SYN{i:03d}"] = df.drop(df.index[10:13])
+    # ...and a few young listings shorter than the MA50 / RSI windows
+    for i, bars in [(1, 30), (2, 8), (3, 5)]:
+        frames[f"SYN{i:03d}"] = frames[f"SYN{i:03d}"].iloc[-bars:]
+
+    t0 = time.perf_counter()
+    legacy = {}
+    for ticker, df in frames.items():
+        bot = SilentBacktester(ticker, START, END)
+        bot.data = df
+        bot.apply_strategy()
+        legacy[ticker] = bot.data
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    panel = build_panel(frames)
+    ind = compute_indicators(panel)
+    t_engine = time.perf_counter() - t0
+
+    worst, setup_mismatch = 0.0, 0
+    for ticker, expected in legacy.items():
+        got = frame_for(panel, ind, ticker, START)
+        for k in ["MA20", "MA50", "RSI", "RVOL", "ATR"]:
+            a, b = expected[k].to_numpy(), got[k].to_numpy()
+            same_nan = np.isnan(a) == np.isnan(b)
+            assert same_nan.all(), f"NaN layout differs for {ticker} {k}"
+            diff = np.abs(a - b)[~np.isnan(a) & np.isfinite(a)]
+            worst = max(worst, diff.max() if len(diff) else 0.0)
+        setup_mismatch += int((expected["Setup"].to_numpy() != got["Setup"].to_numpy()).sum())
+
+    print(f"--- INDICATOR ENGINE: {N_TICKERS} tickers x {len(panel.dates)} bars ---")
+    print(f"Per-ticker apply_strategy: {t_legacy * 1000:8.1f} ms")
+    print(f"Vectorized panel engine:   {t_engine * 1000:8.1f} ms  (x{t_legacy / t_engine:.0f} faster)")
+    print(f"Max abs indicator diff:    {worst:.2e} | Setup mismatches: {setup_mismatch}")
+
+    # Last-bar paths: SilentBacktester.evaluate_last_bar and the panel tail scan
+    t0 = time.perf_counter()
+    records = {}
+    for ticker, df in frames.items():
+        bot = SilentBacktester(ticker, START, END)
+        bot.data = df
+        records[ticker] = bot.evaluate_last_bar()
+    t_record = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tail_scan = evaluate_latest(build_panel(frames), START)
+    t_tail = time.perf_counter() - t0
+
+    worst_tail, tail_mismatch = 0.0, 0
+    for ticker, expected in legacy.items():
+        last = expected.iloc[-1]
+        for got in [records[ticker], tail_scan.loc[ticker]]:
+            for k in ["MA20", "MA50", "RSI", "RVOL", "ATR"]:
+                a, b = last[k], got[k]
+                assert np.isnan(a) == np.isnan(b), f"NaN differs for {ticker} {k}"
+                if np.isfinite(a):
+                    worst_tail = max(worst_tail, abs(a - b))
+            tail_mismatch += int(last["Setup"] != got["Setup"])
+
+    print(f"Per-ticker evaluate_last_bar: {t_record * 1000:5.1f} ms | Panel evaluate_latest: {t_tail * 1000:5.1f} ms")
+    print(f"Last-bar max abs diff:     {worst_tail:.2e} | Setup mismatches: {tail_mismatch}")
@@ -0,0 +1,223 @@
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy import text, bindparam
+from storage import get_engine, write_transaction, read_trades, db_time
+
+# Realized PnL per closing fill, computed with grouped array ops instead of a
+# row-by-row inventory walk, and materialized in the closed_trades table.
+# sync() only recomputes the tickers that got new fills since the last run.
+
+# --- CONFIGURATION ---
+LEDGER_METHOD = os.getenv("LEDGER_METHOD", "average")  # "average" (cost basis) or "fifo" (lots)
+EPS = 1e-9  # Quantities below this count as flat
+
+CLOSED_COLUMNS = ["fill_id", "date", "ticker", "qty", "price", "cost_basis", "pnl"]
+
+
+def _inventory(history):
+    """Per-row buy/sell flags and shares held before/after each fill, grouped by ticker.
+
+    Held shares never go negative: a sell bigger than the position closes it and
+    a sell with nothing held is ignored (same rules as the old inventory dict).
+    """
+    action = history["action"].astype(str)
+    buy = action.str.contains("BUY").to_numpy()
+    sell = ~buy & action.str.contains("SELL").to_numpy()
+    qty = history["qty"].to_numpy(dtype=float)
+    ticker = history["ticker"].to_numpy()
+
+    # held_t = max(0, held_{t-1} + x_t) in closed form: S_t - min(0, min_{s<=t} S_s)
+    flow = pd.Series(np.where(buy, qty, np.where(sell, -qty, 0.0)))
+    running = flow.groupby(ticker, sort=False).cumsum()
+    held = (running - np.minimum(running.groupby(ticker, sort=False).cummin(), 0.0)).to_numpy()
+    held[np.abs(held) < EPS] = 0.0
+    before = pd.Series(held).groupby(ticker, sort=False).shift(fill_value=0.0).to_numpy()
+    return buy, sell & (before > EPS), qty, ticker, held, before
+
+
+def average_cost(history):
+    """Average-cost realized PnL; sells are charged the blended cost of everything still held."""
+    buy, closing, qty, ticker, held, before = _inventory(history)
+    price = history["price"].to_numpy(dtype=float)
+
+    # Inside one position (flat -> flat) each sell scales the held value and qty by the same
+    # fraction F, so the average cost is sum(q*p/F) / sum(q/F) over the buys so far
+    episode = pd.Series(buy & (before <= EPS)).groupby(ticker, sort=False).cumsum().to_numpy()
+    keys = [ticker, episode]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_frac = np.log(np.where(closing, held / np.where(closing, before, 1.0), 1.0))
+        log_kept = pd.Series(log_frac).groupby(keys, sort=False).cumsum().to_numpy()
+        weight = np.where(buy, qty * np.exp(-np.where(buy, log_kept, 0.0)), 0.0)
+        cost = (pd.Series(weight * price).groupby(keys, sort=False).cumsum()
+                / pd.Series(weight).groupby(keys, sort=False).cumsum()).to_numpy()
+
+    return _closed_frame(history, closing, qty, price, cost)
+
+
+def fifo(history):
+    """FIFO realized PnL: each sell is matched against the oldest open lots (capped at shares held)."""
+    buy, closing, qty, ticker, held, before = _inventory(history)
+    price = history["price"].to_numpy(dtype=float)
+    sold = np.where(closing, before - held, 0.0)
+    bought = np.where(buy, qty, 0.0)
+
+    # Lay every ticker's lots end to end on one share axis (each ticker offset by the buys of
+    # the tickers before it), put its sells on the same axis, and cut at every boundary:
+    # each piece is one (lot, sell) match
+    codes = pd.factorize(ticker)[0]
+    base = np.r_[0.0, np.cumsum(np.bincount(codes, weights=bought))][codes]
+    lot_end = pd.Series(bought).groupby(codes).cumsum().to_numpy() + base
+    sell_end = pd.Series(sold).groupby(codes).cumsum().to_numpy() + base
+
+    lot_rows = np.flatnonzero(bought > 0)
+    lot_rows = lot_rows[np.argsort(lot_end[lot_rows], kind="stable")]
+    sell_rows = np.flatnonzero(sold > 0)
+    sell_rows = sell_rows[np.argsort(sell_end[sell_rows], kind="stable")]
+    lot_end, sell_end = lot_end[lot_rows], sell_end[sell_rows]
+    sell_start = sell_end - sold[sell_rows]
+
+    cuts = np.unique(np.r_[lot_end, sell_end, sell_start])
+    mids = (cuts[:-1] + cuts[1:]) / 2
+    s_idx = np.minimum(np.searchsorted(sell_end, mids), max(len(sell_end) - 1, 0))
+    in_sell = (mids < sell_end[s_idx]) & (mids > sell_start[s_idx]) if len(sell_end) else np.zeros(len(mids), bool)
+    seg_len = np.diff(cuts)[in_sell]
+    lot_price = price[lot_rows[np.searchsorted(lot_end, mids[in_sell])]]
+
+    cost_total = np.zeros(len(history))
+    np.add.at(cost_total, sell_rows[s_idx[in_sell]], seg_len * lot_price)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = np.where(sold > 0, cost_total / sold, np.nan)
+    return _closed_frame(history, sold > 0, sold, price, cost)
+
+
+def _closed_frame(history, closing, qty, price, cost):
+    ids = history["id"].to_numpy() if "id" in history else np.arange(len(history))
+    return pd.DataFrame({
+        "fill_id": ids[closing],
+        "date": history["date"].to_numpy()[closing],
+        "ticker": history["ticker"].to_numpy()[closing],
+        "qty": qty[closing],
+        "price": price[closing],
+        "cost_basis": cost[closing],
+        "pnl": (price[closing] - cost[closing]) * qty[closing],
+    })
+
+
+def realized_pnl(history, method=LEDGER_METHOD):
+    """One row per closing fill (fill_id, date, ticker, qty, price, cost_basis, pnl), in history order."""
+    if history.empty:
+        return pd.DataFrame(columns=CLOSED_COLUMNS)
+    history = history.reset_index(drop=True)
+    if method == "fifo":
+        return fifo(history)
+    if method == "average":
+        return average_cost(history)
+    raise ValueError(f"unknown ledger method: {method}")
+
+
+# --- Materialized closed_trades ---
+def sync(engine=None, method=LEDGER_METHOD):
+    """Brings closed_trades up to date with trade_history; returns how many tickers were recomputed.
+
+    Only tickers with fills newer than the last sync are recomputed (from their full
+    history, so late or out-of-order fills are handled). Runs in one write
+    transaction, so concurrent writers/syncs can't interleave.
+    """
+    with write_transaction(engine or get_engine()) as conn:
+        state = dict(conn.execute(text("SELECT key, value FROM monitor_state WHERE key IN ('ledger_last_id', 'ledger_method')")).fetchall())
+        last_id = int(state.get("ledger_last_id", 0)) if state.get("ledger_method") == method else 0
+        max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM trade_history")).scalar()
+        if max_id <= last_id and last_id:
+            return 0
+
+        if last_id == 0:
+            conn.execute(text("DELETE FROM closed_trades"))
+            tickers = None
+        else:
+            tickers = [row[0] for row in conn.execute(text("SELECT DISTINCT ticker FROM trade_history WHERE id > :id"), {"id": last_id})]
+            conn.execute(text("DELETE FROM closed_trades WHERE ticker IN :tickers").bindparams(bindparam("tickers", expanding=True)),
+                         {"tickers": tickers})
+
+        history = read_trades(conn, tickers=tickers)
+        closed = realized_pnl(history, method)
+        if not closed.empty:
+            rows = closed.assign(date=closed["date"].map(db_time), fill_id=closed["fill_id"].astype(int)).to_dict("records")
+            conn.execute(text(f"INSERT OR REPLACE INTO closed_trades ({', '.join(CLOSED_COLUMNS)}) "
+                              f"VALUES ({', '.join(':' + c for c in CLOSED_COLUMNS)})"), rows)
+        for key, value in (("ledger_last_id", max_id), ("ledger_method", method)):
+            conn.execute(text("INSERT OR REPLACE INTO monitor_state (key, value) VALUES (:k, :v)"), {"k": key, "v": str(value)})
+        return history["ticker"].nunique()
+
+
+def safe_sync(engine=None):
+    """sync() for the write paths: a ledger problem must never block logging a fill."""
+    try:
+        return sync(engine)
+    except Exception as e:
+        print(f"⚠️ Ledger Sync Error: {e}")
+        return 0
+
+
+def load_closed_trades(engine=None):
+    with (engine or get_engine()).connect() as conn:
+        df = pd.read_sql(text(f"SELECT {', '.join(CLOSED_COLUMNS)} FROM closed_trades ORDER BY date, fill_id"), conn)
+    df["date"] = pd.to_datetime(df["date"], format="mixed")
+    return df
+
+
+if __name__ == "__main__":
+    # Checks the vectorized ledger against the old iterrows loop and times both,
+    # then shows an incremental sync after one new fill.
+    import time
+    import tempfile
+    from storage import open_engine, insert_trades, load_trade_history
+    from synthetic_data import make_trade_history
+
+    def legacy(history_df):
+        inventory, closed = {}, []
+        for _, row in history_df.iterrows():
+            ticker, action, price, qty = row['ticker'], row['action'], float(row['price']), float(row['qty'])
+            if "BUY" in action:
+                inv = inventory.setdefault(ticker, {'qty': 0.0, 'cost': 0.0})
+                inv['cost'] = ((inv['qty'] * inv['cost']) + (qty * price)) / (inv['qty'] + qty)
+                inv['qty'] += qty
+            elif "SELL" in action and ticker in inventory and inventory[ticker]['qty'] > 0:
+                closed.append((price - inventory[ticker]['cost']) * qty)
+                inventory[ticker]['qty'] = max(0.0, inventory[ticker]['qty'] - qty)
+        return np.array(closed)
+
+    history = make_trade_history(20000, 50)
+    # Stray sells (nothing held / more than held) exercise the clamping rules
+    strays = history.sample(200, random_state=1).assign(action="SELL", qty=75.0, order_id=lambda d: d["order_id"] + "-x")
+    history = pd.concat([history, strays]).sort_values("date", kind="stable", ignore_index=True)
+
+    t0 = time.perf_counter()
+    expected = legacy(history)
+    t_legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = realized_pnl(history, "average")
+    t_vec = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    lots = realized_pnl(history, "fifo")
+    t_fifo = time.perf_counter() - t0
+
+    print(f"--- LEDGER: {len(history):,} fills, {len(got):,} closing fills ---")
+    print(f"Average cost matches iterrows loop: {np.allclose(got['pnl'], expected)} (max diff {np.abs(got['pnl'] - expected).max():.2e})")
+    print(f"iterrows {t_legacy * 1000:.0f} ms | vectorized average {t_vec * 1000:.1f} ms | fifo {t_fifo * 1000:.1f} ms")
+    print(f"Total realized: average ${got['pnl'].sum():,.2f} | fifo ${lots['pnl'].sum():,.2f}")
+
+    engine = open_engine(os.path.join(tempfile.mkdtemp(), "ledger.db"))
+    insert_trades(history.to_dict("records"), engine)
+    t0 = time.perf_counter()
+    sync(engine)
+    t_full = time.perf_counter() - t0
+    last = history.iloc[-1]
+    insert_trades([{"date": last["date"] + pd.Timedelta(minutes=5), "ticker": last["ticker"], "action": "SELL",
+                    "price": 500.0, "qty": 1.0, "order_id": "new-fill"}], engine)
+    t0 = time.perf_counter()
+    touched = sync(engine)
+    t_inc = time.perf_counter() - t0
+    stored = load_closed_trades(engine)
+    print(f"closed_trades: full build {t_full * 1000:.0f} ms | incremental ({touched} ticker) {t_inc * 1000:.1f} ms | "
+          f"{len(stored):,} rows, matches recompute: {np.allclose(stored['pnl'].sum(), realized_pnl(load_trade_history(engine))['pnl'].sum())}")
@@ -0,0 +1,283 @@
+import os
+import json
+import math
+import datetime
+from collections import deque
+import pandas as pd
+from backtester import RSI_OVERSOLD, RVOL_BREAKOUT
+
+# --- CONFIGURATION ---
+STATE_FILE = os.getenv("INDICATOR_STATE_FILE", "indicator_state.json")
+RESUM_EVERY = 1000  # Re-add the window from scratch now and then so float drift can't build up
+
+NAN = float("nan")
+
+
+class RollingMean:
+    """pandas .rolling(window).mean() as a ring buffer + running sum (O(1) per value)."""
+
+    def __init__(self, window, values=()):
+        self.window = window
+        self.buf = deque(maxlen=window)
+        self.total = 0.0
+        self.nans = 0
+        self.pushes = 0
+        for v in values:
+            self.push(v)
+
+    @classmethod
+    def restore(cls, window, values):
+        """Same state as RollingMean(window, values) without replaying every push."""
+        state = cls(window)
+        state.buf.extend(values)
+        kept = [v for v in state.buf if not math.isnan(v)]
+        state.total = math.fsum(kept)
+        state.nans = len(state.buf) - len(kept)
+        return state
+
+    def push(self, x):
+        if len(self.buf) == self.window:
+            self._remove(self.buf[0])
+        self.buf.append(x)
+        self._add(x)
+        self.pushes += 1
+        if self.pushes % RESUM_EVERY == 0:
+            self.total = sum(v for v in self.buf if not math.isnan(v))
+        return self.mean()
+
+    def peek(self, x):
+        """Mean if x were pushed, without changing the state."""
+        full = len(self.buf) == self.window
+        if len(self.buf) + (0 if full else 1) < self.window:
+            return NAN
+        oldest = self.buf[0] if full else 0.0
+        nans = self.nans + math.isnan(x) - math.isnan(oldest)
+        if nans:
+            return NAN
+        return (self.total + x - oldest) / self.window
+
+    def mean(self):
+        if len(self.buf) < self.window or self.nans:
+            return NAN
+        return self.total / self.window
+
+    def _add(self, x):
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+
+    def _remove(self, x):
+        if math.isnan(x):
+            self.nans -= 1
+        else:
+            self.total -= x
+
+
+class IncrementalIndicators:
+    """Live MA20/MA50/RSI(7)/RVOL/ATR(14) + setup for one ticker, updated bar by bar.
+
+    update() commits a finished bar; preview()/tick() evaluate a provisional
+    (intraday) bar without touching the committed state, so a quote can be
+    re-scored as often as it arrives.
+    """
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.ma20 = RollingMean(20)
+        self.ma50 = RollingMean(50)
+        self.gain = RollingMean(7)
+        self.loss = RollingMean(7)
+        self.avg_vol = RollingMean(20)
+        self.atr = RollingMean(14)
+        self.prev_close = NAN
+        self.prev_ma20 = NAN
+        self.last_date = None
+        self.last = None          # Snapshot of the last committed bar
+        self.provisional = None   # Intraday bar being built by tick()
+
+    # --- Seeding ---
+    def seed(self, df):
+        """Replays history (e.g. SilentBacktester.data) into the state."""
+        cols = {c: df[c].to_numpy(dtype=float) for c in ["Open", "High", "Low", "Close", "Volume"]}
+        for i, date in enumerate(df.index):
+            self.update({c: cols[c][i] for c in cols}, date)
+        return self.last
+
+    # --- Bar updates ---
+    def update(self, bar, date=None):
+        """Commits a completed bar and returns its snapshot."""
+        close, delta = float(bar["Close"]), float(bar["Close"]) - self.prev_close
+        ma20 = self.ma20.push(close)
+        snap = self._snapshot(
+            bar, date, ma20,
+            ma50=self.ma50.push(close),
+            gain=self.gain.push(delta if delta > 0 else 0.0),
+            loss=self.loss.push(-delta if delta < 0 else 0.0),
+            avg_vol=self.avg_vol.push(float(bar["Volume"])),
+            atr=self.atr.push(float(bar["High"]) - float(bar["Low"])),
+        )
+        self.prev_close, self.prev_ma20 = close, ma20
+        self.last_date = date
+        self.last = snap
+        self.provisional = None
+        return snap
+
+    def preview(self, bar, date=None):
+        """Snapshot for a provisional bar; the committed state is left as is."""
+        close, delta = float(bar["Close"]), float(bar["Close"]) - self.prev_close
+        return self._snapshot(
+            bar, date, self.ma20.peek(close),
+            ma50=self.ma50.peek(close),
+            gain=self.gain.peek(delta if delta > 0 else 0.0),
+            loss=self.loss.peek(-delta if delta < 0 else 0.0),
+            avg_vol=self.avg_vol.peek(float(bar["Volume"])),
+            atr=self.atr.peek(float(bar["High"]) - float(bar["Low"])),
+        )
+
+    def tick(self, price, volume=None, date=None):
+        """Folds a live quote into today's provisional bar and re-scores it."""
+        date = pd.Timestamp(date or datetime.date.today()).normalize()
+        bar = self.provisional
+        if bar is None or bar["Date"] != date:
+            bar = {"Date": date, "Open": price, "High": price, "Low": price, "Close": price, "Volume": NAN}
+        bar["High"] = max(bar["High"], price)
+        bar["Low"] = min(bar["Low"], price)
+        bar["Close"] = price
+        if volume is not None:
+            bar["Volume"] = float(volume)
+        self.provisional = bar
+        return self.preview(bar, date)
+
+    def _snapshot(self, bar, date, ma20, ma50, gain, loss, avg_vol, atr):
+        close, open_, volume = float(bar["Close"]), float(bar["Open"]), float(bar["Volume"])
+        rsi = _rsi(gain, loss)
+        rvol = _div(volume, avg_vol)
+
+        # Same precedence as apply_strategy: later setups override earlier ones
+        setup = "None"
+        if rsi < RSI_OVERSOLD:
+            setup = "OVERSOLD_DIP"
+        if rvol > RVOL_BREAKOUT and close > open_ and close > ma20:
+            setup = "MOMENTUM_BREAK"
+        if close > ma20 and self.prev_close < self.prev_ma20:
+            setup = "TREND_RECLAIM"
+
+        return {
+            "Date": date, "Close": close, "Open": open_, "High": float(bar["High"]), "Low": float(bar["Low"]),
+            "Volume": volume, "MA20": ma20, "MA50": ma50, "RSI": rsi, "AvgVol": avg_vol, "RVOL": rvol,
+            "ATR": atr, "Setup": setup,
+        }
+
+    # --- Persistence ---
+    def to_dict(self):
+        return {
+            "ticker": self.ticker,
+            "windows": {name: list(getattr(self, name).buf) for name in ["ma20", "ma50", "gain", "loss", "avg_vol", "atr"]},
+            "prev_close": self.prev_close,
+            "prev_ma20": self.prev_ma20,
+            "last_date": self.last_date.strftime("%Y-%m-%d") if self.last_date is not None else None,
+            "last": {k: (v.strftime("%Y-%m-%d") if k == "Date" and v is not None else v) for k, v in (self.last or {}).items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        state = cls(d["ticker"])
+        for name, values in d["windows"].items():
+            setattr(state, name, RollingMean.restore(getattr(state, name).window, values))
+        state.prev_close = d["prev_close"]
+        state.prev_ma20 = d["prev_ma20"]
+        state.last_date = pd.Timestamp(d["last_date"]) if d.get("last_date") else None
+        state.last = dict(d["last"]) or None
+        if state.last and state.last.get("Date"):
+            state.last["Date"] = pd.Timestamp(state.last["Date"])
+        return state
+
+
+class IndicatorBook:
+    """Per-ticker IncrementalIndicators that survive restarts via a JSON state file."""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.states = {}
+        self.saved_at = None
+
+    def __contains__(self, ticker):
+        return ticker in self.states
+
+    def __getitem__(self, ticker):
+        return self.states[ticker]
+
+    def seed(self, ticker, df):
+        state = IncrementalIndicators(ticker)
+        state.seed(df)
+        self.states[ticker] = state
+        return state
+
+    def snapshot_frame(self):
+        """Last committed bar per ticker, shaped like indicator_engine.latest_rows()."""
+        rows = {t: s.last for t, s in self.states.items() if s.last}
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis("Ticker")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+            self.states = {t: IncrementalIndicators.from_dict(d) for t, d in raw.get("states", {}).items()}
+            self.saved_at = datetime.datetime.fromisoformat(raw["saved_at"]) if raw.get("saved_at") else None
+        except Exception as e:
+            print(f"⚠️ Indicator State Load Error: {e}")
+        return self
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"saved_at": datetime.datetime.now().isoformat(), "states": {t: s.to_dict() for t, s in self.states.items()}}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _rsi(gain, loss):
+    # 100 - 100 / (1 + gain/loss) with numpy's float semantics (x/0 -> inf, 0/0 -> NaN)
+    if math.isnan(gain) or math.isnan(loss):
+        return NAN
+    if loss == 0:
+        return NAN if gain == 0 else 100.0
+    return 100 - (100 / (1 + gain / loss))
+
+
+def _div(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return NAN
+    if b == 0:
+        return NAN if a == 0 else math.copysign(math.inf, a)
+    return a / b
+
+
+if __name__ == "__main__":
+    # Equivalence check vs apply_strategy, then per-update cost (offline)
+    import time
+    import numpy as np
+    from backtester import SilentBacktester
+    from synthetic_data import make_ohlcv
+
+    df = make_ohlcv("LIVE", "2023-01-01", "2025-01-01")
+    bot = SilentBacktester("LIVE", "2023-01-01", "2025-01-01")
+    bot.data = df
+    bot.apply_strategy()
+
+    state = IncrementalIndicators("LIVE")
+    snaps = pd.DataFrame([state.update(row, date) for date, row in df.iterrows()]).set_index("Date")
+    worst = max(np.nanmax(np.abs(snaps[k].to_numpy() - bot.data[k].to_numpy())) for k in ["MA20", "MA50", "RSI", "RVOL", "ATR"])
+    mismatches = int((snaps["Setup"].to_numpy() != bot.data["Setup"].to_numpy()).sum())
+    print(f"Seeded {len(df)} bars | max abs diff {worst:.2e} | setup mismatches {mismatches}")
+
+    restored = IncrementalIndicators.from_dict(json.loads(json.dumps(state.to_dict())))
+    print(f"Round-trip through JSON keeps the last snapshot: {restored.last['RSI'] == state.last['RSI']}")
+
+    t0 = time.perf_counter()
+    n = 100_000
+    for i in range(n):
+        state.tick(100 + (i % 50) * 0.1)
+    print(f"Provisional tick re-score: {(time.perf_counter() - t0) / n * 1e6:.1f} µs per quote")
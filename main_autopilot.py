@@ -1,65 +1,36 @@
-import pandas as pd
 import datetime
-import time
-from backtester import SilentBacktester
+from universe_loader import UniverseLoader
+from indicator_engine import build_panel, evaluate_latest
 from alpaca_manager import AlpacaExecutor
-import requests
-from io import StringIO
 from notifier import send_msg
+from universe import get_universe
+import tracing
+from tracing import span, count
+from overnight_pipeline import morning_scan
+from backtester import RSI_OVERSOLD, RVOL_BREAKOUT
 
 # --- CONFIGURATION ---
 MAX_DAILY_TRADES = 4           
 ALLOCATION_PER_TRADE = 0.10    
 
-def get_market_universe():
-    special_assets = ["BTC-USD", "ETH-USD", "GLD", "SLV", "USO", "UNG", "TLT", "VIXY"]
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        resp = requests.get('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies', headers=headers)
-        table = pd.read_html(StringIO(resp.text))
-        sp500 = [t.replace('.', '-') for t in table[0]['Symbol'].tolist()]
-        return list(set(sp500 + special_assets))
-    except Exception as e:
-        print(f"⚠️ Wikipedia Scraping Failed: {e}")
-        return special_assets + ["SPY", "QQQ", "NVDA", "TSLA", "AAPL", "AMD", "AMZN", "MSFT", "GOOGL"]
-
-def run_autopilot():
-    start_time = datetime.datetime.now()
-    send_msg("🔍 **MORNING SCAN STARTING**\nSearching 500+ tickers for Momentum and Panic setups...")
-    
-    executor = AlpacaExecutor()
-    if executor.get_buying_power() < 500:
-        send_msg("⛔ **Scan Aborted:** Insufficient funds in Alpaca account.")
-        return
-
-    universe = get_market_universe()
+def select_targets(latest):
+    """Ranks the scan's last-bar snapshot (one row per ticker) into today's targets."""
     momentum_candidates = []
     panic_candidates = []
-    
-    for ticker in universe:
-        try:
-            bot = SilentBacktester(ticker, 
-                                 (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%d'),
-                                   datetime.datetime.now().strftime('%Y-%m-%d'))
-            bot.fetch_data()
-            bot.apply_strategy()
-            if bot.data.empty: continue
-            
-            last = bot.data.iloc[-1]
-            trade_package = {
-                'ticker': ticker,
-                'rvol': last.get('RVOL', 0),
-                'rsi': last['RSI'],
-                'close': last['Close'],
-                'stop_price': last['Close'] - (last['ATR'] * 2.0)
-            }
-            
-            if last['RVOL'] > 1.5 and last['Close'] > last['MA20']:
-                momentum_candidates.append(trade_package)
-            elif last['RSI'] < 35:
-                panic_candidates.append(trade_package)
-        except:
-            continue
+
+    for ticker, last in latest.iterrows():
+        trade_package = {
+            'ticker': ticker,
+            'rvol': last.get('RVOL', 0),
+            'rsi': last['RSI'],
+            'close': last['Close'],
+            'stop_price': last['Close'] - (last['ATR'] * 2.0)
+        }
+        
+        if last['RVOL'] > RVOL_BREAKOUT and last['Close'] > last['MA20']:
+            momentum_candidates.append(trade_package)
+        elif last['RSI'] < RSI_OVERSOLD:
+            panic_candidates.append(trade_package)
             
     momentum_candidates.sort(key=lambda x: x['rvol'], reverse=True)
     panic_candidates.sort(key=lambda x: x['rsi']) 
@@ -71,6 +42,46 @@ def run_autopilot():
         if trade['ticker'] not in seen and len(final_targets) < MAX_DAILY_TRADES:
             final_targets.append(trade)
             seen.add(trade['ticker'])
+    return final_targets
+
+def run_autopilot():
+    # Timings per stage go to metrics.jsonl when SWING_TRACE=1 (dashboard: Latency tab)
+    with tracing.run("autopilot"):
+        _run_autopilot()
+
+def _run_autopilot():
+    start_time = datetime.datetime.now()
+    send_msg("🔍 **MORNING SCAN STARTING**\nSearching 500+ tickers for Momentum and Panic setups...")
+    
+    with span("autopilot.broker_check"):
+        executor = AlpacaExecutor()
+        buying_power = executor.get_buying_power()
+    if buying_power < 500:
+        send_msg("⛔ **Scan Aborted:** Insufficient funds in Alpaca account.")
+        return
+
+    with span("autopilot.universe"):
+        universe = get_universe()  # S&P 500 snapshot + EXTRA_ASSETS
+
+    # Fast path: last night's precomputed state already scores the last completed session (overnight_pipeline.py)
+    with span("autopilot.morning_scan"):
+        latest = morning_scan(universe)
+    if latest is None:
+        start_date = (datetime.datetime.now() - datetime.timedelta(days=60)).strftime('%Y-%m-%d')
+        end_date = datetime.datetime.now().strftime('%Y-%m-%d')  # Exclusive: today's partial bar isn't scored
+        with span("autopilot.fetch"):
+            loader = UniverseLoader()
+            universe_data = loader.load(universe, start_date, end_date)
+        loader.report()
+
+        # Tail-only vectorized pass: score each ticker's last bar for the whole universe
+        with span("autopilot.indicators"):
+            panel = build_panel(universe_data)
+            latest = evaluate_latest(panel, start_date)
+    with span("autopilot.ranking"):
+        final_targets = select_targets(latest)
+    count("autopilot.candidates", len(latest))
+    count("autopilot.targets", len(final_targets))
     
     if not final_targets:
         send_msg("✅ **SCAN COMPLETE**\nNo high-probability setups found today.")
@@ -78,26 +89,22 @@ def run_autopilot():
     
     send_msg(f"🎯 **TARGETS FOUND:** {', '.join([t['ticker'] for t in final_targets])}\nPreparing execution...")
 
-    for trade in final_targets:
-        ticker = trade['ticker']
-        stop = trade['stop_price']
-        
-        if ticker in executor.get_current_positions():
-            continue
+    # One account snapshot, all orders sized together and submitted concurrently
+    with span("autopilot.execute"):
+        result = executor.execute_batch(final_targets, allocation_pct=ALLOCATION_PER_TRADE)
+    count("autopilot.orders_placed", len(result['placed']))
+    count("autopilot.orders_failed", len(result['failed']))
 
-        if ticker in executor.get_pending_buy_symbols():
-            continue
-            
-        executor.execute_buy(ticker, stop_price=stop, allocation_pct=ALLOCATION_PER_TRADE)
-        
+    for trade in result['placed']:
         alert_msg = (
-            f"🚀 **EXECUTED: {ticker}**\n"
+            f"🚀 **EXECUTED: {trade['ticker']}**\n"
             f"💰 Price: ~${trade['close']:.2f}\n"
-            f"🛑 Stop Loss: ${stop:.2f}\n"
-            f"📊 Strategy: {'Momentum' if trade['rvol'] > 1.5 else 'Panic Dip'}"
+            f"🛑 Stop Loss: ${trade['stop_price']:.2f}\n"
+            f"📊 Strategy: {'Momentum' if trade['rvol'] > RVOL_BREAKOUT else 'Panic Dip'}"
         )
         send_msg(alert_msg)
-        time.sleep(1)
+    for trade in result['failed']:
+        send_msg(f"❌ **ORDER FAILED: {trade['ticker']}**\n{trade['error'] or 'Not found at broker'}")
 
     print("✅ Autopilot Cycle Complete.")
 
@@ -0,0 +1,192 @@
+import os
+import sys
+import glob
+import json
+import time
+import numpy as np
+import pandas as pd
+
+# How much of the backtest result is luck? Resamples the trades from every
+# *_trade_log.csv into many alternative sequences and reports the spread of
+# final equity, max drawdown and longest losing streak. Paths are generated in
+# chunks of a fixed element budget, so memory stays flat no matter how many
+# paths (or how many trades per path) are requested.
+#
+#   bootstrap: draw trades with replacement (different trade mix per path)
+#   shuffle:   same trades in a random order (final equity is identical for
+#              every order; drawdown and streaks are what change)
+
+# --- CONFIGURATION ---
+TRADE_LOG_GLOB = "*_trade_log.csv"
+RESULT_FILE = "monte_carlo.npz"
+N_PATHS = 100_000
+CHUNK_ELEMENTS = 4_000_000  # Path x trade cells per batch (memory ~ CHUNK_ELEMENTS x 8 bytes x a few arrays)
+START_CAPITAL = 10000
+ALLOC_PCT = 0.20         # Share of equity in each trade (new_logic_simulation's PCT_PER_TRADE)
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+METHODS = ("bootstrap", "shuffle")
+
+
+def load_trade_logs(pattern=TRADE_LOG_GLOB):
+    """All trade logs as one frame in exit order, with PnL as a fraction."""
+    frames = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            frames.append(pd.read_csv(path, parse_dates=["Entry_Date", "Exit_Date"]))
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+    if not frames:
+        return pd.DataFrame(columns=["Ticker", "Entry_Date", "Exit_Date", "PnL_Pct", "PnL"])
+    trades = pd.concat(frames, ignore_index=True).dropna(subset=["PnL_Pct"])
+    trades["PnL"] = trades["PnL_Pct"] / 100
+    return trades.sort_values(["Exit_Date", "Ticker"], kind="stable").reset_index(drop=True)
+
+
+def path_stats(pnl, alloc_pct=ALLOC_PCT, start_capital=START_CAPITAL):
+    """(paths x trades) PnL fractions -> final equity, max drawdown (fraction) and longest losing streak per path."""
+    equity = np.cumprod(1 + alloc_pct * pnl, axis=1)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)  # The starting balance counts as a peak
+    drawdown = (equity / peak - 1).min(axis=1)
+
+    # Run length of losses: trades so far minus the count at the last win
+    losses = np.cumsum(pnl < 0, axis=1)
+    at_last_win = np.maximum.accumulate(np.where(pnl < 0, 0, losses), axis=1)
+    streak = (losses - at_last_win).max(axis=1)
+    return start_capital * equity[:, -1], drawdown, streak
+
+
+def simulate(pnl, method="bootstrap", n_paths=N_PATHS, n_trades=None, alloc_pct=ALLOC_PCT,
+             start_capital=START_CAPITAL, chunk=None, seed=0):
+    """{final_equity, max_drawdown, losing_streak} arrays over n_paths resampled trade sequences.
+
+    `chunk` is the number of paths per batch; by default it is sized from
+    CHUNK_ELEMENTS, so longer paths mean fewer of them at a time.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r} (use one of {METHODS})")
+    pnl = np.asarray(pnl, dtype=float)
+    n_trades = n_trades or len(pnl)
+    if method == "shuffle" and n_trades != len(pnl):
+        raise ValueError("shuffle reorders the actual trades, so n_trades must equal their count")
+    chunk = chunk or max(1, CHUNK_ELEMENTS // n_trades)
+    rng = np.random.default_rng(seed)
+    final = np.empty(n_paths, dtype=np.float32)
+    drawdown = np.empty(n_paths, dtype=np.float32)
+    streak = np.empty(n_paths, dtype=np.int32)
+
+    for lo in range(0, n_paths, chunk):
+        size = min(chunk, n_paths - lo)
+        if method == "bootstrap":
+            picks = pnl[rng.integers(0, len(pnl), (size, n_trades))]
+        else:
+            picks = rng.permuted(np.broadcast_to(pnl, (size, n_trades)), axis=1)
+        final[lo:lo + size], drawdown[lo:lo + size], streak[lo:lo + size] = path_stats(picks, alloc_pct, start_capital)
+    return {"final_equity": final, "max_drawdown": drawdown, "losing_streak": streak}
+
+
+def percentile_table(result, start_capital=START_CAPITAL, percentiles=PERCENTILES):
+    """One row per percentile: final equity, return %, max drawdown % and longest losing streak."""
+    q = np.asarray(percentiles)
+    # Drawdowns are negative, so they're ranked by depth: like the streaks, P99 is a bad case (for equity it's P1)
+    table = pd.DataFrame({
+        "Final Equity": np.percentile(result["final_equity"], q),
+        "Return %": (np.percentile(result["final_equity"], q) / start_capital - 1) * 100,
+        "Max Drawdown %": np.percentile(result["max_drawdown"], 100 - q) * 100,
+        "Losing Streak": np.percentile(result["losing_streak"], q),
+    }, index=pd.Index([f"P{p}" for p in percentiles], name="Percentile"))
+    return table
+
+
+def run(pattern=TRADE_LOG_GLOB, n_paths=N_PATHS, n_trades=None, alloc_pct=ALLOC_PCT,
+        start_capital=START_CAPITAL, seed=0, result_file=RESULT_FILE):
+    """Both methods over every trade log; saves the per-path results + tables to one .npz."""
+    trades = load_trade_logs(pattern)
+    if trades.empty:
+        print(f"❌ No trade logs match {pattern}")
+        return None
+    pnl = trades["PnL"].to_numpy()
+    actual = {k: v[0] for k, v in zip(["final_equity", "max_drawdown", "losing_streak"],
+                                        path_stats(pnl[None, :], alloc_pct, start_capital))}
+    results, tables = {}, {}
+    for method in METHODS:
+        if method == "shuffle" and n_trades and n_trades != len(pnl):
+            continue
+        t0 = time.perf_counter()
+        results[method] = simulate(pnl, method, n_paths, n_trades, alloc_pct, start_capital, seed=seed)
+        tables[method] = percentile_table(results[method], start_capital)
+        print(f"🎲 {method}: {n_paths:,} paths x {n_trades or len(pnl)} trades in {time.perf_counter() - t0:.2f}s")
+
+    meta = {"created": pd.Timestamp.now().isoformat(timespec="seconds"), "trades": len(pnl),
+            "tickers": sorted(trades["Ticker"].unique().tolist()), "paths": n_paths,
+            "path_trades": n_trades or len(pnl), "alloc_pct": alloc_pct, "start_capital": start_capital,
+            "seed": seed, "actual": {k: float(v) for k, v in actual.items()}}
+    if result_file:
+        save_results(result_file, results, tables, meta)
+    return results, tables, meta
+
+
+def save_results(path, results, tables, meta):
+    """Compact binary file: float32/int32 per-path arrays, the percentile tables and a JSON header."""
+    arrays = {f"{m}.{k}": v for m, r in results.items() for k, v in r.items()}
+    arrays.update({f"{m}.table": t.to_numpy(dtype=np.float64) for m, t in tables.items()})
+    meta = {**meta, "percentiles": list(tables[next(iter(tables))].index), "columns": list(next(iter(tables.values())).columns)}
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(tmp_path, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_results(path=RESULT_FILE):
+    """(meta, {method: table}, {method: {metric: array}}) from save_results(), or None if missing."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        meta = json.loads(data["meta"].tobytes())
+        results, tables = {}, {}
+        for key in data.files:
+            if key == "meta":
+                continue
+            method, name = key.split(".", 1)
+            if name == "table":
+                tables[method] = pd.DataFrame(data[key], index=pd.Index(meta["percentiles"], name="Percentile"),
+                                              columns=meta["columns"])
+            else:
+                results.setdefault(method, {})[name] = data[key]
+    return meta, tables, results
+
+
+if __name__ == "__main__":
+    # python monte_carlo.py [N_PATHS] [--trades N]  -> every *_trade_log.csv, saved to monte_carlo.npz
+    # python monte_carlo.py --demo                  -> also times 1M paths (peak memory)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    n_trades = int(sys.argv[sys.argv.index("--trades") + 1]) if "--trades" in sys.argv else None
+    if n_trades:
+        args.remove(str(n_trades))
+    n_paths = int(args[0]) if args else N_PATHS
+
+    out = run(n_paths=n_paths, n_trades=n_trades)
+    if out is None:
+        sys.exit(1)
+    results, tables, meta = out
+    a = meta["actual"]
+    print(f"--- MONTE CARLO: {meta['trades']} trades from {len(meta['tickers'])} logs | {ALLOC_PCT:.0%} of equity per trade ---")
+    print(f"Actual sequence: equity ${a['final_equity']:,.0f} | max DD {a['max_drawdown'] * 100:.1f}% | "
+          f"longest losing streak {a['losing_streak']:.0f}")
+    for method, table in tables.items():
+        print(f"\n{method} (worse outcomes at P1 for equity, at P99 for drawdown/streak):")
+        print(table.round(1).to_string())
+        r = results[method]
+        print(f"P(loss) {np.mean(r['final_equity'] < START_CAPITAL) * 100:.1f}% | "
+              f"actual drawdown worse than {np.mean(r['max_drawdown'] > a['max_drawdown']) * 100:.0f}% of paths")
+    print(f"\n✅ Saved {RESULT_FILE} ({os.path.getsize(RESULT_FILE) / 1e6:.1f} MB)")
+
+    if "--demo" in sys.argv:
+        import tracemalloc
+        pnl = load_trade_logs()["PnL"].to_numpy()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        simulate(pnl, n_paths=1_000_000)
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"1,000,000 bootstrap paths x {len(pnl)} trades: {elapsed:.1f}s | peak {peak / 1e6:.0f} MB "
+              f"(outputs alone are {1_000_000 * 12 / 1e6:.0f} MB)")
@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from backtester import SilentBacktester
+from universe_loader import UniverseLoader
+from indicator_engine import build_panel, compute_indicators
+from simulation_engine import run_portfolio, triple_threat_rules
 
 # --- SIMULATION SETTINGS ---
 # A basket of liquid leaders representing the "Active Trader" universe
@@ -21,99 +23,20 @@ def run_simulation():
     
     # 1. Pre-fetch Data
     print("Fetching historical data (this takes ~30s)...")
-    market_data = {}
+    frames = UniverseLoader().load(UNIVERSE, "2024-01-01", "2025-12-18")
     for ticker in UNIVERSE:
-        try:
-            # Fetch 2024-2025 Data
-            bot = SilentBacktester(ticker, "2024-01-01", "2025-12-18")
-            bot.fetch_data()
-            bot.apply_strategy()
-            market_data[ticker] = bot.data
-        except:
+        if ticker not in frames:
             print(f"Skipping {ticker} (Data Error)")
-            
-    # Get common timeline
-    timeline = market_data["SPY"].index
-    
-    # 2. Portfolio Loop
-    cash = START_CAPITAL
-    positions = {} # {ticker: {'shares': 0, 'stop': 0, 'type': ''}}
-    equity_curve = []
-    trade_log = []
-
-    for date in timeline:
-        # A. Mark-to-Market & Check Exits
-        current_equity = cash
-        active_tickers = list(positions.keys())
-        
-        for ticker in active_tickers:
-            if date not in market_data[ticker].index: continue
-            
-            row = market_data[ticker].loc[date]
-            price = row['Close']
-            pos = positions[ticker]
-            
-            # Trailing Stop Update (Only move UP)
-            new_stop = price - (row['ATR'] * 2.0)
-            pos['stop'] = max(pos['stop'], new_stop)
-            
-            # VALUE UPDATE
-            current_equity += pos['shares'] * price
-            
-            # EXIT TRIGGER: Price hits stop
-            if row['Low'] <= pos['stop']:
-                # Sell
-                exit_price = pos['stop'] # Assume slippage/stop hit
-                cash += pos['shares'] * exit_price
-                
-                # Log Trade
-                pnl = (exit_price - pos['entry']) / pos['entry']
-                trade_log.append({'Ticker': ticker, 'Type': pos['type'], 'PnL': pnl})
-                
-                del positions[ticker]
-
-        # B. Check Entries (If we have slots open)
-        if len(positions) < MAX_POSITIONS:
-            # Gather all valid signals for today
-            candidates = []
-            for ticker in UNIVERSE:
-                if ticker in positions: continue
-                if date not in market_data[ticker].index: continue
-                
-                row = market_data[ticker].loc[date]
-                if row['Setup'] != 'None':
-                    candidates.append({
-                        'ticker': ticker,
-                        'setup': row['Setup'],
-                        'price': row['Close'],
-                        'atr': row['ATR'],
-                        'rsi': row['RSI']
-                    })
-            
-            # RANKING: Prioritize "Momentum" first, then "Reclaims", then "Dips"
-            # Sort by Setup priority is hard, so let's just pick based on availability
-            # Or sort by RSI (Lower = Better Dip, Higher = Better Momentum? Mixed bag.)
-            # Simple approach: Sort by highest Volume (if we had it), or just alphabetical.
-            # Let's simple sort by RSI for Dips, or random.
-            # Professional Move: We buy the first ones found because our Universe is already "High Quality"
-            
-            for trade in candidates:
-                if len(positions) >= MAX_POSITIONS: break
-                
-                # Sizing
-                target_size = current_equity * PCT_PER_TRADE
-                if cash > target_size:
-                    shares = int(target_size // trade['price'])
-                    if shares > 0:
-                        cash -= shares * trade['price']
-                        positions[trade['ticker']] = {
-                            'shares': shares,
-                            'entry': trade['price'],
-                            'stop': trade['price'] - (trade['atr'] * 2.0),
-                            'type': trade['setup']
-                        }
+    panel = build_panel(frames)
+    indicators = compute_indicators(panel)
 
-        equity_curve.append(current_equity)
+    # 2. Portfolio Loop (array engine; candidates are taken in universe order)
+    rules = triple_threat_rules(max_positions=MAX_POSITIONS, alloc_pct=PCT_PER_TRADE, stop_atr_mult=2.0)
+    result = run_portfolio(panel, indicators, rules, start_capital=START_CAPITAL,
+                           start_date="2024-01-01", calendar_ticker="SPY")
+    timeline = result.equity.index
+    equity_curve = result.equity.to_numpy()
+    trade_log = result.trades
 
     # 3. Final Report
     final_val = equity_curve[-1]
@@ -124,8 +47,8 @@ def run_simulation():
     print(f"Ending Capital:   ${final_val:.2f}")
     print(f"Total Return:     {ret:.2f}%")
     
-    if trade_log:
-        df_log = pd.DataFrame(trade_log)
+    if not trade_log.empty:
+        df_log = trade_log
         win_rate = (df_log['PnL'] > 0).mean() * 100
         print(f"Total Trades:     {len(df_log)}")
         print(f"Win Rate:         {win_rate:.1f}%")
@@ -135,7 +58,7 @@ def run_simulation():
     # Plot
     plt.figure(figsize=(10, 6))
     plt.plot(timeline, equity_curve, label='Triple Threat Strategy')
-    plt.title(f"Walk-Forward: Triple Threat Strategy (+{ret:.1f}%)")
+    plt.title(f"In-Sample: Triple Threat Strategy (+{ret:.1f}%)")
     plt.ylabel("Account Equity ($)")
     plt.legend()
     plt.grid(True)
@@ -1,8 +1,15 @@
 import os
+import time
+import html
+import queue
+import atexit
+import threading
 import telebot
 import requests
 import datetime
 from dotenv import load_dotenv
+from rate_limit import RateLimiter
+from tracing import traced
 
 # Path logic for server-side reliability
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -10,20 +17,184 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# --- CONFIGURATION ---
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")  # Point at a stand-in for tests
+QUEUE_SIZE = 1000          # Pending alerts; when full the oldest is dropped (callers never block)
+COALESCE_SECONDS = 0.5     # After the first alert, gather whatever else arrives this fast into one message
+MAX_MESSAGE_CHARS = 4096   # Telegram's per-message limit
+MESSAGES_PER_SECOND = 1    # Telegram: about one message per second per chat
+MAX_BACKOFF = 60           # Seconds between retries of a failing send, at most
+FLUSH_TIMEOUT = 15         # Seconds spent delivering leftovers at shutdown
+
+
+class TelegramDispatcher:
+    """Sends alerts from a background thread over one keep-alive session.
+
+    send() only enqueues. The worker coalesces bursts into one message, stays
+    under Telegram's rate limit (honouring retry_after on 429) and retries
+    network / 5xx errors with backoff until the message goes through.
+    """
+
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL, queue_size=QUEUE_SIZE,
+                 coalesce_seconds=COALESCE_SECONDS, limiter=None, session=None):
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.coalesce_seconds = coalesce_seconds
+        self.limiter = limiter or RateLimiter(rate=MESSAGES_PER_SECOND, per=1.0, burst=1)
+        self.session = session or requests.Session()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"queued": 0, "sent": 0, "posts": 0, "retries": 0, "dropped": 0}
+        self._pending = 0          # Alerts queued or being sent
+        self._idle = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def send(self, message):
+        """Enqueues an alert and returns immediately."""
+        if self._thread is None:
+            self._start()
+        with self._idle:
+            self._pending += 1
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                break
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()  # Oldest alert loses its place
+                    self._done(1)
+                    self.stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+        self.stats["queued"] += 1
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Blocks until everything queued so far is delivered (or timeout); returns True if drained."""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    print(f"⚠️ Telegram: {self._pending} alert(s) still undelivered at shutdown")
+                    return False
+                self._idle.wait(left)
+        return True
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)  # Deliver leftovers before the process exits
+
+    def _done(self, n):
+        with self._idle:
+            self._pending -= n
+            if self._pending <= 0:
+                self._idle.notify_all()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Coalesce the burst (e.g. a round of PROFIT LOCKED alerts) into as few messages as fit
+            deadline = time.monotonic() + self.coalesce_seconds
+            while True:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=left))
+                except queue.Empty:
+                    break
+            for text, count in _pack(batch):
+                self._deliver(text)
+                self._done(count)
+
+    @traced("notifier.deliver")
+    def _deliver(self, text):
+        backoff = 1
+        while True:
+            self.limiter.acquire()
+            self.stats["posts"] += 1
+            try:
+                r = self.session.post(self.url, data={"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}, timeout=10)
+                if r.status_code == 200:
+                    self.stats["sent"] += 1
+                    return
+                if r.status_code == 429:
+                    retry_after = _retry_after(r) or backoff
+                    print(f"⚠️ Telegram rate limited, retrying in {retry_after}s")
+                    time.sleep(retry_after)
+                    self.stats["retries"] += 1
+                    continue
+                if r.status_code < 500:
+                    # Bad token / chat id / markup: retrying won't help
+                    print(f"⚠️ Telegram Error {r.status_code}: {r.text[:200]}")
+                    return
+                error = f"HTTP {r.status_code}"
+            except Exception as e:
+                error = e
+            print(f"⚠️ Telegram Error: {error} (retrying in {backoff}s)")
+            self.stats["retries"] += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+
+def _pack(messages):
+    """Joins messages into [(text, n_messages)] chunks that fit MAX_MESSAGE_CHARS.
+
+    Each message is HTML-escaped first: one stray '<' or '&' (e.g. exception text in
+    an ORDER FAILED alert) would otherwise get the whole coalesced batch rejected.
+    """
+    chunks, current, count = [], "", 0
+    for message in messages:
+        message = _escape(message)
+        if current and len(current) + 2 + len(message) > MAX_MESSAGE_CHARS:
+            chunks.append((current, count))
+            current, count = "", 0
+        current = f"{current}\n\n{message}" if current else message
+        count += 1
+    if current:
+        chunks.append((current, count))
+    return chunks
+
+
+def _escape(message):
+    text = html.escape(message, quote=False)[:MAX_MESSAGE_CHARS]
+    # Don't leave half an entity behind when the cut lands inside one
+    amp = text.rfind("&")
+    if amp > text.rfind(";"):
+        text = text[:amp]
+    return text
+
+
+def _retry_after(response):
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        return None
+
+
+_DISPATCHER = None
+
+
+def get_dispatcher():
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        _DISPATCHER = TelegramDispatcher(TOKEN, CHAT_ID)
+    return _DISPATCHER
+
+
+@traced("notifier.send_msg")
 def send_msg(message):
-    """Standard outbound alerts used by Autopilot, Monitor, and Boot Alert."""
+    """Standard outbound alerts used by Autopilot, Monitor, and Boot Alert (queued, never blocks)."""
     if not TOKEN or not CHAT_ID:
         print(f"🚫 Alert Skipped (No Keys): {message}")
         return
-    
-    url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
-    data = {"chat_id": CHAT_ID, "text": message, "parse_mode": "HTML"}
-    try:
-        requests.post(url, data=data, timeout=10)
-    except Exception as e:
-        print(f"⚠️ Telegram Error: {e}")
+    get_dispatcher().send(message)
 
 # Command handlers for interacting with your bot from your phone
+bot = None
 if TOKEN:
     bot = telebot.TeleBot(TOKEN)
     
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import mmap
+import atexit
+import tempfile
+import numpy as np
+import pandas as pd
+from indicator_engine import FIELDS, PricePanel
+
+# One file holds an aligned (dates x tickers) universe: a small JSON header,
+# then every array at a page-aligned offset. Processes map the file read-only
+# and build PricePanels straight on top of it, so N workers share the OS page
+# cache instead of each unpickling its own copy. Under /dev/shm the file is a
+# plain shared-memory block.
+
+# --- CONFIGURATION ---
+PANEL_DIR = os.getenv("PANEL_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+MAGIC = b"SWPANEL1"
+ALIGN = 4096
+
+_TEMP_FILES = []
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def save_panel(panel, path, arrays=None, timeframe="1d"):
+    """Writes a PricePanel plus optional extra (dates x tickers) arrays (e.g. indicators) to one file."""
+    named = {"dates": panel.dates.to_numpy(dtype="datetime64[ns]").view(np.int64), "mask": panel.mask}
+    named.update({f: panel[f] for f in FIELDS})
+    named.update({f"ind.{k}": v for k, v in (arrays or {}).items()})
+
+    layout, offset = {}, 0
+    for name, arr in named.items():
+        arr = np.asarray(arr)
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = _aligned(offset + arr.nbytes)
+    header = json.dumps({"version": 1, "timeframe": timeframe, "tickers": panel.tickers, "arrays": layout}).encode()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        for name, arr in named.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(arr).data)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return path
+
+
+class PanelStore:
+    """Read-only, zero-copy view of a saved panel.
+
+    Pickles as its path, so handing one to a worker process costs a few bytes;
+    the worker re-maps the file on arrival.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a panel file")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data_start = _aligned(len(MAGIC) + 8 + header_len)
+        self.timeframe = header["timeframe"]
+        self.tickers = header["tickers"]
+        self.column = {t: j for j, t in enumerate(self.tickers)}
+        self._views = {}
+        for name, spec in header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            count = int(np.prod(shape))
+            self._views[name] = np.frombuffer(self._map, dtype, count, data_start + spec["offset"]).reshape(shape)
+
+        self.dates = pd.DatetimeIndex(self._views["dates"].view("datetime64[ns]"), name="Date")
+        self.panel = PricePanel(self.dates, self.tickers, {f: self._views[f] for f in FIELDS}, self._views["mask"])
+        self.panel.store = self
+        self.arrays = {name[4:]: v for name, v in self._views.items() if name.startswith("ind.")}
+
+    def __reduce__(self):
+        return (PanelStore, (self.path,))
+
+    @property
+    def nbytes(self):
+        return len(self._map)
+
+    def frame(self, ticker, timeframe=None, start=None, end=None):
+        """One ticker's bars as a provider-style OHLCV DataFrame (SilentBacktester's `bars=`), end exclusive."""
+        if timeframe not in (None, self.timeframe):
+            raise ValueError(f"{self.path} holds {self.timeframe} bars, not {timeframe}")
+        j = self.column[ticker]
+        lo, hi = self._rows(start, end)
+        rows = lo + np.flatnonzero(self._views["mask"][lo:hi, j])
+        return pd.DataFrame({f: self._views[f][rows, j] for f in ["Close", "High", "Low", "Open", "Volume"]},
+                            index=self.dates[rows])
+
+    def slice(self, tickers=None, start=None, end=None):
+        """PricePanel for a block of tickers and dates (only that block is copied into memory)."""
+        lo, hi = self._rows(start, end)
+        cols = [self.column[t] for t in tickers] if tickers is not None else slice(None)
+        names = self.tickers if tickers is None else list(tickers)
+        return PricePanel(self.dates[lo:hi], names, {f: self._views[f][lo:hi, cols] for f in FIELDS},
+                          self._views["mask"][lo:hi, cols])
+
+    def _rows(self, start, end):
+        lo = self.dates.searchsorted(pd.Timestamp(start)) if start is not None else 0
+        hi = self.dates.searchsorted(pd.Timestamp(end)) if end is not None else len(self.dates)
+        return lo, hi
+
+
+def share_panel(panel, arrays=None):
+    """PanelStore holding `panel` (+ arrays), written once to PANEL_DIR and reused.
+
+    Panels that already come from a store, or were shared before with the same
+    arrays, don't get written again. Files are removed when the process exits.
+    """
+    arrays = arrays or {}
+    store = getattr(panel, "store", None)
+    if store is not None and all(store.arrays.get(k) is v for k, v in arrays.items()):
+        return store
+    shared = getattr(panel, "_shared", None)
+    if shared is not None and shared[1].keys() == arrays.keys() and all(shared[1][k] is v for k, v in arrays.items()):
+        return shared[0]
+
+    fd, path = tempfile.mkstemp(prefix="panel_", suffix=".bin", dir=PANEL_DIR)
+    os.close(fd)
+    _TEMP_FILES.append(path)
+    store = PanelStore(save_panel(panel, path, arrays))
+    panel._shared = (store, dict(arrays))
+    return store
+
+
+@atexit.register
+def _cleanup():
+    for path in _TEMP_FILES:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _memory_mb():
+    """(private, shared) resident MB of this process, from /proc (Linux only)."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return private / 1024, shared / 1024
+
+
+def _scan_worker(store, tickers, start):
+    # Same loop as the SilentBacktester scanners, reading bars from the shared file
+    from backtester import SilentBacktester
+    setups = 0
+    for ticker in tickers:
+        bot = SilentBacktester(ticker, start, "2100-01-01", bars=store)
+        bot.fetch_data()
+        bot.apply_strategy()
+        setups += int((bot.data["Setup"] != "None").sum())
+    # Touch the whole panel once so every page counts toward the shared figure
+    np.nansum(store.panel["Close"])
+    return (setups, *_memory_mb())
+
+
+if __name__ == "__main__":
+    # python panel_store.py --demo  -> offline: 500 tickers x 20 years shared by spawned workers
+    if "--demo" not in sys.argv:
+        print("Usage: python panel_store.py --demo")
+        sys.exit(0)
+
+    import time
+    import pickle
+    import multiprocessing as mp
+    import param_sweep
+    from indicator_engine import build_panel, compute_indicators
+    from synthetic_data import make_ohlcv
+
+    frames = {f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2005-01-01", "2025-01-01", seed=i) for i in range(500)}
+    panel = build_panel(frames)
+    t0 = time.perf_counter()
+    store = share_panel(panel)
+    print(f"--- PANEL STORE: 500 tickers x {len(panel.dates)} days -> {store.nbytes / 1e6:.0f} MB file "
+          f"in {(time.perf_counter() - t0) * 1000:.0f} ms ({store.path}) ---")
+    print(f"Per-worker payload: PanelStore pickles to {len(pickle.dumps(store))} bytes "
+          f"vs {len(pickle.dumps(frames)) / 1e6:.0f} MB for the per-ticker DataFrames")
+
+    same = store.frame("SYN042").equals(frames["SYN042"].astype(float).rename_axis("Date"))
+    print(f"frame() matches the source DataFrame: {same}")
+
+    workers = 4
+    chunks = [list(frames)[k::workers] for k in range(workers)]
+    t0 = time.perf_counter()
+    with mp.get_context("spawn").Pool(workers) as pool:
+        results = pool.starmap(_scan_worker, [(store, chunk, "2006-01-01") for chunk in chunks])
+    print(f"{workers} spawned workers ran SilentBacktester over all 500 tickers in {time.perf_counter() - t0:.1f}s "
+          f"({sum(r[0] for r in results):,} setups)")
+    for k, (_, private, shared) in enumerate(results):
+        print(f"  worker {k}: {private:6.0f} MB private | {shared:6.0f} MB shared")
+
+    # Sweep workers under spawn attach to the same kind of file instead of unpickling the panel
+    ind = compute_indicators(panel)
+    grid = {"rsi_max": [30, 35], "stop_atr_mult": [2.0, 3.0]}
+    forked = param_sweep.run_sweep(panel, ind, grid, workers=2, start_date="2006-01-01", results_file=None)
+    param_sweep.START_METHOD = "spawn"
+    t0 = time.perf_counter()
+    spawned = param_sweep.run_sweep(panel, ind, grid, workers=2, start_date="2006-01-01", results_file=None)
+    cols = ["rsi_max", "stop_atr_mult", "total_return", "trades"]
+    print(f"Sweep via spawn + shared panel in {time.perf_counter() - t0:.1f}s | same results as fork: "
+          f"{forked[cols].equals(spawned[cols])}")
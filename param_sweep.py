@@ -0,0 +1,135 @@
+import os
+import time
+import itertools
+import multiprocessing as mp
+import pandas as pd
+from backtester import RSI_OVERSOLD, RVOL_BREAKOUT
+from indicator_engine import reclassify
+from panel_store import share_panel
+from simulation_engine import run_portfolio, triple_threat_rules
+
+# --- CONFIGURATION ---
+DEFAULT_GRID = {
+    "rsi_max": [30, 35, 40],           # OVERSOLD_DIP: RSI < x
+    "rvol_min": [1.5, 2.0],            # MOMENTUM_BREAK: RVOL > x
+    "stop_atr_mult": [2.0, 3.0, 4.0],  # Trailing stop = Close - x * ATR
+    "max_positions": [3, 5],
+    "alloc_pct": [0.10, 0.20],
+}
+RESULTS_FILE = "sweep_results.csv"
+SETUP_PARAMS = ("rsi_max", "rvol_min")  # Change the setups; everything else only changes the portfolio loop
+SETUP_CACHE_SIZE = 16                   # Reclassified setup arrays kept per worker
+START_METHOD = os.getenv("SWEEP_START_METHOD") or ("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+
+# Worker-side state. With the "fork" start method the parent sets these before
+# the pool starts and every worker reads the parent's arrays copy-on-write:
+# nothing is pickled per task. Under "spawn" every worker maps the same
+# panel_store file instead of unpickling its own copy.
+_PANEL = None
+_IND = None
+_SETUPS = {}
+
+
+def expand_grid(grid):
+    """{'param': [values]} -> list of param dicts, setup params varying slowest."""
+    keys = [k for k in SETUP_PARAMS if k in grid] + [k for k in grid if k not in SETUP_PARAMS]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def _init_worker(panel, ind):
+    global _PANEL, _IND, _SETUPS
+    _PANEL, _IND, _SETUPS = panel, ind, {}
+
+
+def _attach_worker(store):
+    _init_worker(store.panel, store.arrays)
+
+
+def _setups_for(rsi_max, rvol_min):
+    # Setup codes are int8 (dates x tickers), so a handful of threshold pairs fit easily
+    key = (rsi_max, rvol_min)
+    if key not in _SETUPS:
+        if len(_SETUPS) >= SETUP_CACHE_SIZE:
+            _SETUPS.pop(next(iter(_SETUPS)))
+        _SETUPS[key] = reclassify(_PANEL, _IND, rsi_max, rvol_min)
+    return _SETUPS[key]
+
+
+def sweep_job(params, rules_factory=triple_threat_rules, start_capital=10000, start_date=None,
+              end_date=None, calendar_ticker=None, keep_result=False):
+    """One simulation task; picklable, so it can go to any worker."""
+    return (params, rules_factory, start_capital, start_date, end_date, calendar_ticker, keep_result)
+
+
+def _run_one(job):
+    params, rules_factory, start_capital, start_date, end_date, calendar_ticker, keep_result = job
+    t0 = time.perf_counter()
+    setup_params = {k: params[k] for k in SETUP_PARAMS if k in params}
+    ind = _IND
+    if setup_params:
+        ind = {**_IND, "Setup": _setups_for(setup_params.get("rsi_max", RSI_OVERSOLD), setup_params.get("rvol_min", RVOL_BREAKOUT))}
+    rules = rules_factory(**{k: v for k, v in params.items() if k not in SETUP_PARAMS})
+    result = run_portfolio(_PANEL, ind, rules, start_capital=start_capital, start_date=start_date,
+                           calendar_ticker=calendar_ticker, end_date=end_date)
+    row = {**params, **result.summary(), "seconds": round(time.perf_counter() - t0, 3)}
+    return (row, result) if keep_result else row
+
+
+def run_jobs(panel, ind, jobs, workers=None):
+    """Runs sweep_job()s over a process pool sharing one panel; results come back in job order."""
+    global _PANEL, _IND, _SETUPS
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    # Contiguous chunks keep combos with the same setup params on the same worker
+    chunksize = max(1, len(jobs) // (workers * 4))
+
+    if workers == 1:
+        _init_worker(panel, ind)
+        return [_run_one(job) for job in jobs]
+    if START_METHOD == "fork":
+        _PANEL, _IND, _SETUPS = panel, ind, {}
+        with mp.get_context("fork").Pool(workers) as pool:
+            return pool.map(_run_one, jobs, chunksize=chunksize)
+    store = share_panel(panel, ind)  # Pickles as a path; written once per panel
+    with mp.get_context(START_METHOD).Pool(workers, initializer=_attach_worker, initargs=(store,)) as pool:
+        return pool.map(_run_one, jobs, chunksize=chunksize)
+
+
+def run_sweep(panel, ind, grid=DEFAULT_GRID, workers=None, rules_factory=triple_threat_rules,
+              start_capital=10000, start_date=None, calendar_ticker=None, end_date=None, results_file=RESULTS_FILE):
+    """Fans every grid combination out over a process pool; returns one results table.
+
+    rules_factory receives the non-setup params (e.g. triple_threat_rules) and must
+    be a module-level function so it can reach spawned workers.
+    """
+    jobs = [sweep_job(params, rules_factory, start_capital, start_date, end_date, calendar_ticker)
+            for params in expand_grid(grid)]
+    results = pd.DataFrame(run_jobs(panel, ind, jobs, workers)).sort_values("sharpe", ascending=False).reset_index(drop=True)
+    if results_file:
+        results.to_csv(results_file, index=False)
+    return results
+
+
+if __name__ == "__main__":
+    # Offline scaling check on synthetic data: same grid, growing pool
+    from indicator_engine import build_panel, compute_indicators
+    from synthetic_data import make_ohlcv
+
+    frames = {f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2015-01-01", "2025-01-01", seed=i) for i in range(500)}
+    panel = build_panel(frames)
+    ind = compute_indicators(panel)
+    n_combos = len(expand_grid(DEFAULT_GRID))
+
+    print(f"--- PARAMETER SWEEP: {n_combos} combos | 500 tickers x {len(panel.dates)} days ---")
+    baseline = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        t0 = time.perf_counter()
+        results = run_sweep(panel, ind, workers=workers, start_date="2015-03-01", results_file=None)
+        elapsed = time.perf_counter() - t0
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} | {elapsed:6.2f}s | speedup x{baseline / elapsed:4.1f} | efficiency {baseline / elapsed / workers * 100:5.1f}%")
+        workers *= 2
+
+    results.to_csv(RESULTS_FILE, index=False)
+    print(f"\nTop 5 (saved to {RESULTS_FILE}):")
+    print(results.head(5).to_string(index=False))
@@ -0,0 +1,22 @@
+import pandas as pd
+from ledger import realized_pnl
+
+# Dashboard math over the trade_history table (date, ticker, action, price, qty).
+# The balance curve lives in equity_history (daily snapshots from fills x closes).
+# Kept out of dashboard.py so it can be imported without starting Streamlit.
+
+# --- ENGINE: Realized PnL (Sold Only) ---
+def calculate_realized_performance(history_df, method="average"):
+    if history_df.empty:
+        return pd.DataFrame()
+    return realized_frame(realized_pnl(history_df, method))
+
+def realized_frame(closed):
+    """ledger rows (fill_id, date, ticker, pnl, ...) -> the dashboard's Date / Ticker / PnL table."""
+    if closed.empty:
+        return pd.DataFrame()
+
+    df_closed = pd.DataFrame({'Date': closed['date'], 'Ticker': closed['ticker'],
+                              'Realized PnL': closed['pnl']}).reset_index(drop=True)
+    df_closed['Cumulative PnL'] = df_closed['Realized PnL'].cumsum()
+    return df_closed
@@ -19,12 +19,12 @@ for ticker in UNIVERSE:
                                (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d'),
                                datetime.datetime.now().strftime('%Y-%m-%d'))
         bot.fetch_data()
-        bot.apply_strategy()
-        
-        last_row = bot.data.iloc[-1]
+        last_row = bot.evaluate_last_bar()
+        if last_row is None: continue
         price = last_row['Close']
         
-        if last_row['Signal'] == 1:
+        # Any active setup = buy signal
+        if last_row['Setup'] != 'None':
             target_spend = TOTAL_CAPITAL * MAX_ALLOCATION_PER_TICKER
             share_count = int(target_spend // price)
             actual_investment = share_count * price
@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 import yfinance as yf
-from backtester import SilentBacktester
+from universe_loader import UniverseLoader
+from indicator_engine import build_panel, compute_indicators
+from simulation_engine import run_portfolio, refined_rules
 import matplotlib.pyplot as plt
 
 # --- SETTINGS ---
@@ -12,56 +14,17 @@ MAX_ACTIVE_TRADES = 3 # New: Prevents being over-leveraged in a crash
 
 def run_portfolio_sim():
     print("Fetching universe data...")
-    all_data = {}
-    for ticker in UNIVERSE:
-        bot = SilentBacktester(ticker, "2024-01-01", "2025-01-01")
-        bot.fetch_data()
-        bot.apply_strategy()
-        all_data[ticker] = bot.data
-
-    dates = all_data["SPY"].index
-    cash = START_CAPITAL
-    portfolio_value = []
-    active_positions = {} 
-
-    for date in dates:
-        current_total_value = cash
-        
-        # 1. Update/Exit positions
-        to_liquidate = []
-        for ticker, pos in active_positions.items():
-            current_price = all_data[ticker].loc[date, 'Close']
-            current_atr = all_data[ticker].loc[date, 'ATR']
-            # Using 3.0x ATR for more breathing room
-            pos['stop'] = max(pos['stop'], current_price - (current_atr * 3.0))
-            
-            if current_price <= pos['stop'] or all_data[ticker].loc[date, 'Signal'] == 0:
-                cash += (pos['shares'] * current_price) * (1 - 0.001)
-                to_liquidate.append(ticker)
-            else:
-                current_total_value += (pos['shares'] * current_price)
-
-        for ticker in to_liquidate:
-            del active_positions[ticker]
-
-        # 2. Entry (Only if we have less than MAX_ACTIVE_TRADES)
-        if len(active_positions) < MAX_ACTIVE_TRADES:
-            for ticker in UNIVERSE:
-                if ticker not in active_positions and len(active_positions) < MAX_ACTIVE_TRADES:
-                    row = all_data[ticker].loc[date]
-                    if row['Signal'] == 1:
-                        max_spend = current_total_value * ALLOCATION_PER_TRADE
-                        if cash >= max_spend:
-                            price = row['Close']
-                            shares = int(max_spend // price)
-                            if shares > 0:
-                                cash -= (shares * price) * (1 + 0.001)
-                                active_positions[ticker] = {
-                                    'shares': shares,
-                                    'stop': price - (row['ATR'] * 3.0)
-                                }
-
-        portfolio_value.append(current_total_value)
+    frames = UniverseLoader().load(UNIVERSE, "2024-01-01", "2025-01-01")
+    panel = build_panel(frames)
+    indicators = compute_indicators(panel)
+
+    # Using 3.0x ATR for more breathing room; exit on the close when the stop
+    # is breached or the setup disappears. Entries in universe order.
+    rules = refined_rules(max_positions=MAX_ACTIVE_TRADES, alloc_pct=ALLOCATION_PER_TRADE, stop_atr_mult=3.0, fee=0.001)
+    result = run_portfolio(panel, indicators, rules, start_capital=START_CAPITAL,
+                           start_date="2024-01-01", calendar_ticker="SPY")
+    dates = result.equity.index
+    portfolio_value = result.equity.tolist()
 
     final_df = pd.DataFrame({'Date': dates, 'Portfolio_Value': portfolio_value})
     final_df.set_index('Date', inplace=True)
@@ -0,0 +1,50 @@
+import time
+import threading
+
+# --- CONFIGURATION ---
+ALPACA_REQUESTS_PER_MINUTE = 200  # Alpaca's documented per-account REST limit
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` calls per `per` seconds, bursts up to `burst`."""
+
+    def __init__(self, rate=ALPACA_REQUESTS_PER_MINUTE, per=60.0, burst=None):
+        self.interval = per / rate
+        self.capacity = float(burst or max(1, rate // 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call is allowed; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) * self.interval
+            time.sleep(delay)
+            waited += delay
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def is_rate_limited(error):
+    """True for HTTP 429 errors from alpaca-py (APIError.status_code) or requests."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+# Shared by everything that talks to the trading API from one process
+ALPACA_LIMITER = RateLimiter()
@@ -0,0 +1,137 @@
+import json
+import time
+import asyncio
+import pandas as pd
+
+# Local stand-in for Alpaca's trading stream (wss://.../stream): speaks the same
+# auth / listen handshake and then replays trade_updates events, so the
+# push-based TradeMonitor can be exercised with no account and no network.
+
+# --- CONFIGURATION ---
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class ReplayStreamServer:
+    """Replays `events` (trade_updates `data` dicts) to every client that authenticates and listens.
+
+    `interval` spaces the events out; `key`/`secret` are checked so auth failures can be tested.
+    `drop_after` closes the first connection after that many events, like a network blip
+    (the client reconnects and gets the whole replay again). `port=0` picks a free port.
+    """
+
+    def __init__(self, events, host=HOST, port=PORT, interval=0.05, key=None, secret=None, drop_after=None):
+        self.events = list(events)
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.key = key
+        self.secret = secret
+        self.drop_after = drop_after
+        self.connections = 0
+        self.sent_at = {}  # order id -> perf_counter() when its event went out
+        self._server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, ws):
+        auth = json.loads(await ws.recv())
+        ok = auth.get("action") == "auth" and (self.key is None or (auth.get("key"), auth.get("secret")) == (self.key, self.secret))
+        await ws.send(json.dumps({"stream": "authorization", "data": {"action": "authenticate", "status": "authorized" if ok else "unauthorized"}}))
+        if not ok:
+            await ws.close()
+            return
+        listen = json.loads(await ws.recv())
+        streams = listen.get("data", {}).get("streams", [])
+        await ws.send(json.dumps({"stream": "listening", "data": {"streams": streams}}))
+        if "trade_updates" not in streams:
+            return
+
+        self.connections += 1
+        first = self.connections == 1
+        for i, event in enumerate(self.events):
+            if first and i == self.drop_after:
+                await ws.close()
+                return
+            await asyncio.sleep(self.interval)
+            self.sent_at[event["order"]["id"]] = time.perf_counter()
+            # Alpaca sends binary frames on this stream
+            await ws.send(json.dumps({"stream": "trade_updates", "data": event}).encode())
+        await ws.wait_closed()
+
+    async def __aenter__(self):
+        from websockets.asyncio.server import serve
+        self._server = await serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def order_event(event, order_id, symbol, side, qty, price=None, filled_qty=None, client_order_id=None):
+    """A trade_updates payload shaped like Alpaca's (fill / partial_fill / new / canceled ...)."""
+    now = pd.Timestamp.now(tz="UTC").isoformat()
+    filled = qty if filled_qty is None and event == "fill" else (filled_qty or 0)
+    return {
+        "event": event,
+        "timestamp": now,
+        "price": str(price) if price is not None else None,
+        "qty": str(filled) if filled else None,
+        "order": {
+            "id": order_id, "client_order_id": client_order_id or order_id, "symbol": symbol, "side": side,
+            "qty": str(qty), "filled_qty": str(filled), "filled_avg_price": str(price) if filled else None,
+            "filled_at": now if filled else None, "status": "filled" if event == "fill" else event,
+            "order_class": "bracket", "type": "market",
+        },
+    }
+
+
+def demo_events(n_orders=20):
+    """new -> partial_fill -> fill for each order, with a few exits mixed in."""
+    events = []
+    for i in range(n_orders):
+        oid, symbol = f"replay-{i:04d}", f"SYN{i % 7:04d}"
+        side = "sell" if i % 4 == 3 else "buy"
+        events.append(order_event("new", oid, symbol, side, 10))
+        events.append(order_event("partial_fill", oid, symbol, side, 10, price=100 + i, filled_qty=4))
+        events.append(order_event("fill", oid, symbol, side, 10, price=100 + i))
+    return events
+
+
+if __name__ == "__main__":
+    # Replays fills into a TradeMonitor backed by a fake broker + in-memory DB and
+    # reports event -> logged latency (the polling loop's worst case was 60s).
+    import os
+    os.environ["TELEGRAM_TOKEN"] = ""
+    from storage import open_engine, load_trade_history
+    from fake_broker import FakeBroker
+    from trade_monitor import TradeMonitor
+
+    async def main():
+        events = demo_events(20)
+        db = open_engine(":memory:")
+        monitor = TradeMonitor(client=FakeBroker(), db=db)
+        latencies = []
+        done = asyncio.Event()
+        fills = sum(e["event"] == "fill" for e in events)
+
+        async with ReplayStreamServer(events, interval=0.02) as server:
+            def on_fill(data):
+                latencies.append((time.perf_counter() - server.sent_at[data["order"]["id"]]) * 1000)
+                if len(latencies) == fills:
+                    done.set()
+
+            task = asyncio.create_task(monitor.consume_stream(server.url, "key", "secret", on_fill=on_fill))
+            await asyncio.wait_for(done.wait(), timeout=30)
+            task.cancel()
+
+        logged = load_trade_history(db)
+        print(f"\n--- REPLAY STREAM: {len(events)} events, {fills} fills ---")
+        print(f"Logged {len(logged)} fills ({logged['order_id'].nunique()} unique) | partial fills ignored until final")
+        print(f"Event -> logged latency: median {pd.Series(latencies).median():.1f} ms | max {max(latencies):.1f} ms")
+
+    asyncio.run(main())
@@ -17,9 +17,8 @@ for ticker in UNIVERSE:
                                (datetime.datetime.now() - datetime.timedelta(days=365)).strftime('%Y-%m-%d'),
                                datetime.datetime.now().strftime('%Y-%m-%d'))
         bot.fetch_data()
-        bot.apply_strategy()
-        
-        last = bot.data.iloc[-1]
+        last = bot.evaluate_last_bar()
+        if last is None: continue
         price = last['Close']
         atr_stop = price - (last['ATR'] * 4.0)
         
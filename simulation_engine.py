@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from indicator_engine import SETUP_NAMES, NO_SETUP
+
+# Event-driven portfolio simulator over a PricePanel + compute_indicators() output.
+# All tickers share one calendar; the daily loop only touches contiguous NumPy
+# rows, so cost grows with (days x open positions) instead of (days x tickers)
+# pandas lookups.
+
+
+class SimulationRules:
+    """Knobs and hooks that define a portfolio strategy.
+
+    Override rank_entries / size_position / entry_signal in a subclass (or pass
+    callables) to plug in different logic; the defaults reproduce the
+    "Triple Threat" loop in new_logic_simulation.py.
+    """
+
+    def __init__(self, max_positions=5, alloc_pct=0.20, stop_atr_mult=2.0, fee=0.0,
+                 stop_trigger="low", exit_on_signal_loss=False, mark_exits=True, strict_cash=True,
+                 rank=None, size=None):
+        self.max_positions = max_positions
+        self.alloc_pct = alloc_pct
+        self.stop_atr_mult = stop_atr_mult
+        self.fee = fee
+        self.stop_trigger = stop_trigger            # "low": Low <= stop fills at the stop | "close": Close <= stop fills at Close
+        self.exit_on_signal_loss = exit_on_signal_loss
+        self.mark_exits = mark_exits                # Count positions closed today in today's equity
+        self.strict_cash = strict_cash              # Enter only if cash > target (True) or cash >= target (False)
+        self._rank = rank
+        self._size = size
+
+    def entry_signal(self, ind):
+        """(dates x tickers) bool array of days a ticker is an entry candidate."""
+        return ind["Setup"] != NO_SETUP
+
+    def rank_entries(self, t, candidates, context):
+        """Orders today's candidate columns (context: panel, ind, close, shares). Default: universe order."""
+        return self._rank(t, candidates, context) if self._rank else candidates
+
+    def size_position(self, equity, cash, price):
+        """Whole shares to buy (0 = skip)."""
+        if self._size:
+            return self._size(equity, cash, price, self)
+        target = equity * self.alloc_pct
+        if (cash > target) if self.strict_cash else (cash >= target):
+            return int(target // price)
+        return 0
+
+
+class SimulationResult:
+    def __init__(self, equity, trades, start_capital):
+        self.equity = equity
+        self.trades = trades
+        self.start_capital = start_capital
+
+    def summary(self):
+        equity = self.equity.to_numpy()
+        daily = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.array([])
+        sharpe = daily.mean() / daily.std() * np.sqrt(252) if len(daily) > 1 and daily.std() > 0 else 0.0
+        peak = np.maximum.accumulate(equity) if len(equity) else equity
+        return {
+            "total_return": (equity[-1] / self.start_capital - 1) * 100 if len(equity) else 0.0,
+            "sharpe": sharpe,
+            "max_drawdown": ((equity / peak) - 1).min() * 100 if len(equity) else 0.0,
+            "trades": len(self.trades),
+            "win_rate": (self.trades["PnL"] > 0).mean() * 100 if len(self.trades) else 0.0,
+        }
+
+
+def run_portfolio(panel, ind, rules, start_capital=10000, start_date=None, calendar_ticker=None, end_date=None):
+    """Runs the daily loop and returns a SimulationResult.
+
+    The timeline is every panel date in [start_date, end_date), or only the dates
+    calendar_ticker traded (the legacy scripts walk SPY's index). Positions still
+    open at end_date stay marked to market in the last equity value.
+    """
+    on_calendar = panel.dates >= pd.Timestamp(start_date) if start_date else np.ones(len(panel.dates), dtype=bool)
+    if end_date:
+        on_calendar &= panel.dates < pd.Timestamp(end_date)
+    if calendar_ticker is not None:
+        on_calendar &= panel.mask[:, panel.column[calendar_ticker]]
+    timeline = np.flatnonzero(on_calendar)
+
+    close, low = panel["Close"], panel["Low"]
+    atr, setup = ind["ATR"], ind["Setup"]
+    avail = panel.mask
+    signal = rules.entry_signal(ind) & avail
+    n = len(panel.tickers)
+
+    # Position book: one slot per ticker, 0 shares = flat
+    shares = np.zeros(n, dtype=np.int64)
+    entry = np.zeros(n)
+    stop = np.zeros(n)
+    kind = np.zeros(n, dtype=np.int8)
+    entry_t = np.zeros(n, dtype=np.int64)
+    opened = np.zeros(n, dtype=np.int64)  # Entry sequence, so exits run in the order positions were opened
+    seq = 0
+
+    context = {"panel": panel, "ind": ind, "close": close, "shares": shares}
+    cash = float(start_capital)
+    equity_curve = np.empty(len(timeline))
+    trades = []
+
+    for i, t in enumerate(timeline):
+        # A. Mark-to-market & exits (only positions with a bar today)
+        held = np.flatnonzero((shares > 0) & avail[t])
+        held = held[np.argsort(opened[held], kind="stable")]
+        equity = cash
+        if len(held):
+            price = close[t, held]
+            new_stop = price - atr[t, held] * rules.stop_atr_mult
+            stop[held] = np.where(new_stop > stop[held], new_stop, stop[held])
+
+            if rules.stop_trigger == "low":
+                exiting = low[t, held] <= stop[held]
+                exit_price = np.where(exiting, stop[held], price)
+            else:
+                exiting = price <= stop[held]
+                exit_price = price.copy()
+            if rules.exit_on_signal_loss:
+                exiting |= ~signal[t, held]
+
+            value = shares[held] * price
+            equity += value.sum() if rules.mark_exits else value[~exiting].sum()
+
+            for k in np.flatnonzero(exiting):
+                j = held[k]
+                cash += shares[j] * exit_price[k] * (1 - rules.fee)
+                trades.append((j, kind[j], entry_t[j], t, entry[j], exit_price[k]))
+                shares[j] = 0
+
+        # B. Entries, if slots are open
+        open_slots = rules.max_positions - int((shares > 0).sum())
+        if open_slots > 0:
+            candidates = np.flatnonzero(signal[t] & (shares == 0))
+            for j in rules.rank_entries(t, candidates, context):
+                if open_slots <= 0:
+                    break
+                price = close[t, j]
+                qty = rules.size_position(equity, cash, price)
+                if qty > 0:
+                    cash -= qty * price * (1 + rules.fee)
+                    shares[j], entry[j], kind[j], entry_t[j] = qty, price, setup[t, j], t
+                    stop[j] = price - atr[t, j] * rules.stop_atr_mult
+                    opened[j], seq = seq, seq + 1
+                    open_slots -= 1
+
+        equity_curve[i] = equity
+
+    trade_log = pd.DataFrame(trades, columns=["col", "kind", "entry_t", "exit_t", "Entry", "Exit"])
+    trade_log = pd.DataFrame({
+        "Ticker": [panel.tickers[j] for j in trade_log["col"]],
+        "Type": SETUP_NAMES[trade_log["kind"].to_numpy(dtype=np.int64)],
+        "Entry_Date": panel.dates[trade_log["entry_t"].to_numpy(dtype=np.int64)],
+        "Exit_Date": panel.dates[trade_log["exit_t"].to_numpy(dtype=np.int64)],
+        "Entry_Price": trade_log["Entry"].to_numpy(),
+        "Exit_Price": trade_log["Exit"].to_numpy(),
+        "PnL": (trade_log["Exit"] - trade_log["Entry"]).to_numpy() / trade_log["Entry"].to_numpy(),
+    })
+    equity = pd.Series(equity_curve, index=panel.dates[timeline], name="Equity")
+    return SimulationResult(equity, trade_log, start_capital)
+
+
+# --- Presets matching the two legacy scripts ---
+def triple_threat_rules(max_positions=5, alloc_pct=0.20, stop_atr_mult=2.0):
+    """new_logic_simulation: any setup enters, 2x ATR ratchet, stop hit on the intraday Low."""
+    return SimulationRules(max_positions=max_positions, alloc_pct=alloc_pct, stop_atr_mult=stop_atr_mult)
+
+
+def refined_rules(max_positions=3, alloc_pct=0.10, stop_atr_mult=3.0, fee=0.001):
+    """portfolio_simulation: 3x ATR ratchet on the Close, exit as soon as the setup is gone, 0.1% fees."""
+    return SimulationRules(max_positions=max_positions, alloc_pct=alloc_pct, stop_atr_mult=stop_atr_mult, fee=fee,
+                           stop_trigger="close", exit_on_signal_loss=True, mark_exits=False, strict_cash=False)
+
+
+if __name__ == "__main__":
+    # Scale check on synthetic data (offline)
+    import time
+    from indicator_engine import build_panel, compute_indicators
+    from synthetic_data import make_ohlcv
+
+    N_TICKERS, START, END = 1000, "2015-01-01", "2025-01-01"
+    t0 = time.perf_counter()
+    frames = {f"SYN{i:04d}": make_ohlcv(f"SYN{i:04d}", START, END, seed=i) for i in range(N_TICKERS)}
+    panel = build_panel(frames)
+    ind = compute_indicators(panel)
+    t_prep = time.perf_counter() - t0
+
+    print(f"--- SIMULATION ENGINE: {N_TICKERS} tickers x {len(panel.dates)} days (prep {t_prep:.1f}s) ---")
+    for name, rules in [("Triple Threat", triple_threat_rules()), ("Refined", refined_rules())]:
+        t0 = time.perf_counter()
+        result = run_portfolio(panel, ind, rules, start_date="2015-03-01")
+        s = result.summary()
+        print(f"{name:<14} | {time.perf_counter() - t0:5.2f}s | return {s['total_return']:8.1f}% | "
+              f"trades {s['trades']:>5} | max DD {s['max_drawdown']:6.1f}%")
@@ -0,0 +1,369 @@
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import event, text, bindparam
+
+# One place that owns silent_swing.db: engine setup (WAL + busy timeout), the
+# schema and its migrations, batched writes and typed reads. The autopilot,
+# the monitor and the dashboard all go through here, so their processes can
+# share the file without "database is locked".
+
+# --- CONFIGURATION ---
+DB_PATH = os.getenv("SWING_DB", "silent_swing.db")
+BUSY_TIMEOUT_MS = 30000   # How long a writer waits for the lock before giving up
+FLUSH_ROWS = 100          # BatchWriter: flush when this many rows are buffered...
+FLUSH_SECONDS = 1.0       # ...or when the oldest buffered row is this old
+SCHEMA_VERSION = 3
+QUARANTINE_TABLE = "trade_history_quarantine"  # Legacy rows the migration could not copy
+
+TRADE_COLUMNS = ["date", "ticker", "action", "price", "qty", "order_id"]
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS trade_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TIMESTAMP NOT NULL,
+        ticker TEXT NOT NULL,
+        action TEXT NOT NULL,
+        price REAL NOT NULL,
+        qty REAL NOT NULL,
+        order_id TEXT
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_trade_history_order_id ON trade_history (order_id)",
+    "CREATE INDEX IF NOT EXISTS ix_trade_history_date ON trade_history (date)",
+    "CREATE INDEX IF NOT EXISTS ix_trade_history_ticker_date ON trade_history (ticker, date)",
+    "CREATE TABLE IF NOT EXISTS monitor_state (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)",
+    # v2: realized PnL per closing fill, maintained by ledger.sync()
+    """CREATE TABLE IF NOT EXISTS closed_trades (
+        fill_id INTEGER PRIMARY KEY,
+        date TIMESTAMP NOT NULL,
+        ticker TEXT NOT NULL,
+        qty REAL NOT NULL,
+        price REAL NOT NULL,
+        cost_basis REAL NOT NULL,
+        pnl REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_closed_trades_ticker ON closed_trades (ticker)",
+    # v3: end-of-day account value rebuilt from fills x closes, maintained by equity_history
+    """CREATE TABLE IF NOT EXISTS equity_snapshots (
+        date TEXT PRIMARY KEY,
+        cash REAL NOT NULL,
+        positions_value REAL NOT NULL,
+        equity REAL NOT NULL,
+        last_fill_id INTEGER NOT NULL
+    )""",
+]
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(path=DB_PATH):
+    """Shared, migrated engine for a DB file (one per path per process)."""
+    key = os.path.abspath(path) if path != ":memory:" else path
+    with _ENGINES_LOCK:
+        if key not in _ENGINES:
+            _ENGINES[key] = open_engine(path)
+        return _ENGINES[key]
+
+
+def open_engine(path=DB_PATH):
+    """New, migrated engine that isn't shared (':memory:' for a throwaway DB)."""
+    engine = _create_engine(path)
+    init_schema(engine)
+    return engine
+
+
+def get_readonly_engine(path=DB_PATH):
+    """Shared read-only engine for an existing DB file: never creates, migrates or writes it."""
+    key = ("ro", os.path.abspath(path))
+    with _ENGINES_LOCK:
+        if key not in _ENGINES:
+            engine = sqlalchemy.create_engine(f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true",
+                                              connect_args={"timeout": BUSY_TIMEOUT_MS / 1000, "check_same_thread": False})
+
+            @event.listens_for(engine, "connect")
+            def _on_connect(dbapi_conn, _record):
+                dbapi_conn.isolation_level = None
+                dbapi_conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+
+            _ENGINES[key] = engine
+        return _ENGINES[key]
+
+
+def _create_engine(path):
+    if path == ":memory:":
+        # One connection shared by all threads, or every thread would see its own empty DB
+        engine = sqlalchemy.create_engine("sqlite://", poolclass=sqlalchemy.pool.StaticPool,
+                                          connect_args={"check_same_thread": False})
+    else:
+        engine = sqlalchemy.create_engine(f"sqlite:///{path}", connect_args={"timeout": BUSY_TIMEOUT_MS / 1000,
+                                                                            "check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # No implicit BEGIN from the driver: reads run as short autocommit snapshots,
+        # writes open their own BEGIN IMMEDIATE in write_transaction()
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")        # Readers never block the writer (and vice versa)
+        cur.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        cur.execute("PRAGMA synchronous=NORMAL")      # Safe with WAL, one fsync per checkpoint instead of per commit
+        cur.close()
+
+    return engine
+
+
+@contextmanager
+def write_transaction(engine=None):
+    """BEGIN IMMEDIATE ... COMMIT.
+
+    Taking the write lock up front means a busy DB makes us wait (busy_timeout)
+    instead of failing halfway through when a read lock can't be upgraded.
+    """
+    with (engine or get_engine()).connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def init_schema(engine):
+    """Creates the schema and migrates older layouts in place (idempotent)."""
+    with write_transaction(engine) as conn:
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        legacy = []
+        if "trade_history" in tables:
+            columns = {row[1] for row in conn.execute(text("PRAGMA table_info(trade_history)"))}
+            if "id" not in columns:
+                # pandas-inferred table from to_sql(if_exists='append'): rebuild it with the real schema
+                conn.execute(text("ALTER TABLE trade_history RENAME TO trade_history_legacy"))
+                conn.execute(text("DROP INDEX IF EXISTS ux_trade_history_order_id"))
+                legacy.append("trade_history_legacy")
+        if "trades" in tables:
+            legacy.append("trades")  # The dashboard's old fallback table
+
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+
+        for table in legacy:
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+            exprs = {c: c if c in columns else "NULL" for c in TRADE_COLUMNS}
+            select = ", ".join(exprs.values())
+            complete = " AND ".join(f"{exprs[c]} IS NOT NULL" for c in TRADE_COLUMNS if c != "order_id")
+            total = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+            # Rows the NOT NULL schema can't hold are parked, not dropped, so no history is lost silently
+            bad = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE NOT ({complete})")).scalar()
+            if bad:
+                conn.execute(text(f"CREATE TABLE IF NOT EXISTS {QUARANTINE_TABLE} "
+                                  f"(source TEXT, {', '.join(TRADE_COLUMNS)})"))
+                conn.execute(text(f"INSERT INTO {QUARANTINE_TABLE} (source, {', '.join(TRADE_COLUMNS)}) "
+                                  f"SELECT :source, {select} FROM {table} WHERE NOT ({complete})"), {"source": table})
+                print(f"⚠️ {bad} row(s) of {table} have no date/ticker/action/price/qty; kept in {QUARANTINE_TABLE}")
+
+            # Oldest first so ids follow time; duplicate order ids collapse onto the first row
+            copied = conn.execute(text(f"INSERT OR IGNORE INTO trade_history ({', '.join(TRADE_COLUMNS)}) "
+                                       f"SELECT {select} FROM {table} WHERE {complete} ORDER BY date")).rowcount
+            if table == "trades":
+                conn.execute(text("ALTER TABLE trades RENAME TO trades_migrated"))
+            else:
+                conn.execute(text(f"DROP TABLE {table}"))
+            duplicates = total - bad - copied
+            print(f"🗄️ Migrated {table} into trade_history ({copied} rows"
+                  f"{f', {duplicates} duplicate order id(s) skipped' if duplicates else ''})")
+
+        if conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == 0:
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": SCHEMA_VERSION})
+        else:
+            conn.execute(text("UPDATE schema_version SET version = :v WHERE version < :v"), {"v": SCHEMA_VERSION})
+
+
+# --- Writes ---
+def insert_trades(rows, engine=None):
+    """INSERT OR IGNORE a batch of trade rows in one transaction; returns one inserted-flag per row."""
+    if not rows:
+        return []
+    sql = text(f"INSERT OR IGNORE INTO trade_history ({', '.join(TRADE_COLUMNS)}) "
+               f"VALUES ({', '.join(':' + c for c in TRADE_COLUMNS)})")
+    with write_transaction(engine) as conn:
+        return [conn.execute(sql, _trade_params(row)).rowcount > 0 for row in rows]
+
+
+class BatchWriter:
+    """Buffers trade rows and writes them in batches from a background thread.
+
+    For callers that don't need to know whether a row was new (plain logging);
+    anything still buffered is written at interpreter exit. `on_flush` runs after
+    each batch that wrote something (e.g. a ledger update).
+    """
+
+    def __init__(self, engine=None, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, on_flush=None):
+        self.engine = engine
+        self.on_flush = on_flush
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.oldest = None
+        self.written = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def add(self, row):
+        with self._lock:
+            self.buffer.append(row)
+            self.oldest = self.oldest or time.monotonic()
+            if len(self.buffer) >= self.flush_rows:
+                self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            rows, self.buffer, self.oldest = self.buffer, [], None
+        if rows:
+            try:
+                written = sum(insert_trades(rows, self.engine))
+            except Exception as e:
+                print(f"⚠️ Database Log Error: {e}")
+                return
+            self.written += written
+            if written and self.on_flush:
+                self.on_flush()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            with self._lock:
+                due = self.buffer and (len(self.buffer) >= self.flush_rows or time.monotonic() - self.oldest >= self.flush_seconds)
+            if due:
+                self.flush()
+
+
+def set_state(key, value, engine=None):
+    with write_transaction(engine) as conn:
+        conn.execute(text("INSERT OR REPLACE INTO monitor_state (key, value) VALUES (:k, :v)"), {"k": key, "v": str(value)})
+
+
+# --- Reads ---
+def load_trade_history(engine=None, since_id=None):
+    """trade_history as a typed DataFrame sorted by date (only rows with id > since_id if given)."""
+    with (engine or get_engine()).connect() as conn:
+        return read_trades(conn, since_id=since_id)
+
+
+def read_trades(conn, since_id=None, tickers=None, start=None):
+    """load_trade_history on an open connection (e.g. inside write_transaction), optionally for some tickers / from a date."""
+    query = f"SELECT id, {', '.join(TRADE_COLUMNS)} FROM trade_history WHERE 1 = 1"
+    params = {}
+    if since_id is not None:
+        query += " AND id > :since_id"
+        params["since_id"] = int(since_id)
+    if start is not None:
+        query += " AND date >= :start"
+        params["start"] = db_time(start)
+    if tickers is not None:
+        query += " AND ticker IN :tickers"
+        params["tickers"] = list(tickers)
+    stmt = text(query + " ORDER BY date, id")
+    if tickers is not None:
+        stmt = stmt.bindparams(bindparam("tickers", expanding=True))
+    df = pd.read_sql(stmt, conn, params=params)
+    df["date"] = pd.to_datetime(df["date"], format="mixed")
+    return df.astype({"id": "int64", "ticker": "string", "action": "string", "price": "float64",
+                      "qty": "float64", "order_id": "string"})
+
+
+class HistoryCache:
+    """Keeps trade_history in memory and only reads rows newer than the last id it has."""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.df = None
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            new = load_trade_history(self.engine, since_id=self.last_id)
+            if self.df is None:
+                self.df = new
+            elif not new.empty:
+                # New ids can carry older fill dates (late reconciliation), so re-sort
+                self.df = pd.concat([self.df, new], ignore_index=True).sort_values(["date", "id"], ignore_index=True)
+            if not new.empty:
+                self.last_id = int(new["id"].max())
+            return self.df
+
+
+def known_order_ids(engine=None):
+    with (engine or get_engine()).connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT order_id FROM trade_history WHERE order_id IS NOT NULL"))}
+
+
+def get_state(key, default=None, engine=None):
+    with (engine or get_engine()).connect() as conn:
+        row = conn.execute(text("SELECT value FROM monitor_state WHERE key = :k"), {"k": key}).fetchone()
+    return row[0] if row else default
+
+
+def db_time(ts):
+    """Timestamp -> the text SQLAlchemy writes for a DateTime on SQLite (UTC wall time)."""
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _trade_params(row):
+    params = {c: row.get(c) for c in TRADE_COLUMNS}
+    params["date"] = db_time(params["date"])
+    params["order_id"] = str(params["order_id"]) if params["order_id"] is not None else None
+    return params
+
+
+if __name__ == "__main__":
+    # Contention check: several processes hammering the same file the way the
+    # autopilot, monitor and dashboard do at once.
+    import sys
+    import tempfile
+    import multiprocessing as mp
+
+    def writer(path, n, wid):
+        engine = get_engine(path)
+        for i in range(n):
+            insert_trades([{"date": pd.Timestamp.now(), "ticker": f"W{wid}", "action": "BUY", "price": 1.0,
+                            "qty": 1.0, "order_id": f"w{wid}-{i}"}], engine)
+
+    def reader(path, n):
+        engine = get_engine(path)
+        for _ in range(n):
+            load_trade_history(engine)
+
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "contention.db")
+    get_engine(path)  # Create + migrate once up front
+    N = 300
+    procs = [mp.Process(target=writer, args=(path, N, w)) for w in range(4)] + [mp.Process(target=reader, args=(path, 50)) for _ in range(2)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    rows = len(load_trade_history(get_engine(path)))
+    failed = [p.exitcode for p in procs if p.exitcode != 0]
+    print(f"--- STORAGE: 4 writers x {N} commits + 2 readers in {time.perf_counter() - t0:.1f}s ---")
+    print(f"{rows}/{4 * N} rows written | {len(failed)} process(es) failed (\"database is locked\" would show here)")
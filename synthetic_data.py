@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Deterministic fake market data so scanners, loaders, simulations and the
+# monitor can run offline.
+
+def make_ohlcv(ticker, start, end, seed=None, base_price=100.0, drift=0.0003, vol=0.02):
+    """Business-day OHLCV random walk for one ticker. Same ticker + seed -> same bars."""
+    if seed is None:
+        seed = sum(ord(c) for c in ticker)
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end, inclusive="left", name="Date")
+    dates = dates[dates.dayofweek < 5]  # Business days (much faster than bdate_range)
+    n = len(dates)
+
+    close = base_price * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+    open_ = close * (1 + rng.normal(0, vol / 3, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, vol / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, vol / 2, n)))
+    volume = rng.lognormal(14, 0.5, n).astype(np.int64)
+
+    return pd.DataFrame({"Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume}, index=dates)
+
+
+def make_intraday(ticker, start, end, minutes=1, seed=None, base_price=100.0, vol=0.02):
+    """Regular-session (9:30-16:00) bars every `minutes` for one ticker; `vol` is the daily volatility."""
+    if seed is None:
+        seed = sum(ord(c) for c in ticker)
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, end, inclusive="left")
+    days = days[days.dayofweek < 5].to_numpy()
+    offsets = (np.timedelta64(570, "m") + np.arange(0, 390, minutes) * np.timedelta64(1, "m")).astype("timedelta64[ns]")
+    times = pd.DatetimeIndex((days[:, None] + offsets[None, :]).ravel(), name="Date")
+    n, step = len(times), vol / np.sqrt(390 / minutes)
+
+    close = base_price * np.exp(np.cumsum(rng.normal(0, step, n)))
+    open_ = np.r_[base_price, close[:-1]] * (1 + rng.normal(0, step / 4, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, step / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, step / 2, n)))
+    volume = rng.lognormal(14 - np.log(390 / minutes), 0.7, n).astype(np.int64)
+
+    return pd.DataFrame({"Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume}, index=times)
+
+
+def make_universe(n_tickers=100, years=5, end="2025-01-01", gap_rate=0.0, late_listing_frac=0.0, seed=0):
+    """{ticker: OHLCV} for n_tickers synthetic names.
+
+    gap_rate drops that fraction of bars at random (halts, missing prints);
+    late_listing_frac of the tickers start somewhere in the first half of the history.
+    """
+    end = pd.Timestamp(end)
+    start = end - pd.DateOffset(years=years)
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(n_tickers):
+        ticker = f"SYN{i:04d}"
+        df = make_ohlcv(ticker, start, end, seed=seed * 100_003 + i, base_price=rng.uniform(10, 500))
+        if rng.random() < late_listing_frac:
+            df = df.iloc[rng.integers(1, len(df) // 2):]
+        if gap_rate > 0:
+            df = df[rng.random(len(df)) >= gap_rate]
+        frames[ticker] = df
+    return frames
+
+
+def make_trade_history(n_fills=1000, n_tickers=20, start="2024-01-01", seed=0):
+    """trade_history rows (date, ticker, action, price, qty, order_id): buys followed by full or partial sells."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+    held = {}
+    rows = []
+    t = pd.Timestamp(start) + pd.Timedelta(hours=14, minutes=35)
+    for i in range(n_fills):
+        t += pd.Timedelta(minutes=int(rng.integers(5, 600)))
+        ticker = tickers[rng.integers(n_tickers)]
+        price = round(float(rng.uniform(20, 400)), 2)
+        if held.get(ticker, 0) > 0 and rng.random() < 0.5:
+            qty = float(held[ticker] if rng.random() < 0.7 else max(1, held[ticker] // 2))
+            held[ticker] -= qty
+            action = "SELL"
+        else:
+            qty = float(rng.integers(1, 50))
+            held[ticker] = held.get(ticker, 0) + qty
+            action = "BUY_BRACKET" if rng.random() < 0.5 else "BUY"
+        rows.append({"date": t, "ticker": ticker, "action": action, "price": price, "qty": qty, "order_id": f"ord-{seed}-{i:07d}"})
+    return pd.DataFrame(rows)
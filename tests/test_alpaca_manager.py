@@ -0,0 +1,63 @@
+import pytest
+from alpaca_manager import AlpacaExecutor
+from rate_limit import RateLimiter
+from storage import open_engine, load_trade_history
+from fake_broker import FakeBroker
+
+PRICES = {"NVDA": 140.0, "AMD": 120.0, "TSLA": 250.0}
+
+
+def make_executor(tmp_path, **kw):
+    broker = FakeBroker(cash=100000.0, prices=PRICES, **kw)
+    db = open_engine(str(tmp_path / "trades.db"))
+    bot = AlpacaExecutor(trading_client=broker, data_client=broker, limiter=RateLimiter(rate=100000), db=db)
+    return bot, broker, db
+
+
+def targets(*tickers):
+    return [{'ticker': t, 'close': PRICES.get(t, 50.0), 'rsi': 40.0, 'rvol': 2.0,
+             'stop_price': PRICES.get(t, 50.0) * 0.95} for t in tickers]
+
+
+def test_batch_places_and_logs_every_target(tmp_path):
+    bot, broker, db = make_executor(tmp_path)
+    result = bot.execute_batch(targets("NVDA", "AMD", "TSLA"))
+    assert sorted(r['ticker'] for r in result['placed']) == ["AMD", "NVDA", "TSLA"]
+    assert not result['failed'] and not result['skipped']
+    assert len(load_trade_history(db)) == 3
+
+
+def test_timed_out_submit_is_recovered_by_client_order_id(tmp_path):
+    bot, broker, db = make_executor(tmp_path, timeout_symbols={"TSLA"}, reject_symbols={"AMD"})
+    result = bot.execute_batch(targets("NVDA", "AMD", "TSLA"))
+    assert sorted(r['ticker'] for r in result['placed']) == ["NVDA", "TSLA"]
+    assert [r['ticker'] for r in result['failed']] == ["AMD"]
+
+
+def test_same_ticker_can_be_entered_twice_in_a_day(tmp_path):
+    bot, broker, db = make_executor(tmp_path)
+    first = bot.execute_batch(targets("NVDA"))
+    broker.orders[-1].status = "filled"  # Bracket filled and later stopped out: no position, no open buy
+    second = bot.execute_batch(targets("NVDA"))
+    assert len(first['placed']) == len(second['placed']) == 1
+    assert first['placed'][0]['client_order_id'] != second['placed'][0]['client_order_id']
+    assert len(load_trade_history(db)) == 2
+
+
+def test_invalid_symbol_falls_back_to_per_symbol_prices(tmp_path):
+    bot, broker, db = make_executor(tmp_path)
+    result = bot.execute_batch(targets("NVDA", "BTC-USD", "AMD"))
+    assert sorted(r['ticker'] for r in result['placed']) == ["AMD", "NVDA"]
+    assert result['skipped'] == {"BTC-USD": "no latest price"}
+
+
+@pytest.mark.parametrize("call", ["get_account", "get_all_positions", "get_orders"])
+def test_failed_snapshot_call_does_not_raise(tmp_path, call):
+    bot, broker, db = make_executor(tmp_path)
+    broker.fail_calls = {call}
+    snapshot = bot.take_snapshot(["NVDA", "AMD"])
+    assert snapshot.prices == {"NVDA": 140.0, "AMD": 120.0}
+    if call == "get_account":
+        # No cash figure -> nothing can be sized, but the stage still completes
+        orders, skipped = bot.plan_orders(targets("NVDA", "AMD"), snapshot)
+        assert not orders and set(skipped) == {"NVDA", "AMD"}
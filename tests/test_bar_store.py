@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from backtester import SilentBacktester
+from bar_store import BarStore, PRICES, PRICE_DTYPE
+from indicator_engine import compute_indicators, frame_for
+from synthetic_data import make_intraday
+
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+@pytest.fixture(scope="module")
+def frames():
+    frames = {f"SYN{i:04d}": make_intraday(f"SYN{i:04d}", "2024-01-01", "2024-03-01", seed=i) for i in range(6)}
+    frames["SYN0003"] = frames["SYN0003"].iloc[::3]  # An illiquid name with missing minutes
+    return frames
+
+
+@pytest.mark.parametrize("timeframe, rule", [("15m", "15min"), ("1h", "1h"), ("1d", "1D")])
+def test_resample_matches_pandas(frames, timeframe, rule):
+    store = BarStore.from_frames(frames)
+    for ticker, df in frames.items():
+        compact = df.astype({f: PRICE_DTYPE for f in PRICES}).astype({f: float for f in PRICES})
+        expected = compact.resample(rule).agg(AGG).dropna(subset=["Close"])
+        got = store.frame(ticker, timeframe)
+        assert got.index.equals(expected.index)
+        np.testing.assert_allclose(got[list(AGG)].to_numpy(), expected[list(AGG)].to_numpy(), rtol=1e-6)
+
+
+def test_backtester_on_hourly_bars_matches_indicator_engine(frames):
+    store = BarStore.from_frames(frames)
+    bot = SilentBacktester("SYN0001", "2024-02-01", "2024-03-01", timeframe="1h", bars=store)
+    bot.fetch_data()
+    bot.apply_strategy()
+    panel = store.panel("1h")
+    batched = frame_for(panel, compute_indicators(panel), "SYN0001", "2024-02-01")
+    cols = ["MA20", "RSI", "RVOL", "ATR"]
+    np.testing.assert_allclose(bot.data[cols].to_numpy(), batched[cols].to_numpy(), rtol=1e-9, equal_nan=True)
+    assert (bot.data["Setup"].to_numpy() == batched["Setup"].to_numpy()).all()
@@ -0,0 +1,53 @@
+import pandas as pd
+from data_cache import OHLCVCache
+from synthetic_data import make_ohlcv
+
+
+class Source:
+    """Fetcher over synthetic bars that can be told to fail (return nothing)."""
+
+    def __init__(self):
+        self.bars = make_ohlcv("CCH", "2023-01-01", "2025-01-01").rename_axis("Date")
+        self.calls = []
+        self.down = False
+
+    def __call__(self, ticker, start, end):
+        self.calls.append((start, end))
+        if self.down:
+            return pd.DataFrame()
+        return self.bars.loc[(self.bars.index >= start) & (self.bars.index < end)]
+
+
+def test_failed_head_fetch_is_retried_next_time(tmp_path):
+    cache, source = OHLCVCache(cache_dir=str(tmp_path)), Source()
+    cache.get("CCH", "2024-06-01", "2024-12-01", source)
+
+    source.down = True
+    cache.get("CCH", "2024-01-01", "2024-12-01", source)
+    _, meta = cache.load("CCH")
+    assert meta["covered_start"] == "2024-06-01"
+
+    source.down = False
+    df = cache.get("CCH", "2024-01-01", "2024-12-01", source)
+    assert df.index[0] == source.bars.loc["2024-01-01":].index[0]
+    assert df.equals(source("CCH", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-12-01")))
+
+
+def test_empty_weekend_range_counts_as_covered(tmp_path):
+    cache, source = OHLCVCache(cache_dir=str(tmp_path)), Source()
+    cache.get("CCH", "2024-06-10", "2024-06-15", source)
+    cache.get("CCH", "2024-06-08", "2024-06-15", source)  # Head is Sat/Sun: nothing to trade
+    _, meta = cache.load("CCH")
+    assert meta["covered_start"] == "2024-06-08"
+    assert cache.peek("CCH", "2024-06-08", "2024-06-15") is not None
+
+
+def test_top_ups_serve_the_same_bars_as_one_download(tmp_path, monkeypatch):
+    cache, source = OHLCVCache(cache_dir=str(tmp_path), max_age_minutes=0), Source()
+    cache.get("CCH", "2024-03-01", "2024-06-01", source)
+    cache.get("CCH", "2024-01-01", "2024-04-01", source)  # Head only
+    source.calls.clear()
+    df = cache.get("CCH", "2024-01-01", "2024-09-01", source)  # Tail only, from the last cached bar
+    assert [s for s, _ in source.calls] == [pd.Timestamp("2024-05-31")]
+    assert df.equals(source("CCH", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-09-01")))
+    assert cache.peek("CCH", "2024-02-01", "2024-03-01").equals(df.loc["2024-02-01":"2024-02-29"])
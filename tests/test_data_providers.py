@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from data_providers import MarketDataProvider, ReplayProvider, CacheProvider
+from data_cache import OHLCVCache
+from synthetic_data import make_ohlcv
+
+
+def test_replay_latest_price_is_last_close():
+    df = make_ohlcv("RPL", "2024-01-01", "2024-03-01")
+    provider = ReplayProvider.from_frames({"RPL": df})
+    assert provider.latest_price("RPL") == pytest.approx(df["Close"].iloc[-1])
+    assert provider.latest_price("NOPE") == 0.0
+
+
+def test_replay_latest_price_respects_the_replay_clock():
+    df = make_ohlcv("RPL", "2024-01-01", "2024-03-01")
+    now = df.index[20]
+    provider = ReplayProvider.from_frames({"RPL": df}, now=now)
+    assert provider.latest_price("RPL") == pytest.approx(df.loc[now, "Close"])
+    assert provider.fetch("RPL", "2024-01-01", "2024-03-01").index[-1] == now
+
+
+def test_cache_provider_serves_stored_bars(tmp_path):
+    df = make_ohlcv("CCH", "2024-01-01", "2024-03-01").rename_axis("Date")
+    cache = OHLCVCache(cache_dir=str(tmp_path))
+    cache.save("CCH", df, cache._meta(df.index[0], df.index[-1] + pd.Timedelta(days=1)))
+    provider = CacheProvider(cache)
+    got = provider.fetch_many(["CCH", "NOPE"], "2024-02-01", "2024-03-01")
+    assert list(got) == ["CCH"]
+    assert got["CCH"].index[0] >= pd.Timestamp("2024-02-01")
+    assert provider.latest_price("CCH") == pytest.approx(df["Close"].iloc[-1])
+
+
+def test_provider_without_fetch_raises_instead_of_recursing():
+    class Empty(MarketDataProvider):
+        name = "empty"
+
+    with pytest.raises(NotImplementedError):
+        Empty().fetch("X", "2024-01-01", "2024-02-01")
+    with pytest.raises(NotImplementedError):
+        Empty().fetch_many(["X"], "2024-01-01", "2024-02-01")
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from data_providers import ReplayProvider
+from equity_history import daily_equity, update_snapshots, load_snapshots
+from storage import open_engine, insert_trades, load_trade_history
+from synthetic_data import make_universe, make_trade_history
+from universe_loader import UniverseLoader
+
+
+def setup_db(tmp_path, history):
+    engine = open_engine(str(tmp_path / "equity.db"))
+    insert_trades(history.to_dict("records"), engine)
+    return engine
+
+
+def test_incremental_snapshots_match_a_full_rebuild(tmp_path):
+    frames = make_universe(20, years=1, end="2025-01-01")
+    history = make_trade_history(800, 20, start="2024-01-02")
+    history = history[history["date"] < "2024-12-20"]
+    loader = UniverseLoader(provider=ReplayProvider.from_frames(frames), cache=None).load
+    engine = setup_db(tmp_path, history)
+
+    for today in ["2024-06-03", "2024-06-04", "2024-09-16", "2024-12-31"]:
+        update_snapshots(engine, loader, today=today)
+
+    days = pd.bdate_range(history["date"].min().normalize(), "2024-12-30")
+    expected = daily_equity(history, frames, days)
+    stored = load_snapshots(engine).set_index("date")
+    assert stored.index.equals(days)
+    np.testing.assert_allclose(stored["equity"].to_numpy(), expected["equity"].to_numpy(), rtol=1e-9)
+
+
+def test_late_fill_recomputes_from_its_day(tmp_path):
+    frames = make_universe(5, years=1, end="2025-01-01")
+    history = make_trade_history(200, 5, start="2024-03-01")
+    history = history[history["date"] < "2024-09-01"]
+    loader = UniverseLoader(provider=ReplayProvider.from_frames(frames), cache=None).load
+    engine = setup_db(tmp_path, history)
+    update_snapshots(engine, loader, today="2024-10-01")
+
+    late = {"date": pd.Timestamp("2024-05-15 15:00"), "ticker": "SYN0001", "action": "BUY",
+            "price": 50.0, "qty": 10.0, "order_id": "late-fill"}
+    insert_trades([late], engine)
+    update_snapshots(engine, loader, today="2024-10-01")
+
+    full = pd.concat([history, pd.DataFrame([late])]).sort_values("date", kind="stable")
+    days = pd.bdate_range(history["date"].min().normalize(), "2024-09-30")
+    expected = daily_equity(full, frames, days)
+    stored = load_snapshots(engine).set_index("date")
+    np.testing.assert_allclose(stored["equity"].to_numpy(), expected["equity"].to_numpy(), rtol=1e-9)
+
+
+def test_closes_are_loaded_without_holding_the_write_lock(tmp_path):
+    frames = make_universe(5, years=1, end="2025-01-01")
+    history = make_trade_history(100, 5, start="2024-03-01")
+    history = history[history["date"] < "2024-06-01"]
+    engine = setup_db(tmp_path, history)
+    replay = UniverseLoader(provider=ReplayProvider.from_frames(frames), cache=None).load
+    other = open_engine(str(tmp_path / "equity.db"))  # Another process's connection
+
+    def loader(tickers, start, end):
+        # A fill logged mid-download must not wait for the snapshot build
+        insert_trades([{"date": pd.Timestamp("2024-05-20 15:00"), "ticker": "SYN0002", "action": "BUY",
+                        "price": 20.0, "qty": 3.0, "order_id": "during-download"}], other)
+        return replay(tickers, start, end)
+
+    update_snapshots(engine, loader, today="2024-07-01")
+    # The fill came in after the read, so the next update recomputes from its day
+    update_snapshots(engine, replay, today="2024-07-01")
+    full = load_trade_history(engine)
+    days = pd.bdate_range(history["date"].min().normalize(), "2024-06-28")
+    expected = daily_equity(full, frames, days)
+    stored = load_snapshots(engine).set_index("date")
+    np.testing.assert_allclose(stored["equity"].to_numpy(), expected["equity"].to_numpy(), rtol=1e-9)
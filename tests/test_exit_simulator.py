@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from exit_simulator import simulate_exits, _loop_reference, STYLES
+from indicator_engine import build_panel, compute_indicators, NO_SETUP
+from simulation_engine import run_portfolio, triple_threat_rules
+from synthetic_data import make_universe
+
+
+@pytest.fixture(scope="module")
+def market():
+    panel = build_panel(make_universe(40, years=3, gap_rate=0.02, late_listing_frac=0.1, seed=3))
+    return panel, compute_indicators(panel)
+
+
+@pytest.fixture(scope="module")
+def hits(market):
+    panel, ind = market
+    t, j = np.nonzero((ind["Setup"] != NO_SETUP) & panel.mask & ~np.isnan(ind["ATR"]))
+    hits = pd.DataFrame({"Ticker": np.array(panel.tickers)[j], "Entry_Date": panel.dates[t]})
+    return hits.sample(150, random_state=0).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("same_bar", ["stop", "target"])
+def test_vectorized_exits_match_the_bar_by_bar_loop(market, hits, style, same_bar):
+    panel, ind = market
+    fast = simulate_exits(panel, ind, hits, style, same_bar=same_bar)
+    slow = _loop_reference(panel, ind, hits, style, same_bar=same_bar)
+    assert (fast["Exit_Date"].to_numpy() == slow["Exit_Date"].to_numpy()).all()
+    assert (fast["Reason"].to_numpy() == slow["Reason"].to_numpy()).all()
+    np.testing.assert_allclose(fast["Exit_Price"].to_numpy(), slow["Exit_Price"].to_numpy(), rtol=1e-12)
+
+
+def test_atr_exits_match_run_portfolio(market):
+    panel, ind = market
+    result = run_portfolio(panel, ind, triple_threat_rules(), start_date=str(panel.dates[60].date()))
+    assert len(result.trades)
+    fast = simulate_exits(panel, ind, result.trades[["Ticker", "Entry_Date"]], "atr")
+    closed = result.trades["Exit_Date"].notna().to_numpy()
+    assert (fast["Exit_Date"].to_numpy()[closed] == result.trades["Exit_Date"].to_numpy()[closed]).all()
+    np.testing.assert_allclose(fast["Exit_Price"].to_numpy()[closed], result.trades["Exit_Price"].to_numpy()[closed])
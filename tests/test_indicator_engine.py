@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from backtester import SilentBacktester
+from indicator_engine import build_panel, compute_indicators, evaluate_latest, frame_for
+from synthetic_data import make_ohlcv
+
+START, END = "2025-01-01", "2025-03-15"
+KEYS = ["MA20", "MA50", "RSI", "RVOL", "ATR"]
+
+
+@pytest.fixture(scope="module")
+def frames():
+    frames = {f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2024-11-20", END, seed=i) for i in range(40)}
+    for i in range(0, 40, 10):  # Holes, so the gap handling is exercised
+        df = frames[f"SYN{i:03d}"]
+        frames[f"SYN{i:03d}"] = df.drop(df.index[10:13])
+    for i, bars in [(1, 30), (2, 8), (3, 5)]:  # Young listings shorter than the MA50 / RSI windows
+        frames[f"SYN{i:03d}"] = frames[f"SYN{i:03d}"].iloc[-bars:]
+    return frames
+
+
+@pytest.fixture(scope="module")
+def legacy(frames):
+    out = {}
+    for ticker, df in frames.items():
+        bot = SilentBacktester(ticker, START, END, use_cache=False)
+        bot.data = df
+        bot.apply_strategy()
+        out[ticker] = bot.data
+    return out
+
+
+def assert_same(expected, got):
+    a, b = np.asarray(expected, dtype=float), np.asarray(got, dtype=float)
+    assert (np.isnan(a) == np.isnan(b)).all()
+    finite = np.isfinite(a)
+    np.testing.assert_allclose(b[finite], a[finite], rtol=1e-9, atol=1e-9)
+
+
+def test_panel_matches_apply_strategy(frames, legacy):
+    panel = build_panel(frames)
+    ind = compute_indicators(panel)
+    for ticker, expected in legacy.items():
+        got = frame_for(panel, ind, ticker, START)
+        assert got.index.equals(expected.index)
+        for k in KEYS:
+            assert_same(expected[k], got[k])
+        assert (got["Setup"].to_numpy() == expected["Setup"].to_numpy()).all(), ticker
+
+
+def test_last_bar_paths_match_apply_strategy(frames, legacy):
+    latest = evaluate_latest(build_panel(frames), START)
+    for ticker, expected in legacy.items():
+        bot = SilentBacktester(ticker, START, END, use_cache=False)
+        bot.data = frames[ticker]
+        last = expected.iloc[-1]
+        for got in [bot.evaluate_last_bar(), latest.loc[ticker]]:
+            assert_same([last[k] for k in KEYS], [got[k] for k in KEYS])
+            assert got["Setup"] == last["Setup"]
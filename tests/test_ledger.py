@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import ledger
+from ledger import realized_pnl
+from storage import open_engine, insert_trades, load_trade_history
+from synthetic_data import make_trade_history
+
+
+def iterrows_ledger(history_df):
+    """The dashboard's original inventory walk (average cost)."""
+    inventory, closed = {}, []
+    for _, row in history_df.iterrows():
+        ticker, action, price, qty = row['ticker'], row['action'], float(row['price']), float(row['qty'])
+        if "BUY" in action:
+            inv = inventory.setdefault(ticker, {'qty': 0.0, 'cost': 0.0})
+            inv['cost'] = ((inv['qty'] * inv['cost']) + (qty * price)) / (inv['qty'] + qty)
+            inv['qty'] += qty
+        elif "SELL" in action and ticker in inventory and inventory[ticker]['qty'] > 0:
+            closed.append((price - inventory[ticker]['cost']) * qty)
+            inventory[ticker]['qty'] = max(0.0, inventory[ticker]['qty'] - qty)
+    return np.array(closed)
+
+
+def history_with_strays(n=3000):
+    history = make_trade_history(n, 20)
+    # Stray sells (nothing held / more than held) exercise the clamping rules
+    strays = history.sample(60, random_state=1).assign(action="SELL", qty=75.0, order_id=lambda d: d["order_id"] + "-x")
+    return pd.concat([history, strays]).sort_values("date", kind="stable", ignore_index=True)
+
+
+def test_average_cost_matches_the_iterrows_loop():
+    history = history_with_strays()
+    got = realized_pnl(history, "average")
+    np.testing.assert_allclose(got["pnl"].to_numpy(), iterrows_ledger(history), rtol=1e-9, atol=1e-6)
+
+
+def test_fifo_matches_lots_by_hand():
+    history = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=5),
+        "ticker": ["A", "A", "A", "B", "A"],
+        "action": ["BUY", "BUY", "SELL", "SELL", "SELL"],
+        "price": [10.0, 20.0, 30.0, 5.0, 40.0],
+        "qty": [5.0, 5.0, 7.0, 3.0, 10.0],
+    })
+    got = realized_pnl(history, "fifo")
+    # 5 @ 10 + 2 @ 20 out at 30; the stray B sell is ignored; the last sell only closes the 3 left
+    assert got["qty"].tolist() == [7.0, 3.0]
+    np.testing.assert_allclose(got["pnl"], [5 * 20 + 2 * 10, 3 * 20])
+
+
+def test_incremental_sync_matches_a_full_recompute(tmp_path):
+    history = history_with_strays(1500)
+    engine = open_engine(str(tmp_path / "ledger.db"))
+    split = len(history) * 2 // 3
+    insert_trades(history.iloc[:split].to_dict("records"), engine)
+    ledger.sync(engine)
+    insert_trades(history.iloc[split:].to_dict("records"), engine)
+    assert ledger.sync(engine) > 0
+
+    stored = ledger.load_closed_trades(engine).sort_values("fill_id", ignore_index=True)
+    expected = realized_pnl(load_trade_history(engine))
+    assert stored["fill_id"].tolist() == expected["fill_id"].tolist()
+    np.testing.assert_allclose(stored["pnl"].to_numpy(), expected["pnl"].to_numpy(), rtol=1e-9)
+    assert ledger.sync(engine) == 0
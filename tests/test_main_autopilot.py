@@ -0,0 +1,27 @@
+import pandas as pd
+import main_autopilot
+from main_autopilot import select_targets
+from backtester import RSI_OVERSOLD, RVOL_BREAKOUT
+
+
+def latest(**rows):
+    frame = pd.DataFrame.from_dict(rows, orient="index")
+    frame[["Close", "MA20", "ATR"]] = [100.0, 95.0, 2.0]
+    return frame
+
+
+def test_thresholds_follow_the_shared_constants(monkeypatch):
+    snap = latest(MOMO={"RVOL": RVOL_BREAKOUT + 0.01, "RSI": 60.0},
+                  FLAT={"RVOL": RVOL_BREAKOUT, "RSI": RSI_OVERSOLD},
+                  DIP={"RVOL": 1.0, "RSI": RSI_OVERSOLD - 0.01})
+    assert [t["ticker"] for t in select_targets(snap)] == ["MOMO", "DIP"]
+
+    monkeypatch.setattr(main_autopilot, "RVOL_BREAKOUT", RVOL_BREAKOUT + 0.5)
+    monkeypatch.setattr(main_autopilot, "RSI_OVERSOLD", RSI_OVERSOLD + 1)
+    assert [t["ticker"] for t in select_targets(snap)] == ["DIP", "FLAT"]
+
+
+def test_ranks_momentum_by_rvol_and_panic_by_rsi():
+    snap = latest(A={"RVOL": 2.0, "RSI": 50.0}, B={"RVOL": 3.0, "RSI": 50.0},
+                  C={"RVOL": 1.0, "RSI": 20.0}, D={"RVOL": 1.0, "RSI": 10.0}, E={"RVOL": 1.0, "RSI": 30.0})
+    assert [t["ticker"] for t in select_targets(snap)] == ["B", "A", "D", "C"]
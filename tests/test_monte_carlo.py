@@ -0,0 +1,36 @@
+import tracemalloc
+import numpy as np
+import pytest
+import monte_carlo
+from monte_carlo import simulate, path_stats
+
+PNL = np.random.default_rng(7).normal(0.01, 0.05, 120)
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "shuffle"])
+def test_chunk_size_does_not_change_results(method):
+    small = simulate(PNL, method, n_paths=5_000, chunk=700, seed=1)
+    big = simulate(PNL, method, n_paths=5_000, chunk=5_000, seed=1)
+    for key in small:
+        assert np.array_equal(small[key], big[key])
+
+
+def test_shuffle_keeps_final_equity():
+    result = simulate(PNL, "shuffle", n_paths=200, seed=3)
+    actual = path_stats(PNL[None, :])[0][0]
+    assert np.allclose(result["final_equity"], actual, rtol=1e-5)
+
+
+def test_long_paths_stay_within_the_element_budget(monkeypatch):
+    monkeypatch.setattr(monte_carlo, "CHUNK_ELEMENTS", 200_000)
+    tracemalloc.start()
+    simulate(PNL, n_paths=200, n_trades=20_000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # 200 x 20k paths in one go would be ~32 MB per float64 array
+    assert peak < 20e6
+
+
+def test_losing_streak_past_int16():
+    result = simulate(np.array([-0.01]), n_paths=2, n_trades=40_000)
+    assert result["losing_streak"].tolist() == [40_000, 40_000]
@@ -0,0 +1,108 @@
+import re
+import json
+import time
+import html
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+import pytest
+from notifier import TelegramDispatcher, _pack, MAX_MESSAGE_CHARS
+from rate_limit import RateLimiter
+
+BAD_MARKUP = re.compile(r"<(?!/?(b|i|u|s|code|pre)>)|&(?!(lt|gt|amp|quot);)")
+
+
+@pytest.fixture
+def telegram():
+    """Local Telegram stand-in: plays `script` status codes first, then answers 200.
+
+    Like the real API it rejects HTML-mode text with unparseable entities (400).
+    """
+    stand_in = {"script": [], "received": [], "posts": []}
+
+    class StandIn(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+            text = body["text"][0]
+            stand_in["posts"].append(time.monotonic())
+            outcome = stand_in["script"].pop(0) if stand_in["script"] else 200
+            if outcome == 200 and BAD_MARKUP.search(text):
+                outcome = 400
+            if outcome == 200:
+                stand_in["received"].append(text)
+                payload = {"ok": True}
+            elif outcome == 429:
+                payload = {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.3}}
+            else:
+                payload = {"ok": False, "error_code": outcome, "description": "Bad Request: can't parse entities"}
+            data = json.dumps(payload).encode()
+            self.send_response(outcome)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stand_in["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield stand_in
+    server.shutdown()
+
+
+def make_dispatcher(telegram):
+    return TelegramDispatcher("TEST", "42", api_url=telegram["url"], coalesce_seconds=0.2,
+                              limiter=RateLimiter(rate=100, per=1.0, burst=100))
+
+
+def delivered(telegram):
+    return [m for text in telegram["received"] for m in html.unescape(text).split("\n\n")]
+
+
+def test_burst_is_coalesced_and_delivered_once(telegram):
+    dispatcher = make_dispatcher(telegram)
+    alerts = [f"🛡️ PROFIT LOCKED: SYN{i:04d} stop ${100 + i}" for i in range(25)]
+    for alert in alerts:
+        dispatcher.send(alert)
+    assert dispatcher.flush(timeout=10)
+    assert delivered(telegram) == alerts
+    assert len(telegram["received"]) == 1
+    assert dispatcher.stats["sent"] == 1 and dispatcher.stats["retries"] == 0
+
+
+def test_unescaped_markup_does_not_lose_the_batch(telegram):
+    dispatcher = make_dispatcher(telegram)
+    alerts = ["✅ BUY NVDA", "❌ ORDER FAILED AMD: <APIError> qty & notional both set", "✅ BUY TSLA"]
+    for alert in alerts:
+        dispatcher.send(alert)
+    assert dispatcher.flush(timeout=10)
+    assert delivered(telegram) == alerts
+
+
+def test_server_errors_are_retried_and_429_waits_retry_after(telegram):
+    telegram["script"] = [500, 429]
+    dispatcher = make_dispatcher(telegram)
+    dispatcher.send("🌙 Overnight screen done")
+    assert dispatcher.flush(timeout=10)
+    assert delivered(telegram) == ["🌙 Overnight screen done"]
+    assert dispatcher.stats["posts"] == 3 and dispatcher.stats["retries"] == 2
+    # The post after the 429 waited at least its retry_after
+    assert telegram["posts"][2] - telegram["posts"][1] >= 0.3
+
+
+def test_flush_reports_undelivered_alerts(telegram):
+    telegram["script"] = [500]
+    dispatcher = make_dispatcher(telegram)
+    dispatcher.send("still failing")
+    assert dispatcher.flush(timeout=0.5) is False
+    assert dispatcher.flush(timeout=10) is True
+    assert delivered(telegram) == ["still failing"]
+
+
+def test_pack_respects_the_message_limit():
+    chunks = _pack(["&" * MAX_MESSAGE_CHARS, "x" * 3000, "y" * 3000])
+    assert [count for _, count in chunks] == [1, 1, 1]
+    assert all(len(text) <= MAX_MESSAGE_CHARS for text, _ in chunks)
+    assert chunks[0][0].endswith("&amp;")
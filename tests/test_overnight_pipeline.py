@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+from overnight_pipeline import SCAN_DAYS, run_overnight, morning_scan, load_overnight, previous_session
+from data_providers import ReplayProvider
+from indicator_engine import build_panel, evaluate_latest
+from live_indicators import IndicatorBook
+from universe_loader import UniverseLoader
+from main_autopilot import select_targets
+from synthetic_data import make_universe
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return make_universe(200, years=1, end="2025-01-01", seed=3)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"book_path": str(tmp_path / "book.json")}
+
+
+def sessions(frames):
+    return sorted(set().union(*(df.index for df in frames.values())))
+
+
+def overnight(frames, day, paths, universe=None):
+    loader = UniverseLoader(provider=ReplayProvider.from_frames(frames, now=day))
+    return run_overnight(universe or list(frames), loader, now=day + pd.Timedelta(hours=17), **paths)
+
+
+def at_935(frames, day):
+    """The frames as a provider has them five minutes into `day`: a flat bar on a sliver of volume."""
+    partial = {}
+    for ticker, df in frames.items():
+        df = df.copy()
+        if day in df.index:
+            df.loc[day, ["High", "Low", "Close"]] = df.loc[day, "Open"]
+            df.loc[day, "Volume"] = df.loc[day, "Volume"] // 78
+        partial[ticker] = df
+    return partial
+
+
+def full_scan(frames, day):
+    """main_autopilot's fallback: the SCAN_DAYS window up to today (exclusive), tail-only scored."""
+    start = (day - pd.Timedelta(days=SCAN_DAYS)).strftime("%Y-%m-%d")
+    loader = UniverseLoader(provider=ReplayProvider.from_frames(frames, now=day))
+    return evaluate_latest(build_panel(loader.load(list(frames), start, day.strftime("%Y-%m-%d"))), start)
+
+
+def test_morning_scan_matches_the_full_scan_on_a_partial_bar(frames, paths):
+    days = sessions(frames)
+    for prev, day in zip(days[-4:-1], days[-3:]):
+        overnight(frames, prev, paths)
+        morning = at_935(frames, day)
+        fast = morning_scan(list(frames), now=day + pd.Timedelta(hours=9, minutes=35), **paths)
+        full = full_scan(morning, day)
+        assert sorted(fast.index) == sorted(full.index)
+        assert (fast["Date"] == prev).all()
+        cols = ["Close", "MA20", "RSI", "RVOL", "ATR"]
+        assert (fast[cols] - full.loc[fast.index, cols]).abs().max().max() < 1e-9
+        assert [t["ticker"] for t in select_targets(fast)] == [t["ticker"] for t in select_targets(full)]
+
+
+def test_names_the_overnight_run_missed_are_scored_the_same_way(frames, paths):
+    days = sessions(frames)
+    prev, day = days[-2], days[-1]
+    universe = list(frames)
+    overnight(frames, prev, paths, universe=universe[:150])
+    morning = at_935(frames, day)
+    loader = UniverseLoader(provider=ReplayProvider.from_frames(morning, now=day))
+    fast = morning_scan(universe, loader, now=day + pd.Timedelta(hours=9, minutes=35), **paths)
+    full = full_scan(morning, day)
+    cols = ["Close", "MA20", "RSI", "RVOL", "ATR"]
+    assert len(fast) == len(full)
+    assert (fast[cols] - full.loc[fast.index, cols]).abs().max().max() < 1e-9
+
+
+@pytest.mark.parametrize("now, expected", [
+    ("2025-05-27 09:35", "2025-05-23"),  # Tuesday after Memorial Day
+    ("2025-04-21 09:35", "2025-04-17"),  # Monday after Good Friday
+    ("2025-07-07 09:35", "2025-07-03"),  # Monday after Independence Day (a Friday)
+    ("2025-06-11 09:35", "2025-06-10"),
+])
+def test_previous_session_skips_exchange_holidays(now, expected):
+    assert previous_session(pd.Timestamp(now)) == pd.Timestamp(expected)
+
+
+def test_overnight_state_after_a_holiday_is_used(paths):
+    book = IndicatorBook(paths["book_path"])
+    book.seed("SYN", make_universe(1, years=1, end="2025-05-24")["SYN0000"])
+    book.save()
+    assert book["SYN"].last_date == pd.Timestamp("2025-05-23")
+    assert load_overnight(pd.Timestamp("2025-05-27 09:35"), **paths) is not None
+    assert load_overnight(pd.Timestamp("2025-05-28 09:35"), **paths) is None
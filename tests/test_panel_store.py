@@ -0,0 +1,33 @@
+import pickle
+import multiprocessing as mp
+import numpy as np
+import pytest
+from indicator_engine import build_panel, compute_indicators
+from panel_store import share_panel, _scan_worker
+from synthetic_data import make_ohlcv
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return {f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2021-01-01", "2024-01-01", seed=i) for i in range(30)}
+
+
+def test_store_round_trips_the_panel(frames):
+    panel = build_panel(frames)
+    ind = compute_indicators(panel)
+    store = share_panel(panel, ind)
+    assert store.frame("SYN007").equals(frames["SYN007"].astype(float).rename_axis("Date"))
+    for field in ["Close", "Volume"]:
+        np.testing.assert_array_equal(store.panel[field], panel[field])
+    np.testing.assert_array_equal(store.arrays["RSI"], ind["RSI"])
+    # Workers receive the path, not the arrays
+    assert len(pickle.dumps(store)) < 1000
+    assert share_panel(panel, ind) is store
+
+
+def test_spawned_workers_read_the_shared_file(frames):
+    store = share_panel(build_panel(frames))
+    tickers = list(frames)
+    with mp.get_context("spawn").Pool(2) as pool:
+        spawned = pool.starmap(_scan_worker, [(store, tickers[k::2], "2021-06-01") for k in range(2)])
+    assert sum(r[0] for r in spawned) == sum(_scan_worker(store, tickers[k::2], "2021-06-01")[0] for k in range(2))
@@ -0,0 +1,24 @@
+import pytest
+import param_sweep
+from indicator_engine import build_panel, compute_indicators
+from synthetic_data import make_ohlcv
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return {f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2021-01-01", "2024-01-01", seed=i) for i in range(30)}
+
+
+def test_spawn_sweep_matches_fork(frames, monkeypatch):
+    panel = build_panel(frames)
+    ind = compute_indicators(panel)
+    grid = {"rsi_max": [30, 35], "stop_atr_mult": [2.0, 3.0]}
+    cols = ["rsi_max", "stop_atr_mult", "total_return", "trades"]
+    runs = {}
+    for method in ["fork", "spawn"]:
+        monkeypatch.setattr(param_sweep, "START_METHOD", method)
+        result = param_sweep.run_sweep(panel, ind, grid, workers=2, start_date="2021-03-01", results_file=None)
+        runs[method] = result[cols].sort_values(cols[:2], ignore_index=True)
+    serial = param_sweep.run_sweep(panel, ind, grid, workers=1, start_date="2021-03-01", results_file=None)
+    assert runs["fork"].equals(runs["spawn"])
+    assert runs["fork"].equals(serial[cols].sort_values(cols[:2], ignore_index=True))
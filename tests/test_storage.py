@@ -0,0 +1,82 @@
+import os
+import multiprocessing as mp
+import pandas as pd
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+import ledger
+from storage import open_engine, get_engine, get_readonly_engine, insert_trades, load_trade_history, QUARANTINE_TABLE
+from synthetic_data import make_trade_history
+
+
+def _writer(path, n, wid):
+    engine = get_engine(path)
+    for i in range(n):
+        insert_trades([{"date": pd.Timestamp.now(), "ticker": f"W{wid}", "action": "BUY", "price": 1.0,
+                        "qty": 1.0, "order_id": f"w{wid}-{i}"}], engine)
+
+
+def _reader(path, n):
+    engine = get_readonly_engine(path)
+    for _ in range(n):
+        load_trade_history(engine)
+
+
+def test_concurrent_writers_lose_no_rows(tmp_path):
+    # The autopilot, the monitor and the dashboard hit the same file at once
+    path = str(tmp_path / "contention.db")
+    open_engine(path)  # Create + migrate once up front
+    ctx = mp.get_context("spawn")
+    n = 100
+    procs = ([ctx.Process(target=_writer, args=(path, n, w)) for w in range(4)]
+             + [ctx.Process(target=_reader, args=(path, 30)) for _ in range(2)])
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+    assert [p.exitcode for p in procs] == [0] * len(procs)  # "database is locked" would exit 1
+    logged = load_trade_history(open_engine(path))
+    assert len(logged) == logged["order_id"].nunique() == 4 * n
+
+
+def test_readonly_engine_reads_without_writing(tmp_path):
+    path = str(tmp_path / "trades.db")
+    engine = open_engine(path)
+    insert_trades(make_trade_history(200, n_tickers=5).to_dict("records"), engine)
+    ledger.sync(engine)
+
+    ro = get_readonly_engine(path)
+    closed = ledger.load_closed_trades(ro)
+    assert len(closed) and len(closed) == len(ledger.load_closed_trades(engine))
+    with pytest.raises(Exception, match="readonly"):
+        with ro.begin() as conn:
+            conn.execute(text("DELETE FROM closed_trades"))
+
+
+def test_readonly_engine_never_creates_the_file(tmp_path):
+    path = str(tmp_path / "missing.db")
+    with pytest.raises(Exception):
+        ledger.load_closed_trades(get_readonly_engine(path))
+    assert not os.path.exists(path)
+
+
+def test_legacy_rows_that_cannot_be_copied_are_quarantined(tmp_path, capsys):
+    path = str(tmp_path / "legacy.db")
+    engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE trades (date TEXT, ticker TEXT, action TEXT, price REAL, qty REAL, order_id TEXT)"))
+        conn.execute(text("INSERT INTO trades VALUES (:date, :ticker, :action, :price, :qty, :order_id)"), [
+            {"date": "2024-01-02 15:00:00", "ticker": "NVDA", "action": "BUY", "price": 100.0, "qty": 5, "order_id": "a"},
+            {"date": "2024-01-03 15:00:00", "ticker": "NVDA", "action": "SELL", "price": None, "qty": 5, "order_id": "b"},
+            {"date": None, "ticker": "AMD", "action": "BUY", "price": 50.0, "qty": 1, "order_id": "c"},
+            {"date": "2024-01-04 15:00:00", "ticker": "NVDA", "action": "BUY", "price": 101.0, "qty": 5, "order_id": "a"},
+        ])
+    engine.dispose()
+
+    migrated = open_engine(path)
+    assert load_trade_history(migrated)["order_id"].tolist() == ["a"]
+    with migrated.connect() as conn:
+        parked = conn.execute(text(f"SELECT source, order_id FROM {QUARANTINE_TABLE} ORDER BY order_id")).fetchall()
+    assert [tuple(r) for r in parked] == [("trades", "b"), ("trades", "c")]
+    out = capsys.readouterr().out
+    assert "2 row(s) of trades" in out and "1 duplicate order id(s) skipped" in out
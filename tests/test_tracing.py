@@ -0,0 +1,52 @@
+import json
+import time
+import pytest
+import tracing
+from tracing import Tracer, load_runs
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    tracer = Tracer(enabled=True, metrics_file=str(tmp_path / "metrics.jsonl"), prom_file=str(tmp_path / "metrics.prom"))
+    monkeypatch.setattr(tracing, "TRACER", tracer)
+    return tracer
+
+
+def test_runs_are_written_and_read_back(tracer):
+    work = tracing.traced("test.work")(lambda: time.sleep(0.01))
+    for _ in range(2):
+        with tracing.run("autopilot"):
+            with tracing.span("autopilot.fetch"):
+                work()
+            tracing.count("autopilot.targets", 2)
+
+    runs = load_runs(tracer.metrics_file)
+    fetch = runs[runs["span"] == "autopilot.fetch"]
+    assert len(fetch) == 2 and (fetch["run"] == "autopilot").all()
+    assert (fetch["mean"] >= 0.01).all()
+    assert set(runs["span"]) == {"autopilot.fetch", "autopilot.run", "test.work"}
+    with open(tracer.metrics_file) as f:
+        assert json.loads(f.readline())["counters"] == {"autopilot.targets": 2}
+    with open(tracer.prom_file) as f:
+        prom = f.read()
+    assert 'swing_span_seconds_count{run="autopilot",span="autopilot.fetch"} 1' in prom
+    assert 'swing_events_total{run="autopilot",name="autopilot.targets"} 2' in prom
+
+
+def test_disabled_tracer_records_nothing(tracer):
+    tracer.enabled = False
+    with tracing.run("autopilot"):
+        with tracing.span("autopilot.fetch"):
+            pass
+        tracing.count("autopilot.targets")
+    assert tracer.spans == {} and tracer.counters == {}
+    assert load_runs(tracer.metrics_file).empty
+
+
+def test_half_written_line_is_skipped(tracer):
+    with tracing.run("monitor"):
+        with tracing.span("monitor.poll"):
+            pass
+    with open(tracer.metrics_file, "a") as f:
+        f.write('{"run": "monitor", "spa')
+    assert list(load_runs(tracer.metrics_file)["span"].unique()) == ["monitor.poll", "monitor.run"]
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from alpaca.trading.enums import OrderSide
+import trade_monitor
+from trade_monitor import TradeMonitor
+from storage import open_engine, load_trade_history
+from fake_broker import FakeBroker
+from replay_stream import ReplayStreamServer, order_event
+
+NOW = pd.Timestamp.now(tz="UTC").floor("s")
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.setattr(trade_monitor, "send_msg", lambda msg: None)
+    return TradeMonitor(client=FakeBroker(), db=open_engine(str(tmp_path / "trades.db")))
+
+
+def test_bracket_leg_filled_weeks_after_submission_is_logged(monitor):
+    broker = monitor.client
+    entry = NOW - pd.Timedelta(days=30)
+    broker.orders.append(broker.order("NVDA", OrderSide.BUY, 10, entry, filled_at=entry, price=100.0, id="buy"))
+    stop_leg = broker.order("NVDA", OrderSide.SELL, 10, entry, status="held", id="stop")
+    broker.orders.append(stop_leg)
+    # Unrelated orders submitted and filled since then
+    for i in range(3):
+        ts = NOW - pd.Timedelta(days=2 - i)
+        broker.orders.append(broker.order("AMD", OrderSide.BUY, 5, ts, filled_at=ts, price=50.0, id=f"amd{i}"))
+    monitor._ensure_ledger()
+    monitor._save_watermark(entry - pd.Timedelta(minutes=1), set())
+    monitor.check_fills()
+    assert set(load_trade_history(monitor.engine)["order_id"]) == {"buy", "amd0", "amd1", "amd2"}
+    assert monitor.open_ids == {"stop"}
+    monitor.check_fills()  # Nothing new: the next poll only asks for orders submitted since this one
+
+    # The leg fills weeks after submission: found by id, the closed-order window stays at the last poll
+    stop_leg.status, stop_leg.filled_qty, stop_leg.filled_avg_price, stop_leg.filled_at = "filled", 10, 95.0, NOW
+    windows = []
+    get_orders = broker.get_orders
+    broker.get_orders = lambda filter=None: windows.append(filter.after) or get_orders(filter)
+    restarted = TradeMonitor(client=broker, db=monitor.engine)  # Open ids and watermark survive a restart
+    restarted.check_fills()
+    assert "stop" in set(load_trade_history(monitor.engine)["order_id"])
+    assert min(pd.Timestamp(w) for w in windows if w is not None) > NOW - pd.Timedelta(hours=1)
+    assert restarted.open_ids == set()
+
+
+def test_paging_keeps_orders_sharing_the_last_timestamp(monitor, monkeypatch):
+    monkeypatch.setattr(trade_monitor, "POLL_PAGE_SIZE", 3)
+    broker = monitor.client
+    for i in range(7):
+        ts = NOW - pd.Timedelta(hours=10 - i // 2)  # Pairs share a submission time, like bracket legs
+        broker.orders.append(broker.order(f"T{i}", OrderSide.BUY, 1, ts, filled_at=ts, price=10.0, id=f"o{i}"))
+    monitor.check_fills()
+    assert sorted(load_trade_history(monitor.engine)["order_id"]) == [f"o{i}" for i in range(7)]
+
+
+def test_history_fills_are_logged_once(monitor):
+    from synthetic_data import make_trade_history
+    history = make_trade_history(200, start=(NOW - pd.Timedelta(days=1)).tz_localize(None))
+    monitor.client = FakeBroker(history)
+    monitor.check_fills()
+    monitor.check_fills()
+    logged = load_trade_history(monitor.engine)
+    assert len(logged) == logged["order_id"].nunique() == len(history)
+
+
+class FakeBacktester:
+    """SilentBacktester stand-in: fetch_data() returns synthetic bars up to (excluding) end_date."""
+    fetches = []
+
+    def __init__(self, ticker, start_date, end_date):
+        self.ticker, self.end = ticker, pd.Timestamp(end_date)
+
+    def fetch_data(self):
+        from synthetic_data import make_ohlcv
+        FakeBacktester.fetches.append(self.ticker)
+        return make_ohlcv(self.ticker, self.end - pd.Timedelta(days=120), self.end)
+
+
+def test_signal_state_is_reseeded_per_ticker(tmp_path, monkeypatch):
+    from live_indicators import IndicatorBook
+    from synthetic_data import make_ohlcv
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(trade_monitor, "SilentBacktester", FakeBacktester)
+    FakeBacktester.fetches = []
+    today = pd.Timestamp.now().normalize()
+    book = IndicatorBook()
+    book.seed("FRESH", make_ohlcv("FRESH", today - pd.Timedelta(days=120), today))
+    book.seed("STALE", make_ohlcv("STALE", today - pd.Timedelta(days=120), today - pd.Timedelta(days=10)))
+    book.save()  # saved_at is today for both, but only FRESH reaches the previous session
+
+    monitor = TradeMonitor(client=FakeBroker(), db=open_engine(str(tmp_path / "trades.db")))
+    monitor.refresh_signal("FRESH", 100.0)
+    monitor.refresh_signal("STALE", 100.0)
+    monitor.refresh_signal("STALE", 101.0)
+    assert FakeBacktester.fetches == ["STALE"]
+    assert monitor.indicators["STALE"].last_date >= today - pd.Timedelta(days=4)
+
+
+def test_live_rvol_needs_the_session_volume(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(trade_monitor, "SilentBacktester", FakeBacktester)
+    monitor = TradeMonitor(client=FakeBroker(), db=open_engine(str(tmp_path / "trades.db")))
+    price = float(FakeBacktester("NVDA", None, pd.Timestamp.now().normalize()).fetch_data()["Close"].iloc[-1])
+
+    snap = monitor.refresh_signal("NVDA", price * 1.2)
+    assert pd.isna(snap["RVOL"]) and snap["Setup"] != "MOMENTUM_BREAK"
+    snap = monitor.refresh_signal("NVDA", price * 1.2, volume=monitor.indicators["NVDA"].avg_vol.mean() * 5)
+    assert snap["RVOL"] > 1.5
+
+
+@pytest.fixture
+def held(monitor, tmp_path, monkeypatch):
+    """The monitor holding NVDA at $110 with its bracket stop leg still at $90."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(trade_monitor, "SilentBacktester", FakeBacktester)
+    broker = monitor.client
+    broker.positions.append(SimpleNamespace(symbol="NVDA", current_price="110.0"))
+    stop = broker.order("NVDA", OrderSide.SELL, 10, NOW, status="held", id="nvda-stop")
+    stop.stop_price = 90.0
+    broker.orders.append(stop)
+    return monitor
+
+
+def test_concurrent_trailing_passes_move_the_stop_once(held):
+    held.client.latency = 0.05  # Both passes are mid-flight at the same time without the lock
+    threads = [threading.Thread(target=held.update_trailing_stops) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert held.client.replaced == [("nvda-stop", 104.5)]
+
+
+def test_stream_fills_are_logged_once_across_a_reconnect(held):
+    events = [order_event("partial_fill", "buy-nvda", "NVDA", "buy", 10, price=100.0, filled_qty=4),
+              order_event("fill", "buy-nvda", "NVDA", "buy", 10, price=100.0),
+              order_event("fill", "buy-amd", "AMD", "buy", 5, price=50.0),
+              order_event("fill", "sell-msft", "MSFT", "sell", 3, price=400.0)]
+
+    async def replay():
+        fills, done = [], asyncio.Event()
+
+        def on_fill(data):
+            fills.append(data["order"]["id"])
+            if len(fills) == 3:
+                done.set()
+
+        # The first socket drops after the AMD fill; the reconnect replays everything again
+        async with ReplayStreamServer(events, port=0, interval=0.01, drop_after=3) as server:
+            task = asyncio.create_task(held.consume_stream(server.url, "key", "secret", on_fill=on_fill))
+            await asyncio.wait_for(done.wait(), timeout=10)
+            task.cancel()
+            await asyncio.gather(*held._background)  # Fill-triggered ledger sync + trailing pass
+        return server, fills
+
+    server, fills = asyncio.run(replay())
+    assert server.connections == 2
+    assert fills == ["buy-nvda", "buy-amd", "sell-msft"]
+    logged = load_trade_history(held.engine)
+    assert sorted(logged["order_id"]) == ["buy-amd", "buy-nvda", "sell-msft"]
+    assert held.client.replaced == [("nvda-stop", 104.5)]
@@ -0,0 +1,87 @@
+import threading
+import pandas as pd
+import pytest
+from data_cache import OHLCVCache
+from data_providers import ReplayProvider
+from universe_loader import UniverseLoader
+from synthetic_data import make_universe
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return make_universe(120, years=1, end="2025-01-01", seed=11)
+
+
+class FlakySource:
+    """Bulk endpoint over synthetic bars: chunks holding a `flaky` symbol fail their first
+    `flaky_times` requests, chunks holding a `broken` symbol fail every time."""
+
+    def __init__(self, frames, flaky=(), flaky_times=1, broken=()):
+        self.frames = frames
+        self.flaky, self.flaky_times, self.broken = set(flaky), flaky_times, set(broken)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, tickers, start, end):
+        with self.lock:
+            self.calls.append(tuple(tickers))
+            tries = sum(1 for c in self.calls if set(c) == set(tickers))
+        if self.broken & set(tickers) or (self.flaky & set(tickers) and tries <= self.flaky_times):
+            raise ConnectionError("simulated 502 from data vendor")
+        return {t: df.loc[(df.index >= start) & (df.index < end)] for t, df in self.frames.items() if t in tickers}
+
+
+def loader(source, **kwargs):
+    return UniverseLoader(fetch_many=source, chunk_size=10, backoff=0.001, cache=None, padding_days=0, **kwargs)
+
+
+def test_flaky_chunks_are_retried(frames):
+    universe = list(frames)
+    source = FlakySource(frames, flaky=[universe[5]], flaky_times=2)
+    ldr = loader(source)
+    loaded = ldr.load(universe, "2024-06-01", "2025-01-01")
+    assert len(loaded) == len(universe) and not ldr.failures
+    assert len(source.calls) == len(universe) // 10 + 2
+    assert ldr.stats["requests"] == len(universe) // 10
+
+
+def test_failures_are_recorded_and_reported(frames, capsys):
+    universe = list(frames) + ["DEAD"]
+    broken = universe[:10]  # One whole chunk fails every attempt
+    source = FlakySource(frames, broken=[broken[0]])
+    ldr = loader(source, max_attempts=3)
+    loaded = ldr.load(universe, "2024-06-01", "2025-01-01")
+
+    assert set(loaded) == set(universe) - set(broken) - {"DEAD"}
+    assert sum(1 for c in source.calls if broken[0] in c) == 3
+    assert all("after 3 attempts" in ldr.failures[t] for t in broken)
+    assert ldr.failures["DEAD"] == "no data returned"
+    assert ldr.stats["failed"] == len(broken) + 1
+
+    ldr.report()
+    out = capsys.readouterr().out
+    assert f"{len(loaded)}/{len(universe)} tickers" in out and "11 failed" in out
+    assert "DEAD: no data returned" in out and f"{broken[0]}: download failed" in out
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(8, 10), (4, 7), (16, 50)])
+def test_results_do_not_depend_on_workers_or_chunking(frames, workers, chunk_size):
+    provider = ReplayProvider.from_frames(frames)
+    serial = UniverseLoader(provider=provider, chunk_size=len(frames), max_workers=1).load(list(frames), "2024-03-01", "2024-12-01")
+    threaded = UniverseLoader(provider=provider, chunk_size=chunk_size, max_workers=workers).load(list(frames), "2024-03-01", "2024-12-01")
+    assert list(threaded) == list(serial)
+    for ticker, df in serial.items():
+        pd.testing.assert_frame_equal(threaded[ticker], df)
+
+
+def test_second_load_is_served_from_the_cache(frames, tmp_path):
+    source = FlakySource(frames)
+    cache = OHLCVCache(cache_dir=str(tmp_path), max_age_minutes=10 ** 9)
+    first = UniverseLoader(fetch_many=source, chunk_size=25, cache=cache).load(list(frames), "2024-03-01", "2024-12-01")
+    calls = len(source.calls)
+
+    ldr = UniverseLoader(fetch_many=source, chunk_size=25, cache=cache)
+    again = ldr.load(list(frames), "2024-03-01", "2024-12-01")
+    assert len(source.calls) == calls and ldr.stats["cache_hits"] == len(frames)
+    for ticker, df in first.items():
+        pd.testing.assert_frame_equal(again[ticker], df, check_freq=False)
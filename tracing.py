@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from datetime import datetime
+
+# Timing spans and counters for the hot paths. Off unless SWING_TRACE=1: then
+# `traced` hands back the undecorated function and `span` a shared no-op, so
+# the instrumented code pays one flag check at most. When on, every span
+# lands in a per-run histogram; flush() appends the run to a JSON-lines
+# history (what the dashboard plots) and rewrites a Prometheus text file.
+
+# --- CONFIGURATION ---
+ENABLED = os.getenv("SWING_TRACE", "0").lower() not in ("", "0", "false", "no")
+METRICS_FILE = os.getenv("SWING_METRICS_FILE", "metrics.jsonl")   # One JSON object per flushed run
+PROM_FILE = os.getenv("SWING_PROM_FILE", "metrics.prom")          # Latest run per process, Prometheus text format
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]  # Seconds (upper bounds)
+FLUSH_SECONDS = 300  # Long-running processes (the monitor) flush this often
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Histograms (count, sum, max, bucket counts) per span name + counters, for the current run."""
+
+    def __init__(self, enabled=ENABLED, metrics_file=METRICS_FILE, prom_file=PROM_FILE):
+        self.enabled = enabled
+        self.metrics_file = metrics_file
+        self.prom_file = prom_file
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.spans = {}
+        self.counters = {}
+        self.started = time.time()
+
+    def record(self, name, seconds):
+        with self._lock:
+            h = self.spans.get(name)
+            if h is None:
+                h = self.spans[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(BUCKETS) + 1)}
+            h["count"] += 1
+            h["sum"] += seconds
+            h["max"] = max(h["max"], seconds)
+            h["buckets"][_bucket(seconds)] += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def flush(self, run):
+        """Writes the current run (JSON line + Prometheus file) and starts a new one."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            snapshot = {"run": run, "at": datetime.now().isoformat(timespec="seconds"),
+                        "seconds": round(time.time() - self.started, 3), "spans": self.spans, "counters": self.counters}
+            self._reset()
+        if not snapshot["spans"] and not snapshot["counters"]:
+            return None
+        try:
+            with open(self.metrics_file, "a") as f:
+                f.write(json.dumps(snapshot) + "\n")
+            if self.prom_file:
+                tmp_path = f"{self.prom_file}.tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(prometheus_text(snapshot))
+                os.replace(tmp_path, self.prom_file)
+        except OSError as e:
+            print(f"⚠️ Metrics Write Error: {e}")
+        return snapshot
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "t0")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+def _bucket(seconds):
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(BUCKETS)
+
+
+def prometheus_text(snapshot):
+    """One run as Prometheus exposition text (cumulative buckets, as the format expects)."""
+    run = snapshot["run"]
+    lines = ["# HELP swing_span_seconds Time spent in instrumented code paths",
+             "# TYPE swing_span_seconds histogram"]
+    for name, h in sorted(snapshot["spans"].items()):
+        labels = f'run="{run}",span="{name}"'
+        total = 0
+        for bound, n in zip(BUCKETS + ["+Inf"], h["buckets"]):
+            total += n
+            lines.append(f'swing_span_seconds_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f"swing_span_seconds_sum{{{labels}}} {h['sum']:.6f}")
+        lines.append(f"swing_span_seconds_count{{{labels}}} {h['count']}")
+    lines += ["# HELP swing_events_total Counted events", "# TYPE swing_events_total counter"]
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f'swing_events_total{{run="{run}",name="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+TRACER = Tracer()
+
+
+def span(name):
+    """`with span("autopilot.ranking"): ...` -- a no-op unless tracing is on."""
+    return _Span(TRACER, name) if TRACER.enabled else _NO_SPAN
+
+
+def count(name, n=1):
+    TRACER.count(name, n)
+
+
+def flush(run):
+    return TRACER.flush(run)
+
+
+def traced(name):
+    """Decorator: times every call as span `name`. Tracing off -> the function is returned as is."""
+    def decorate(fn):
+        if not TRACER.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class run:
+    """`with tracing.run("autopilot"):` -- times the whole run as `<name>.run` and flushes it at the end."""
+
+    def __init__(self, name):
+        self.name = name
+        self._span = None
+
+    def __enter__(self):
+        if TRACER.enabled:
+            TRACER.flush(f"{self.name}.before")  # Anything recorded before the run (imports, setup) stays separate
+            self._span = TRACER.span(f"{self.name}.run").__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if self._span is not None:
+            self._span.__exit__(*exc)
+            TRACER.flush(self.name)
+        return False
+
+
+def load_runs(path=METRICS_FILE):
+    """metrics.jsonl -> one row per (run, span): at, run, span, count, total, mean, max (seconds)."""
+    import pandas as pd
+    rows = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    snap = json.loads(line)
+                except ValueError:
+                    continue  # A half-written last line from a crash
+                for name, h in snap.get("spans", {}).items():
+                    rows.append({"at": snap["at"], "run": snap["run"], "span": name, "count": h["count"],
+                                 "total": h["sum"], "mean": h["sum"] / h["count"] if h["count"] else 0.0, "max": h["max"]})
+    except OSError:
+        pass
+    df = pd.DataFrame(rows, columns=["at", "run", "span", "count", "total", "mean", "max"])
+    df["at"] = pd.to_datetime(df["at"])
+    return df
+
+
+if __name__ == "__main__":
+    # python tracing.py           -> summary of the metrics history
+    # python tracing.py --demo    -> offline: overhead with tracing off vs on, plus a sample run file
+    if "--demo" in sys.argv:
+        import tempfile
+        n = 1_000_000
+
+        def work():
+            return None
+
+        TRACER.enabled = False
+        plain = traced("demo.call")(work)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            plain()
+        t_plain = (time.perf_counter() - t0) / n
+        t0 = time.perf_counter()
+        for _ in range(n):
+            with span("demo.span"):
+                pass
+        t_off = (time.perf_counter() - t0) / n
+
+        TRACER.enabled = True
+        wrapped = traced("demo.call")(work)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            wrapped()
+        t_on = (time.perf_counter() - t0) / n
+        print(f"Per call: untraced {t_plain * 1e9:.0f} ns | span with tracing off {t_off * 1e9:.0f} ns | "
+              f"traced with tracing on {t_on * 1e9:.0f} ns")
+
+        work_dir = tempfile.mkdtemp()
+        TRACER.metrics_file = os.path.join(work_dir, "metrics.jsonl")
+        TRACER.prom_file = os.path.join(work_dir, "metrics.prom")
+        TRACER._reset()
+        for day in range(3):
+            with run("autopilot"):
+                for stage, seconds in [("autopilot.fetch", 0.03), ("autopilot.indicators", 0.01), ("autopilot.ranking", 0.002)]:
+                    with span(stage):
+                        time.sleep(seconds * (1 + day / 2))
+                count("autopilot.targets", 2)
+        print(load_runs(TRACER.metrics_file).groupby("span")[["count", "mean", "max"]].agg({"count": "sum", "mean": "mean", "max": "max"}).round(4))
+        with open(TRACER.prom_file) as f:
+            print("".join(f.readlines()[:4]) + "...")
+    else:
+        df = load_runs()
+        if df.empty:
+            print(f"❌ No metrics in {METRICS_FILE} (run with SWING_TRACE=1)")
+        else:
+            last = df[df["at"] == df.groupby("run")["at"].transform("max")]
+            print(last.sort_values(["run", "total"], ascending=[True, False]).to_string(index=False))
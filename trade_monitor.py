@@ -1,104 +1,351 @@
 import time
 import os
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
 import pandas as pd
-import sqlalchemy
 import math
 from dotenv import load_dotenv
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import GetOrdersRequest, ReplaceOrderRequest
 from alpaca.trading.enums import OrderSide, QueryOrderStatus
+from alpaca.common.enums import Sort
 from datetime import datetime, timedelta
 import pytz
 from notifier import send_msg
+from backtester import SilentBacktester
+from live_indicators import IndicatorBook
+from overnight_pipeline import previous_session
+from storage import get_engine, insert_trades, known_order_ids, get_state, set_state
+import ledger
+import equity_history
+import tracing
+from tracing import traced
 
 # --- CONFIGURATION ---
 load_dotenv()
 API_KEY = os.getenv("ALPACA_KEY")
 SECRET_KEY = os.getenv("ALPACA_SECRET")
 PAPER = os.getenv("ALPACA_PAPER") == "True"
-
-if not API_KEY or not SECRET_KEY:
-    raise ValueError("❌ Monitor Error: API Keys missing in .env")
-
-engine = sqlalchemy.create_engine('sqlite:///silent_swing.db')
+STREAM_URL = os.getenv("ALPACA_STREAM_URL", "wss://paper-api.alpaca.markets/stream" if PAPER else "wss://api.alpaca.markets/stream")
+RECONCILE_SECONDS = 300  # Polling check_fills only backs up the stream now
+TRAIL_SECONDS = 60       # Periodic trailing-stop pass (fills trigger one immediately)
+SNAPSHOT_SECONDS = 3600  # How often to append end-of-day equity rows for the dashboard (new days only)
+POLL_PAGE_SIZE = 500                        # Alpaca's max orders per request
+WATERMARK_OVERLAP = timedelta(minutes=5)    # Re-ask a little before the watermark; INSERT OR IGNORE absorbs repeats
+PAGE_OVERLAP = timedelta(seconds=1)         # `after` is exclusive: step back so orders sharing the page's last timestamp aren't skipped
+FIRST_POLL_LOOKBACK = timedelta(days=1)     # Window for the very first poll (no watermark yet)
+FILL_EVENTS = ("fill", "canceled", "expired", "done_for_day")  # Order is finished; log it if anything filled
 
 class TradeMonitor:
-    def __init__(self):
-        self.client = TradingClient(API_KEY, SECRET_KEY, paper=PAPER)
+    def __init__(self, client=None, db=None, data_client=None):
+        if client is None and (not API_KEY or not SECRET_KEY):
+            raise ValueError("❌ Monitor Error: API Keys missing in .env")
+        self.client = client or TradingClient(API_KEY, SECRET_KEY, paper=PAPER)
+        if data_client is None and client is None:
+            from alpaca.data.historical import StockHistoricalDataClient
+            data_client = StockHistoricalDataClient(API_KEY, SECRET_KEY)
+        self.data_client = data_client  # Session volume for live RVOL (None: signals are scored without it)
+        self.engine = db if db is not None else get_engine()
         # Track local High Water Marks to know when to trail
         self.high_water_marks = {} 
+        # Live indicator state per held symbol: re-seeded from the local cache when it
+        # doesn't reach the previous session, then every quote is re-scored in O(1)
+        self.indicators = IndicatorBook().load()
+        self.seeded_on = {}  # Symbol -> day a re-seed was last attempted (at most one try per day)
+        self.live_setups = {}
+        # Every order id in trade_history (loaded once, then kept current), the start of the
+        # last poll and the orders that were still open then
+        self.known_ids = None
+        self.watermark = None
+        self.open_ids = set()
+        self._fill_lock = threading.Lock()
+        self._trail_lock = threading.Lock()
+        self.last_event_at = None
+        self._background = set()
+
+    def refresh_signal(self, symbol, price, volume=None):
+        """Re-evaluates the strategy setup for a held symbol on its latest price.
+
+        `volume` is the session's volume so far. Without it RVOL is NaN, so
+        MOMENTUM_BREAK can't fire; OVERSOLD_DIP and TREND_RECLAIM still can.
+        """
+        try:
+            today = datetime.now().date()
+            state = self.indicators.states.get(symbol)
+            stale = state is None or state.last_date is None or state.last_date < previous_session(today)
+            if stale and self.seeded_on.get(symbol) != today:
+                self.seeded_on[symbol] = today
+                bot = SilentBacktester(symbol, (datetime.now() - timedelta(days=80)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d'))
+                df = bot.fetch_data()
+                if not df.empty:
+                    self.indicators.seed(symbol, df)
+                    self.indicators.save()
+            if symbol not in self.indicators:
+                return None
+
+            snap = self.indicators[symbol].tick(price, volume)
+            if snap['Setup'] != self.live_setups.get(symbol):
+                print(f"📡 {symbol} live setup: {snap['Setup']} (RSI {snap['RSI']:.1f}, Price ${price})")
+                self.live_setups[symbol] = snap['Setup']
+            return snap
+        except Exception as e:
+            print(f"⚠️ Live Signal Error ({symbol}): {e}")
+            return None
+
+    def session_volumes(self, symbols):
+        """{symbol: today's volume so far} from one snapshot request ({} without a data client or on error)."""
+        if self.data_client is None or not symbols:
+            return {}
+        try:
+            from alpaca.data.requests import StockSnapshotRequest
+            snaps = self.data_client.get_stock_snapshot(StockSnapshotRequest(symbol_or_symbols=list(symbols)))
+            return {s: float(snap.daily_bar.volume) for s, snap in snaps.items() if snap and snap.daily_bar}
+        except Exception as e:
+            print(f"⚠️ Session Volume Error: {e}")
+            return {}
 
+    @traced("monitor.update_trailing_stops")
     def update_trailing_stops(self):
         """Dynamic logic to lock in profits as prices rise."""
-        try:
-            positions = self.client.get_all_positions()
-            orders = self.client.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN, nested=True))
+        # One pass at a time: a fill-triggered pass and the periodic one would both replace the same stop leg
+        with self._trail_lock:
+            try:
+                positions = self.client.get_all_positions()
+                orders = self.client.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN, nested=True))
+                volumes = self.session_volumes([p.symbol for p in positions])
             
-            for pos in positions:
-                symbol = pos.symbol
-                curr_price = float(pos.current_price)
+                for pos in positions:
+                    symbol = pos.symbol
+                    curr_price = float(pos.current_price)
                 
-                # 1. Update High Water Mark
-                if symbol not in self.high_water_marks or curr_price > self.high_water_marks[symbol]:
-                    self.high_water_marks[symbol] = curr_price
-                    print(f"📈 New high for {symbol}: ${curr_price}")
-
-                # 2. Find the Stop Loss order for this position
-                # Alpaca lists legs under the primary filled order
-                for order in orders:
-                    if order.symbol == symbol and order.side == OrderSide.SELL and order.stop_price:
-                        old_stop = float(order.stop_price)
-                        # Rule: Trail at 5% below the highest price seen
-                        new_stop = round(self.high_water_marks[symbol] * 0.95, 2)
+                    # 1. Update High Water Mark
+                    if symbol not in self.high_water_marks or curr_price > self.high_water_marks[symbol]:
+                        self.high_water_marks[symbol] = curr_price
+                        print(f"📈 New high for {symbol}: ${curr_price}")
+
+                    self.refresh_signal(symbol, curr_price, volumes.get(symbol))
+
+                    # 2. Find the Stop Loss order for this position
+                    # Alpaca lists legs under the primary filled order
+                    for order in orders:
+                        if order.symbol == symbol and order.side == OrderSide.SELL and order.stop_price:
+                            old_stop = float(order.stop_price)
+                            # Rule: Trail at 5% below the highest price seen
+                            new_stop = round(self.high_water_marks[symbol] * 0.95, 2)
                         
-                        # 3. If new stop is significantly higher (> 0.5%), replace it
-                        if new_stop > old_stop * 1.005:
-                            print(f"🔄 Trailing Stop for {symbol}: {old_stop} -> {new_stop}")
-                            self.client.replace_order_by_id(order.id, ReplaceOrderRequest(stop_price=new_stop))
-                            send_msg(f"🛡️ **PROFIT LOCKED:** {symbol}\nSafety net moved up to **${new_stop}**")
+                            # 3. If new stop is significantly higher (> 0.5%), replace it
+                            if new_stop > old_stop * 1.005:
+                                print(f"🔄 Trailing Stop for {symbol}: {old_stop} -> {new_stop}")
+                                self.client.replace_order_by_id(order.id, ReplaceOrderRequest(stop_price=new_stop))
+                                send_msg(f"🛡️ **PROFIT LOCKED:** {symbol}\nSafety net moved up to **${new_stop}**")
                             
+            except Exception as e:
+                print(f"⚠️ Trailing Loop Error: {e}")
+
+    @traced("monitor.update_equity_snapshots")
+    def update_equity_snapshots(self):
+        """Writes the dashboard's end-of-day equity rows; the dashboard itself only reads them."""
+        try:
+            equity_history.update_snapshots(self.engine)
         except Exception as e:
-            print(f"⚠️ Trailing Loop Error: {e}")
+            print(f"⚠️ Equity Snapshot Error: {e}")
+
+    def _ensure_ledger(self):
+        """Known-id set, fill watermark and tracked open orders (once per process; the schema/unique index live in storage)."""
+        if self.known_ids is not None:
+            return
+        self.known_ids = known_order_ids(self.engine)
+        # Older state only has the oldest-open-order watermark: an earlier, so safe, starting point
+        saved = get_state('fill_watermark', engine=self.engine) or get_state('order_watermark', engine=self.engine)
+        self.watermark = pd.Timestamp(saved) if saved else None
+        self.open_ids = set(json.loads(get_state('open_order_ids', '[]', engine=self.engine)))
 
+    def _save_watermark(self, ts, open_ids):
+        # Open ids first: a crash in between leaves the old, earlier watermark
+        set_state('open_order_ids', json.dumps(sorted(open_ids)), self.engine)
+        set_state('fill_watermark', ts.isoformat(), self.engine)
+        self.watermark, self.open_ids = ts, set(open_ids)
+
+    @traced("monitor.check_fills")
     def check_fills(self):
-        """Checks for recent trade fills that aren't in our DB yet."""
+        """Checks for closed orders that aren't in our DB yet.
+
+        Alpaca's `after` filters on submission time, and a bracket's stop/target leg
+        is submitted with its parent, days or weeks before it fills. So the poll
+        pages closed orders submitted since the last poll, and the orders that
+        were open at the last poll (the long-lived legs among them) are looked up
+        by id once they leave the open list.
+        """
         try:
-            now = datetime.now(pytz.utc)
-            filter_req = GetOrdersRequest(status=QueryOrderStatus.CLOSED, after=now - timedelta(days=1))
-            orders = self.client.get_orders(filter=filter_req)
-            
-            try:
-                history = pd.read_sql('trade_history', engine)
-                known_ids = history['order_id'].astype(str).tolist()
-            except:
-                known_ids = []
-        
-            for order in orders:
-                if str(order.id) not in known_ids and order.filled_qty and float(order.filled_qty) > 0:
-                    self.process_fill(order)
+            self._ensure_ledger()
+            started = pd.Timestamp(datetime.now(pytz.utc))
+            if self.watermark is not None:
+                after = self.watermark - WATERMARK_OVERLAP
+            else:
+                after = started - FIRST_POLL_LOOKBACK
+            # Open before the closed pages are read: an order that closes in between is seen by both, ids dedupe
+            still_open = self.client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=POLL_PAGE_SIZE))
+            open_ids = {str(o.id) for o in still_open}
+            seen, recorded = set(), 0
+
+            while True:
+                filter_req = GetOrdersRequest(status=QueryOrderStatus.CLOSED, after=after, direction=Sort.ASC, limit=POLL_PAGE_SIZE)
+                orders = self.client.get_orders(filter=filter_req)
+                fresh = [o for o in orders if str(o.id) not in seen]
+                for order in fresh:
+                    seen.add(str(order.id))
+                    if str(order.id) not in self.known_ids and order.filled_qty and float(order.filled_qty) > 0:
+                        recorded += self.record_fill(order, sync_ledger=False)
+                if len(orders) < POLL_PAGE_SIZE:
+                    break
+                # Next page, inclusive of the last timestamp (ids dedupe the repeats); a full
+                # page of one timestamp with nothing new can only be stepped past
+                last = pd.Timestamp(orders[-1].submitted_at)
+                after = last - PAGE_OVERLAP if fresh else last
+
+            # Orders open last time that closed since, submitted before the window
+            for order_id in sorted(self.open_ids - open_ids - seen - self.known_ids):
+                order = self.client.get_order_by_id(order_id)
+                if order.filled_qty and float(order.filled_qty) > 0:
+                    recorded += self.record_fill(order, sync_ledger=False)
+
+            if recorded:
+                ledger.safe_sync(self.engine)  # One closed_trades update for the whole poll
+            self._save_watermark(started, open_ids)
         except Exception as e:
             print(f"⚠️ Fill Check Error: {e}")
 
-    def process_fill(self, order):
+    def record_fill(self, order, sync_ledger=True):
+        """process_fill once per order id, whichever path (stream or poll) sees it first."""
+        with self._fill_lock:
+            self._ensure_ledger()
+            if str(order.id) in self.known_ids:
+                return False
+            inserted = self.process_fill(order, sync_ledger)
+            self.known_ids.add(str(order.id))
+            return inserted
+
+    def process_fill(self, order, sync_ledger=True):
         side = "BUY" if order.side == OrderSide.BUY else "SELL"
         symbol = order.symbol
         qty = float(order.filled_qty)
         price = float(order.filled_avg_price) if order.filled_avg_price else 0.0
         
-        # Log to DB (Needed for Dashboard)
-        df = pd.DataFrame([{'date': order.filled_at, 'ticker': symbol, 'action': side, 'price': price, 'qty': qty, 'order_id': str(order.id)}])
-        df.to_sql('trade_history', engine, if_exists='append', index=False)
-        
+        # Log to DB (Needed for Dashboard); the unique index makes a repeat a no-op
+        inserted, = insert_trades([{'date': order.filled_at, 'ticker': symbol, 'action': side, 'price': price, 'qty': qty,
+                                    'order_id': str(order.id)}], self.engine)
+        if not inserted:
+            return False
+        if sync_ledger:
+            ledger.safe_sync(self.engine)  # closed_trades for this ticker (realized PnL on sells)
+
         # Notification
         if side == "BUY":
             send_msg(f"🔵 **NEW POSITION:** {symbol}\nFilled {qty} @ ${price:.2f}")
         else:
             send_msg(f"🛑 **CLOSED:** {symbol}\nSold {qty} @ ${price:.2f}\n✅ Profit/Loss captured.")
+        return True
+
+    # --- Push-based monitoring (trade_updates stream) ---
+    def handle_trade_update(self, data):
+        """One trade_updates event -> log the fill and re-run the stops. Returns True if a fill was logged."""
+        order = _order_from_event(data.get('order', {}))
+        self.last_event_at = time.perf_counter()
+        if data.get('event') not in FILL_EVENTS or not order.filled_qty or float(order.filled_qty) <= 0:
+            return False
+        if not self.record_fill(order, sync_ledger=False):  # Ledger catches up off the hot path (_after_fill)
+            return False
+        if order.side == OrderSide.SELL:
+            # Position closed (stop or target hit): start a fresh high-water mark next time
+            self.high_water_marks.pop(order.symbol, None)
+        else:
+            self.high_water_marks[order.symbol] = max(self.high_water_marks.get(order.symbol, 0.0), float(order.filled_avg_price or 0.0))
+        return True
+
+    async def consume_stream(self, url=STREAM_URL, key=API_KEY, secret=SECRET_KEY, on_fill=None):
+        """Reads trade_updates forever, reconnecting with backoff if the socket drops."""
+        import websockets
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(url, ping_interval=20) as ws:
+                    await ws.send(json.dumps({"action": "auth", "key": key, "secret": secret}))
+                    await ws.send(json.dumps({"action": "listen", "data": {"streams": ["trade_updates"]}}))
+                    print(f"🔌 Trade stream connected: {url}")
+                    backoff = 1
+                    async for raw in ws:
+                        msg = json.loads(raw)
+                        stream = msg.get("stream")
+                        if stream == "authorization" and msg.get("data", {}).get("status") != "authorized":
+                            raise PermissionError(f"stream auth rejected: {msg.get('data')}")
+                        if stream != "trade_updates":
+                            continue
+                        if await asyncio.to_thread(self.handle_trade_update, msg["data"]):
+                            if on_fill:
+                                on_fill(msg["data"])
+                            task = asyncio.create_task(asyncio.to_thread(self._after_fill))
+                            self._background.add(task)
+                            task.add_done_callback(self._background.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Trade Stream Error: {e} (reconnecting in {backoff}s)")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _after_fill(self):
+        ledger.safe_sync(self.engine)
+        self.update_trailing_stops()
+
+    async def _every(self, seconds, fn):
+        while True:
+            await asyncio.to_thread(fn)
+            await asyncio.sleep(seconds)
+
+    async def run_async(self, url=STREAM_URL, reconcile_seconds=RECONCILE_SECONDS, trail_seconds=TRAIL_SECONDS):
+        """Stream-driven fills + stops, with check_fills kept as a slow reconciliation poll."""
+        await asyncio.gather(
+            self.consume_stream(url),
+            self._every(reconcile_seconds, self.check_fills),
+            self._every(trail_seconds, self.update_trailing_stops),
+            self._every(SNAPSHOT_SECONDS, self.update_equity_snapshots),
+            self._every(tracing.FLUSH_SECONDS, lambda: tracing.flush("monitor")),
+        )
+
+
+def _order_from_event(o):
+    """trade_updates order JSON -> the attributes process_fill reads from an alpaca Order."""
+    return SimpleNamespace(
+        id=o.get('id'),
+        client_order_id=o.get('client_order_id'),
+        symbol=o.get('symbol'),
+        side=OrderSide(o['side']) if o.get('side') else None,
+        qty=o.get('qty'),
+        filled_qty=o.get('filled_qty'),
+        filled_avg_price=o.get('filled_avg_price'),
+        filled_at=pd.Timestamp(o['filled_at']) if o.get('filled_at') else None,
+        status=o.get('status'),
+    )
+
 
 if __name__ == "__main__":
+    import sys
     send_msg("👀 **Trade Monitor Active**\nTracking high-water marks and profit locks.")
     monitor = TradeMonitor()
-    while True:
-        monitor.check_fills()
-        monitor.update_trailing_stops() # Run the trailing logic
-        time.sleep(60)
+    if "--poll" in sys.argv:
+        # Legacy 60s polling loop
+        last_flush, last_snapshot = time.time(), 0.0
+        while True:
+            monitor.check_fills()
+            monitor.update_trailing_stops() # Run the trailing logic
+            if time.time() - last_snapshot >= SNAPSHOT_SECONDS:
+                monitor.update_equity_snapshots()
+                last_snapshot = time.time()
+            if time.time() - last_flush >= tracing.FLUSH_SECONDS:
+                tracing.flush("monitor")
+                last_flush = time.time()
+            time.sleep(60)
+    else:
+        asyncio.run(monitor.run_async())
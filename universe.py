@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import threading
+from io import StringIO
+from datetime import datetime, timezone
+import pandas as pd
+import requests
+
+# One place that knows which tickers we trade. The S&P 500 list is scraped
+# from Wikipedia at most once per TTL into a versioned JSON snapshot; every
+# run reads the snapshot, and a stale one is refreshed in the background.
+
+# --- CONFIGURATION ---
+UNIVERSE_FILE = os.getenv("UNIVERSE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "universe.json"))
+SP500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+TTL_HOURS = float(os.getenv("UNIVERSE_TTL_HOURS", "24"))
+FETCH_TIMEOUT = 10   # Seconds for the Wikipedia request
+HISTORY_KEEP = 30    # Membership changes remembered in the snapshot
+# Non-index assets scanned alongside the S&P 500 (comma list in UNIVERSE_EXTRA overrides)
+EXTRA_ASSETS = [t.strip() for t in os.getenv("UNIVERSE_EXTRA", "BTC-USD,ETH-USD,GLD,SLV,USO,UNG,TLT,VIXY").split(",") if t.strip()]
+# Used only if there has never been a successful scrape
+FALLBACK_TICKERS = ["SPY", "QQQ", "IWM", "NVDA", "TSLA", "AAPL", "AMD", "AMZN", "MSFT", "GOOGL", "META"]
+
+
+def fetch_sp500(timeout=FETCH_TIMEOUT):
+    """Current S&P 500 members from Wikipedia (Yahoo-style symbols, e.g. BRK-B)."""
+    resp = requests.get(SP500_URL, headers={"User-Agent": "Mozilla/5.0"}, timeout=timeout)
+    resp.raise_for_status()
+    table = pd.read_html(StringIO(resp.text))
+    return [t.replace('.', '-') for t in table[0]['Symbol'].tolist()]
+
+
+class Universe:
+    """Versioned on-disk snapshot of the index members, refreshed when older than the TTL."""
+
+    def __init__(self, path=UNIVERSE_FILE, ttl_hours=TTL_HOURS, fetcher=fetch_sp500):
+        self.path = path
+        self.ttl_hours = ttl_hours
+        self.fetcher = fetcher
+        self._snapshot = None
+        self._refreshing = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """The snapshot on disk (re-read if another process replaced it), or None."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if self._snapshot is None or self._snapshot["_mtime"] != mtime:
+            try:
+                with open(self.path) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Universe snapshot unreadable ({e}), ignoring it")
+                return None
+            snap["_mtime"] = mtime
+            self._snapshot = snap
+        return self._snapshot
+
+    def age_hours(self, snap):
+        fetched = datetime.fromisoformat(snap["fetched_at"])
+        return (datetime.now(timezone.utc) - fetched).total_seconds() / 3600
+
+    def is_stale(self, snap):
+        return snap is None or self.age_hours(snap) >= self.ttl_hours
+
+    def refresh(self):
+        """Scrapes the member list, diffs it against the snapshot and saves a new version.
+
+        Returns the new snapshot, or the old one if the fetch failed.
+        """
+        old = self.load()
+        try:
+            members = sorted(set(self.fetcher()))
+            if len(members) < 400:
+                raise ValueError(f"only {len(members)} symbols parsed")  # Page layout changed, don't trust it
+        except Exception as e:
+            print(f"⚠️ Universe refresh failed: {e}")
+            return old
+
+        previous = set(old["tickers"]) if old else set()
+        added, removed = sorted(set(members) - previous), sorted(previous - set(members))
+        now = datetime.now(timezone.utc).isoformat()
+        history = list(old.get("history", [])) if old else []
+        version = (old["version"] + 1) if old and (added or removed) else (old["version"] if old else 1)
+        if old and (added or removed):
+            history = (history + [{"version": version, "at": now, "added": added, "removed": removed}])[-HISTORY_KEEP:]
+            print(f"🔄 Universe v{version}: +{len(added)} {added[:10]} | -{len(removed)} {removed[:10]}")
+
+        snap = {"version": version, "fetched_at": now, "source": SP500_URL, "tickers": members, "history": history}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(snap, f, indent=1)
+        os.replace(tmp, self.path)  # Atomic: readers see the old or the new file, never half of one
+        self._snapshot = None
+        return self.load()
+
+    def refresh_in_background(self):
+        """Starts one refresh thread (non-daemon, so a short script still saves the result)."""
+        with self._lock:
+            if self._refreshing is None or not self._refreshing.is_alive():
+                self._refreshing = threading.Thread(target=self.refresh, name="universe-refresh")
+                self._refreshing.start()
+            return self._refreshing
+
+    def members(self):
+        """Index members: the snapshot as is, refreshed in the background when stale.
+
+        Only a machine that has never scraped successfully waits on the network
+        (bounded by FETCH_TIMEOUT), and falls back to FALLBACK_TICKERS if that fails.
+        """
+        snap = self.load()
+        if snap is None:
+            snap = self.refresh()
+        elif self.is_stale(snap):
+            self.refresh_in_background()
+        return list(snap["tickers"]) if snap else list(FALLBACK_TICKERS)
+
+    def tickers(self, extra=None):
+        """members() plus the extra assets (EXTRA_ASSETS by default), de-duplicated."""
+        extra = EXTRA_ASSETS if extra is None else extra
+        return list(dict.fromkeys(self.members() + list(extra)))
+
+
+UNIVERSE = Universe()
+
+
+def get_universe(extra=None):
+    return UNIVERSE.tickers(extra)
+
+
+if __name__ == "__main__":
+    # python universe.py            -> show the snapshot (refreshing it if stale)
+    # python universe.py --refresh  -> scrape now
+    # python universe.py --demo     -> offline: snapshot, cached reads, background refresh with a diff
+    if "--demo" in sys.argv:
+        import tempfile
+        base = [f"SYN{i:04d}" for i in range(503)]
+        lists = iter([base, base[3:] + ["NEW1", "NEW2", "NEW3"]])
+
+        def fake_fetch():
+            time.sleep(0.3)  # Stand-in for the HTML download + parse
+            return next(lists)
+
+        uni = Universe(os.path.join(tempfile.mkdtemp(), "universe.json"), fetcher=fake_fetch)
+        t0 = time.perf_counter()
+        first = uni.tickers()
+        print(f"First run (no snapshot): {len(first)} tickers in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        t0 = time.perf_counter()
+        for _ in range(100):
+            uni.tickers()
+        print(f"Snapshot reads: {(time.perf_counter() - t0) * 10:.2f} ms each")
+
+        uni.ttl_hours = 0  # Pretend a day went by
+        t0 = time.perf_counter()
+        stale = uni.tickers()
+        print(f"Stale snapshot served in {(time.perf_counter() - t0) * 1000:.2f} ms ({len(stale)} tickers), refreshing in background...")
+        uni._refreshing.join()
+        snap = uni.load()
+        print(f"Now v{snap['version']} with {len(snap['tickers'])} members | last change: {snap['history'][-1]}")
+    else:
+        snap = UNIVERSE.refresh() if "--refresh" in sys.argv else UNIVERSE.load()
+        if snap is None:
+            print("❌ No universe snapshot yet (run with --refresh)")
+        else:
+            print(f"Universe v{snap['version']}: {len(snap['tickers'])} members, fetched {UNIVERSE.age_hours(snap):.1f}h ago")
+            for change in snap["history"][-5:]:
+                print(f"  v{change['version']} {change['at'][:10]}: +{change['added']} -{change['removed']}")
+            if UNIVERSE.is_stale(snap):
+                print("⚠️ Snapshot is older than the TTL (run with --refresh)")
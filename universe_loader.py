@@ -0,0 +1,172 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from tenacity import Retrying, stop_after_attempt, wait_exponential
+from backtester import HISTORY_PADDING_DAYS
+from data_cache import CACHE
+from data_providers import get_provider
+
+# --- CONFIGURATION ---
+CHUNK_SIZE = 50      # Symbols per download request
+MAX_WORKERS = 8      # Concurrent requests in flight
+MAX_ATTEMPTS = 3     # Per-chunk attempts before the whole chunk is reported as failed
+
+
+class UniverseLoader:
+    """Fetches a whole universe in multi-symbol chunks on a bounded thread pool.
+
+    Bars already in the local cache are served from disk; only tickers with a
+    missing date range are downloaded, grouped so tickers that need the same
+    range share a request.
+    """
+
+    def __init__(self, fetch_many=None, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS,
+                 max_attempts=MAX_ATTEMPTS, backoff=1.0, cache=CACHE, provider=None, padding_days=HISTORY_PADDING_DAYS):
+        # Default source is the configured provider (MARKET_DATA_PROVIDER); local
+        # providers (cache/replay) bypass the Parquet store
+        if fetch_many is None:
+            provider = provider or get_provider()
+            fetch_many = provider.fetch_many
+            cache = cache if provider.cacheable else None
+        self.fetch_many = fetch_many
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.cache = cache
+        self.padding_days = padding_days  # Extra history before start_date (0 = just the requested bars)
+        self.failures = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def load(self, tickers, start_date, end_date):
+        """Returns {ticker: DataFrame} covering start_date (minus padding_days) to end_date.
+
+        Symbols that could not be loaded are left out and listed in self.failures.
+        """
+        t0 = time.perf_counter()
+        start = pd.to_datetime(start_date) - pd.Timedelta(days=self.padding_days)
+        end = pd.to_datetime(end_date)
+        tickers = list(dict.fromkeys(tickers))
+        self.failures = {}
+        data = {}
+
+        # 1. Split the universe into "cache hit" and "needs these ranges"
+        jobs = {}
+        for ticker in tickers:
+            if self.cache is None:
+                jobs.setdefault(((start, end),), []).append(ticker)
+                continue
+            cached, meta = self.cache.load(ticker)
+            ranges = tuple(self.cache.missing_ranges(start, end, cached, meta))
+            if ranges:
+                jobs.setdefault(ranges, []).append(ticker)
+            else:
+                data[ticker] = cached.loc[(cached.index >= start) & (cached.index < end)]
+        cache_hits = len(data)
+
+        # 2. Download every (range, chunk) pair concurrently
+        tasks = []
+        for ranges, group in jobs.items():
+            for i in range(0, len(group), self.chunk_size):
+                tasks.append((ranges, group[i:i + self.chunk_size]))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for result in pool.map(lambda task: self._load_chunk(task[0], task[1], start, end), tasks):
+                data.update(result)
+
+        self.stats = {
+            "requested": len(tickers),
+            "loaded": len(data),
+            "cache_hits": cache_hits,
+            "requests": sum(len(ranges) for ranges, _ in tasks),
+            "failed": len(self.failures),
+            "seconds": round(time.perf_counter() - t0, 2),
+        }
+        return {t: data[t] for t in tickers if t in data}
+
+    def _load_chunk(self, ranges, chunk, start, end):
+        pieces = {t: [] for t in chunk}
+        for range_start, range_end in ranges:
+            try:
+                frames = self._fetch_with_retry(chunk, range_start, range_end)
+            except Exception as e:
+                self._fail(chunk, f"download failed after {self.max_attempts} attempts: {e}")
+                return {}
+            for ticker in chunk:
+                pieces[ticker].append(((range_start, range_end), frames.get(ticker, pd.DataFrame())))
+
+        result = {}
+        for ticker, ticker_pieces in pieces.items():
+            try:
+                if self.cache is not None:
+                    cached, meta = self.cache.load(ticker)
+                    df = self.cache.merge(ticker, start, end, ticker_pieces, cached, meta)
+                else:
+                    df = ticker_pieces[0][1]
+            except Exception as e:
+                self._fail([ticker], f"cache merge failed: {e}")
+                continue
+            if df.empty:
+                self._fail([ticker], "no data returned")
+            else:
+                result[ticker] = df
+        return result
+
+    def _fetch_with_retry(self, chunk, start, end):
+        for attempt in Retrying(stop=stop_after_attempt(self.max_attempts),
+                                wait=wait_exponential(multiplier=self.backoff, max=8 * self.backoff),
+                                reraise=True):
+            with attempt:
+                return self.fetch_many(chunk, start, end)
+
+    def _fail(self, tickers, reason):
+        with self._lock:
+            for ticker in tickers:
+                self.failures[ticker] = reason
+
+    def report(self):
+        s = self.stats
+        print(f"📦 Universe Load: {s.get('loaded', 0)}/{s.get('requested', 0)} tickers in {s.get('seconds', 0)}s "
+              f"({s.get('cache_hits', 0)} from cache, {s.get('requests', 0)} requests, {s.get('failed', 0)} failed)")
+        for ticker, reason in sorted(self.failures.items()):
+            print(f"   ⚠️ {ticker}: {reason}")
+
+
+if __name__ == "__main__":
+    # Offline stand-in: a fake bulk endpoint with fixed per-request latency,
+    # a dead symbol and one flaky chunk, to show retry + pool-size scaling.
+    from synthetic_data import make_ohlcv
+
+    LATENCY = 0.25
+    universe = [f"SYN{i:03d}" for i in range(500)] + ["DEAD"]
+    bars = {t: make_ohlcv(t, "2024-11-01", "2025-06-01") for t in universe if t != "DEAD"}
+
+    class LatencySource:
+        def __init__(self):
+            self.calls = 0
+            self.flaked = False
+            self.lock = threading.Lock()
+
+        def __call__(self, tickers, start, end):
+            with self.lock:
+                self.calls += 1
+                flake = "SYN100" in tickers and not self.flaked
+                self.flaked = self.flaked or flake
+            time.sleep(LATENCY)
+            if flake:
+                raise ConnectionError("simulated 502 from data vendor")
+            return {t: bars[t].loc[start:end] for t in tickers if t in bars}
+
+    print(f"--- UNIVERSE LOADER: {len(universe)} symbols, {LATENCY * 1000:.0f}ms per request ---")
+    serial = None
+    for workers in [1, 2, 4, 8, 16]:
+        source = LatencySource()
+        loader = UniverseLoader(fetch_many=source, chunk_size=25, max_workers=workers, backoff=0.05, cache=None)
+        t0 = time.perf_counter()
+        frames = loader.load(universe, "2025-01-01", "2025-06-01")
+        elapsed = time.perf_counter() - t0
+        serial = serial or elapsed
+        print(f"workers={workers:<3} | {elapsed:6.2f}s | speedup x{serial / elapsed:4.1f} | "
+              f"{len(frames)} loaded | {source.calls} requests | failed: {sorted(loader.failures)}")
@@ -0,0 +1,151 @@
+import sys
+import time
+import pandas as pd
+from universe_loader import UniverseLoader
+from indicator_engine import build_panel, compute_indicators
+from simulation_engine import SimulationResult, triple_threat_rules
+from param_sweep import DEFAULT_GRID, expand_grid, sweep_job, run_jobs
+
+# Walk-forward optimization: pick the best grid combo on each train window, then
+# trade it blind on the following test window. Indicators are computed once on
+# the whole panel and sliced per fold -- every rolling window only looks back,
+# so a fold sees exactly what SilentBacktester.apply_strategy would have shown
+# on those dates, and overlapping train windows cost nothing extra.
+
+# --- CONFIGURATION ---
+TRAIN_MONTHS = 12
+TEST_MONTHS = 3
+ANCHORED = False          # True: every train window starts at the beginning of history
+OPTIMIZE_BY = "sharpe"    # Any summary() column: sharpe, total_return, max_drawdown, win_rate
+MIN_TRADES = 5            # Train combos with fewer trades can't be picked
+WARMUP_BARS = 50          # MA50 needs this much history before the first fold
+REPORT_FILE = "walk_forward_report.csv"
+EQUITY_FILE = "walk_forward_equity.csv"
+
+
+class Fold:
+    def __init__(self, number, train_start, train_end, test_start, test_end):
+        self.number = number
+        self.train_start = train_start
+        self.train_end = train_end      # Exclusive
+        self.test_start = test_start
+        self.test_end = test_end        # Exclusive
+
+    def __repr__(self):
+        return (f"Fold {self.number}: train {self.train_start:%Y-%m-%d}..{self.train_end:%Y-%m-%d} "
+                f"| test {self.test_start:%Y-%m-%d}..{self.test_end:%Y-%m-%d}")
+
+
+class WalkForwardResult:
+    def __init__(self, report, oos, in_sample):
+        self.report = report        # One row per fold: window, chosen params, in- and out-of-sample stats
+        self.oos = oos              # SimulationResult over the stitched test windows
+        self.in_sample = in_sample  # Every (fold, combo) train run
+
+
+def make_folds(dates, train_months=TRAIN_MONTHS, test_months=TEST_MONTHS, anchored=ANCHORED, start=None):
+    """Train/test windows over a DatetimeIndex; test windows tile the history without overlap."""
+    first = pd.Timestamp(start) if start else dates[min(WARMUP_BARS, len(dates) - 1)]
+    stop = dates[-1] + pd.Timedelta(days=1)
+    folds = []
+    train_start, train_end = first, first + pd.DateOffset(months=train_months)
+    while train_end < stop:
+        test_end = min(train_end + pd.DateOffset(months=test_months), stop)
+        folds.append(Fold(len(folds) + 1, train_start, train_end, train_end, test_end))
+        train_end = test_end
+        if not anchored:
+            train_start = train_end - pd.DateOffset(months=train_months)
+    return folds
+
+
+def walk_forward(panel, ind, grid=DEFAULT_GRID, train_months=TRAIN_MONTHS, test_months=TEST_MONTHS,
+                 anchored=ANCHORED, workers=None, rules_factory=triple_threat_rules, start_capital=10000,
+                 start=None, calendar_ticker=None, optimize_by=OPTIMIZE_BY, min_trades=MIN_TRADES):
+    """Optimizes on every train window and stitches the test windows into one equity curve.
+
+    All (fold, combo) train runs go through one process pool, then the chosen
+    combo of every fold is tested concurrently. Each test window starts flat
+    with start_capital; the stitched curve chains the fold returns.
+    """
+    folds = make_folds(panel.dates, train_months, test_months, anchored, start)
+    if not folds:
+        raise ValueError(f"Not enough history for a {train_months}m train + {test_months}m test window")
+    combos = expand_grid(grid)
+
+    # 1. In-sample: combo-major order so each worker reuses its reclassified setups across folds
+    keys = [(fold, params) for params in combos for fold in folds]
+    jobs = [sweep_job(params, rules_factory, start_capital, fold.train_start, fold.train_end, calendar_ticker)
+            for fold, params in keys]
+    in_sample = pd.DataFrame(run_jobs(panel, ind, jobs, workers))
+    in_sample.insert(0, "Fold", [fold.number for fold, _ in keys])
+
+    # 2. Pick the best combo per fold
+    best = {}
+    for fold in folds:
+        rows = in_sample[in_sample["Fold"] == fold.number]
+        eligible = rows[rows["trades"] >= min_trades]
+        rows = eligible if len(eligible) else rows
+        best[fold.number] = {k: in_sample.at[rows[optimize_by].idxmax(), k] for k in in_sample.columns}  # .at keeps int columns int
+
+    # 3. Out-of-sample
+    jobs = [sweep_job({k: best[fold.number][k] for k in grid}, rules_factory, start_capital,
+                      fold.test_start, fold.test_end, calendar_ticker, keep_result=True) for fold in folds]
+    tested = run_jobs(panel, ind, jobs, workers)
+
+    # 4. Stitch: scale each fold's curve onto the capital the previous one ended with
+    capital, curves, trades, report = float(start_capital), [], [], []
+    for fold, (row, result) in zip(folds, tested):
+        if len(result.equity):
+            curves.append(result.equity / start_capital * capital)
+            capital = curves[-1].iloc[-1]
+        trades.append(result.trades.assign(Fold=fold.number))
+        report.append({
+            "Fold": fold.number,
+            "Train_Start": fold.train_start, "Train_End": fold.train_end,
+            "Test_Start": fold.test_start, "Test_End": fold.test_end,
+            **{k: best[fold.number][k] for k in grid},
+            f"IS_{optimize_by}": best[fold.number][optimize_by],
+            "IS_total_return": best[fold.number]["total_return"],
+            **{f"OOS_{k}": v for k, v in row.items() if k not in grid and k != "seconds"},
+        })
+
+    equity = pd.concat(curves) if curves else pd.Series(dtype=float, name="Equity")
+    oos = SimulationResult(equity, pd.concat(trades, ignore_index=True), start_capital)
+    return WalkForwardResult(pd.DataFrame(report), oos, in_sample)
+
+
+def load_panel(universe, start_date, end_date):
+    """Same cached bars SilentBacktester reads, aligned into one PricePanel."""
+    frames = UniverseLoader().load(universe, start_date, end_date)
+    for ticker in universe:
+        if ticker not in frames:
+            print(f"Skipping {ticker} (Data Error)")
+    return build_panel(frames)
+
+
+if __name__ == "__main__":
+    # python walk_forward.py             -> live universe from new_logic_simulation (needs network or a warm cache)
+    # python walk_forward.py --synthetic -> offline run on synthetic_data
+    t0 = time.perf_counter()
+    if "--synthetic" in sys.argv:
+        from synthetic_data import make_ohlcv
+        panel = build_panel({f"SYN{i:03d}": make_ohlcv(f"SYN{i:03d}", "2018-01-01", "2025-01-01", seed=i) for i in range(200)})
+        calendar = None
+    else:
+        from new_logic_simulation import UNIVERSE
+        panel = load_panel(UNIVERSE, "2019-01-01", pd.Timestamp.today().strftime("%Y-%m-%d"))
+        calendar = "SPY" if "SPY" in panel.column else None
+    ind = compute_indicators(panel)
+
+    result = walk_forward(panel, ind, calendar_ticker=calendar)
+    s = result.oos.summary()
+    print(f"--- WALK-FORWARD: {len(result.report)} folds x {len(expand_grid(DEFAULT_GRID))} combos "
+          f"({'anchored' if ANCHORED else 'rolling'} {TRAIN_MONTHS}m/{TEST_MONTHS}m) in {time.perf_counter() - t0:.1f}s ---")
+    print(result.report[["Fold", "Test_Start", "rsi_max", "rvol_min", "stop_atr_mult", f"IS_{OPTIMIZE_BY}",
+                         "OOS_total_return", "OOS_sharpe", "OOS_trades"]].to_string(index=False))
+    print(f"\nOut-of-sample: return {s['total_return']:.1f}% | Sharpe {s['sharpe']:.2f} | "
+          f"max DD {s['max_drawdown']:.1f}% | {s['trades']} trades | win rate {s['win_rate']:.1f}%")
+
+    result.report.to_csv(REPORT_FILE, index=False)
+    result.oos.equity.to_csv(EQUITY_FILE)
+    print(f"✅ Saved {REPORT_FILE} and {EQUITY_FILE}")